@@ -11,8 +11,9 @@ import sys
 import json
 import copy
 import traceback
+import threading
 from functools import wraps
-from flask import Flask, request, jsonify, send_from_directory, session, redirect, url_for
+from flask import Flask, Response, request, jsonify, send_from_directory, session, redirect, url_for, stream_with_context
 from datetime import datetime
 
 try:
@@ -30,29 +31,71 @@ except ImportError:
         print("Please install required packages with: pip install flask flask-cors")
         sys.exit(1)
 
-# Import the data store and fixed workflow instead of LangGraph
+# Import the data store (the workflow is loaded lazily, see load_workflow)
 try:
+    # HR_STORAGE_BACKEND=sqlite switches to the indexed SQLite store
     import data_store
+    data_store = data_store.storage_backend()
+    import llm_cache
+    import llm_coalescing
+    import llm_parsing
+    import onboarding_events
+    import onboarding_jobs
+    import onboarding_memory
+    import onboarding_rules
+    import workflow_registry
     print("Imported data store successfully")
-    
-    # Try to import fixed workflow modules
-    try:
-        from fixed_workflow import process_employee, save_workflow_results
-        print("Imported fixed workflow integration successfully")
-        HAS_WORKFLOW = True
-    except ImportError as e:
-        print(f"Fixed workflow integration not available due to import error: {e}")
-        HAS_WORKFLOW = False
-    except Exception as e3:
-        print(f"Other error during workflow import: {e3}")
-        traceback.print_exc()
-        HAS_WORKFLOW = False
 except ImportError as e:
     print(f"ERROR: Required module not found: {e}")
     print("Error: Required packages not found. Please install the requirements:")
     print("pip install -r requirements.txt")
     sys.exit(1)
 
+# The workflow stack (langchain, langgraph and the LLM client) is imported on
+# first use, so workers that only serve employee CRUD start fast.
+# HR_WORKFLOW_WARMUP=background (default) loads it in a thread when the first
+# request arrives; off waits for the first onboarding.
+WORKFLOW_WARMUP = os.environ.get("HR_WORKFLOW_WARMUP", "background").lower()
+HAS_WORKFLOW = None  # Unknown until load_workflow() has run
+workflow = None
+workflow_lock = threading.Lock()
+workflow_warmup_started = False
+
+def load_workflow():
+    """Import the fixed workflow integration once; returns the module, or None if unavailable"""
+    global workflow, HAS_WORKFLOW
+    if HAS_WORKFLOW is not None:
+        return workflow
+    with workflow_lock:
+        if HAS_WORKFLOW is not None:
+            return workflow
+        try:
+            import fixed_workflow
+            print("Imported fixed workflow integration successfully")
+            # Build the LLM client and shared chains now rather than in the first job
+            fixed_workflow.warm_up()
+            workflow = fixed_workflow
+            HAS_WORKFLOW = True
+        except ImportError as e:
+            print(f"Fixed workflow integration not available due to import error: {e}")
+            HAS_WORKFLOW = False
+        except Exception as e3:
+            print(f"Other error during workflow import: {e3}")
+            traceback.print_exc()
+            HAS_WORKFLOW = False
+    return workflow
+
+def warm_up_workflow():
+    """Start loading the workflow in a background thread (once)"""
+    global workflow_warmup_started
+    if workflow_warmup_started or WORKFLOW_WARMUP != "background":
+        return
+    with workflow_lock:
+        if workflow_warmup_started:
+            return
+        workflow_warmup_started = True
+    threading.Thread(target=load_workflow, name="workflow-warmup", daemon=True).start()
+
 # Initialize Flask app with proper static serving
 app = Flask(__name__, static_folder='frontend', static_url_path='')
 app.secret_key = 'hr_workflow_secret_key'  # Change this to a secure random key in production
@@ -237,9 +280,50 @@ def check_auth():
     else:
         return jsonify({"authenticated": False}), 401
 
+def run_onboarding_job(data, employee_id, on_event=None):
+    """Run the workflow for one queued onboarding job and update the employee"""
+    # Ensure equipment and access data are present
+    if "equipment" not in data:
+        data["equipment"] = {"laptop": True, "monitor": True, "keyboard": True}
+    if "access" not in data:
+        data["access"] = {"email": True, "github": True, "slack": True}
+    
+    # Process the employee
+    workflow = load_workflow()
+    if workflow is None:
+        raise RuntimeError("Workflow integration not available")
+    print(f"Processing employee {data['name']} with simplified workflow")
+    workflow_result = workflow.process_employee(data, on_event=on_event)
+    if not workflow_result["success"]:
+        print(f"Workflow failed for {data['name']}: {workflow_result.get('error', 'Unknown error')}")
+        raise RuntimeError(workflow_result.get("error", "Unknown error"))
+    
+    # Save workflow results
+    print(f"Workflow successful for {data['name']}")
+    results_file = workflow.save_workflow_results(workflow_result, employee_id)
+    print(f"Workflow results saved to {results_file}")
+    
+    # Update employee record with workflow info
+    data_store.update_employee(employee_id, {
+        "status": "completed",
+        "equipmentNeeds": workflow_result.get("employee", {}).get("equipmentNeeds", []),
+        "systemAccess": workflow_result.get("employee", {}).get("systemAccess", []),
+        "trainingRequirements": workflow_result.get("employee", {}).get("trainingRequirements", []),
+        "documents": workflow_result.get("documents", []),
+        "workflow_status": "processed",
+        "workflow_completed_steps": workflow_result.get("completed_steps", [])
+    })
+    return workflow_result
+
+@app.before_request
+def start_background_work():
+    """Start the job workers and the workflow warm-up in the process that serves requests (not the reloader parent)"""
+    warm_up_workflow()
+    onboarding_jobs.start(run_onboarding_job)
+
 @app.route('/api/start-onboarding', methods=['POST'])
 def start_onboarding():
-    """Start the onboarding workflow with employee information"""
+    """Create the employee and queue the onboarding workflow; returns 202 with a job id"""
     try:
         # Get employee data from request
         data = request.json
@@ -252,6 +336,13 @@ def start_onboarding():
                 print(f"ERROR: Missing required field: {field}")
                 return jsonify({"error": f"Missing required field: {field}"}), 400
         
+        # Check if workflow is available (waits for the warm-up if it is still loading)
+        if load_workflow() is None:
+            print(f"Workflow not available for {data['name']}")
+            return jsonify({
+                "error": "Workflow integration not available. Please contact IT support."
+            }), 500
+        
         # First create basic employee data
         print(f"Creating basic employee data for {data['name']}")
         employee = data_store.add_employee({
@@ -262,69 +353,65 @@ def start_onboarding():
             "status": "pending"
         })
         
-        result = {
+        # Queue the workflow; the client polls the job for the result
+        try:
+            job = onboarding_jobs.submit(data, employee["id"])
+        except onboarding_jobs.QueueFullError as e:
+            print(f"Onboarding queue full, rejecting {data['name']}: {e}")
+            # Do not leave a pending employee behind that no job will ever process
+            data_store.delete_employee(employee["id"])
+            return jsonify({"error": "Too many onboarding requests in progress. Please try again shortly."}), 503
+        
+        status_url = f"/api/onboarding-jobs/{job['id']}"
+        response = jsonify({
             "success": True,
             "message": f"Process started for {data['name']}",
-            "employee_id": employee["id"]
-        }
-        
-        # Check if workflow is available
-        if HAS_WORKFLOW:
-            try:
-                # Process the employee with simplified workflow
-                print(f"Processing employee {data['name']} with simplified workflow")
-                
-                # Ensure equipment and access data are present
-                if "equipment" not in data:
-                    data["equipment"] = {"laptop": True, "monitor": True, "keyboard": True}
-                if "access" not in data:
-                    data["access"] = {"email": True, "github": True, "slack": True}
-                
-                # Process the employee
-                workflow_result = process_employee(data)
-                
-                # Save workflow results
-                if workflow_result["success"]:
-                    print(f"Workflow successful for {data['name']}")
-                    results_file = save_workflow_results(workflow_result, employee["id"])
-                    print(f"Workflow results saved to {results_file}")
-                    
-                    # Update employee record with workflow info
-                    updated_data = {
-                        "status": "completed",
-                        "equipmentNeeds": workflow_result.get("employee", {}).get("equipmentNeeds", []),
-                        "systemAccess": workflow_result.get("employee", {}).get("systemAccess", []),
-                        "trainingRequirements": workflow_result.get("employee", {}).get("trainingRequirements", []),
-                        "documents": workflow_result.get("documents", []),
-                        "workflow_status": "processed",
-                        "workflow_completed_steps": workflow_result.get("completed_steps", [])
-                    }
-                    
-                    # Update the employee record
-                    updated_employee = data_store.update_employee(employee["id"], updated_data)
-                    
-                    # Return the workflow result directly, which includes the employee data
-                    return jsonify(workflow_result)
-                else:
-                    print(f"Workflow failed for {data['name']}: {workflow_result.get('error', 'Unknown error')}")
-                    return jsonify({"error": workflow_result.get("error", "Unknown error")}), 500
-            except Exception as workflow_error:
-                print(f"Error executing workflow: {str(workflow_error)}")
-                traceback.print_exc()
-                return jsonify({"error": f"Error executing workflow: {str(workflow_error)}"}), 500
-        else:
-            # Use simple process without workflow
-            print(f"Workflow not available, using simple process for {data['name']}")
-            return jsonify({
-                "error": "Workflow integration not available. Please contact IT support."
-            }), 500
-        
-        print(f"Process completed successfully for {data['name']}")
+            "employee_id": employee["id"],
+            "job_id": job["id"],
+            "status": job["status"],
+            "status_url": status_url,
+            "events_url": f"/api/onboarding/{job['id']}/events"
+        })
+        response.headers["Location"] = status_url
+        return response, 202
     except Exception as e:
         print(f"ERROR in start_onboarding: {str(e)}")
         traceback.print_exc()
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/onboarding-jobs/<job_id>', methods=['GET'])
+def get_onboarding_job(job_id):
+    """Get the status, timings and (when done) the result of an onboarding job"""
+    job = onboarding_jobs.get_job(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job)
+
+@app.route('/api/onboarding/<job_id>/events', methods=['GET'])
+def stream_onboarding_events(job_id):
+    """Stream an onboarding job's status changes and node progress as Server-Sent Events"""
+    try:
+        # EventSource sends Last-Event-ID when it reconnects
+        after = int(request.headers.get("Last-Event-ID") or request.args.get("after") or 0)
+    except ValueError:
+        after = 0
+
+    if onboarding_events.has_stream(job_id):
+        events = (onboarding_events.format_sse(item) for item in onboarding_events.follow(job_id, after))
+    else:
+        # Not run by this process (or forgotten): send the job's status once
+        job = onboarding_jobs.get_job(job_id)
+        if job is None:
+            return jsonify({"error": "Job not found"}), 404
+        events = [onboarding_events.format_sse({"id": after + 1, "event": job["status"],
+                                                 "time": datetime.now().isoformat(), "data": job})]
+
+    response = Response(stream_with_context(events), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    # Keep reverse proxies from buffering the stream
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
 # Admin API endpoints
 @app.route('/api/admin/employees', methods=['GET'])
 def get_employees():
@@ -515,12 +602,8 @@ def get_pending_employees():
     try:
         print("API: Fetching pending employees")
         
-        # Get all employees from data store
-        all_employees = data_store.get_all_employees()
-        
-        # Filter for pending status
-        pending_employees = [emp for emp in all_employees 
-                          if emp.get('status', '').lower() in ['pending', 'new', 'in progress', 'onboarding']]
+        # Filter for pending status in the data store
+        pending_employees = data_store.find_employees(status=data_store.PENDING_STATUSES)
         
         print(f"API: Returning {len(pending_employees)} pending employees")
         
@@ -535,6 +618,38 @@ def get_pending_employees():
         traceback.print_exc()
         return jsonify({"error": str(e), "details": traceback.format_exc()}), 500
 
+@app.route('/api/admin/employees/stats', methods=['GET'])
+@login_required
+def get_employee_stats():
+    """Get employee counts per status and per department, and how many were added in the last ?days=7 days"""
+    try:
+        days = int(request.args.get("days", 7))
+        return jsonify(data_store.employee_stats(days))
+    except Exception as e:
+        print("Error fetching employee stats:", e)
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
+
+# Counters of the caching and LLM layers, served by /api/admin/stats/<component>
+COMPONENT_STATS = {
+    "llm-cache": llm_cache.stats,                 # hits and misses of the LLM response cache
+    "llm-parsing": llm_parsing.stats,             # answers parsed, repaired or re-queried
+    "onboarding-rules": onboarding_rules.stats,   # onboardings answered from the mined rules
+    "llm-tokens": onboarding_memory.token_stats,  # estimated tokens per workflow node
+    "llm-coalescing": llm_coalescing.stats,       # LLM calls sent and shared while in flight
+    "workflow-registry": workflow_registry.stats, # graphs and chains built and reused
+}
+
+@app.route('/api/admin/stats/<component>', methods=['GET'])
+@login_required
+def get_component_stats(component):
+    """Get the counters of one component, e.g. /api/admin/stats/llm-cache"""
+    stats = COMPONENT_STATS.get(component)
+    if stats is None:
+        return jsonify({"error": f"Unknown component: {component}",
+                        "components": sorted(COMPONENT_STATS)}), 404
+    return jsonify(stats())
+
 @app.route('/api/admin/employees/complete-onboarding/<employee_id>', methods=['POST'])
 @login_required
 def complete_employee_onboarding(employee_id):
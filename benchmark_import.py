@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark API cold start
+
+Runs each scenario in a fresh interpreter with -X importtime and parses the
+report, so we can see how long starting the API costs and which packages
+pay for it:
+
+    api             import api (what a CRUD-only worker pays)
+    api+workflow    import api, then load the LLM workflow stack
+
+Reports the wall time of the process, the total import time and the
+heaviest top-level packages. --save writes the results as JSON so they can
+be compared between commits, and --max-ms fails (exit 1) when importing the
+API alone takes longer than the budget.
+
+Usage:
+    python benchmark_import.py [--repeat 3] [--top 8] [--save results.json] [--max-ms 500]
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+SCENARIOS = [
+    ("api", "import api"),
+    ("api+workflow", "import api; api.load_workflow()"),
+]
+
+IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+def parse_importtime(report):
+    """Return [(package, depth, self_us, cumulative_us)] from -X importtime output"""
+    entries = []
+    for line in report.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, package = match.groups()
+            entries.append((package, (len(indent) - 1) // 2, int(self_us), int(cumulative_us)))
+    return entries
+
+def run_scenario(statement):
+    """Run statement in a fresh interpreter; returns (wall seconds, importtime entries)"""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    started = time.perf_counter()
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", statement],
+                             cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+                             stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    wall = time.perf_counter() - started
+    return wall, parse_importtime(process.stderr)
+
+def summarize(entries, top):
+    """Total import time and the heaviest top-level packages (in ms)"""
+    total_us = sum(cumulative for package, depth, self_us, cumulative in entries if depth == 0)
+    heaviest = {}
+    for package, depth, self_us, cumulative in entries:
+        if "." not in package:
+            heaviest[package] = max(heaviest.get(package, 0), cumulative)
+    ranked = sorted(heaviest.items(), key=lambda item: item[1], reverse=True)[:top]
+    return total_us / 1000.0, [(package, cumulative / 1000.0) for package, cumulative in ranked]
+
+def run_benchmark(repeat, top):
+    results = {}
+    for name, statement in SCENARIOS:
+        runs = [run_scenario(statement) for _ in range(repeat)]
+        # The fastest run is the least disturbed by the rest of the machine
+        wall, entries = min(runs, key=lambda run: run[0])
+        import_ms, heaviest = summarize(entries, top)
+        results[name] = {
+            "wall_ms": round(wall * 1000, 1),
+            "import_ms": round(import_ms, 1),
+            "modules": len(entries),
+            "heaviest": [{"package": package, "ms": round(ms, 1)} for package, ms in heaviest]
+        }
+        print(f"\n{name}: {wall * 1000:.0f} ms wall, {import_ms:.0f} ms importing {len(entries)} modules")
+        for package, ms in heaviest:
+            print(f"    {package:<28} {ms:>8.1f} ms")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark API cold start")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per scenario, fastest is kept (default: 3)")
+    parser.add_argument("--top", type=int, default=8, help="Heaviest packages to list (default: 8)")
+    parser.add_argument("--save", help="Write the results to this JSON file")
+    parser.add_argument("--max-ms", type=float, help="Fail if importing the API takes longer than this")
+    args = parser.parse_args()
+    try:
+        results = run_benchmark(args.repeat, args.top)
+    except KeyboardInterrupt:
+        sys.exit(1)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults saved to {args.save}")
+
+    if args.max_ms is not None and results["api"]["import_ms"] > args.max_ms:
+        print(f"\nImporting the API took {results['api']['import_ms']} ms, budget is {args.max_ms} ms")
+        sys.exit(1)
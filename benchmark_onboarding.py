@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Load test onboarding throughput and tail latency offline
+
+In-process mode runs process_employee (threads) or aprocess_employee
+(asyncio) against the fake LLM from fake_llm, so nothing leaves the machine.
+HR_LLM_BACKEND defaults to fake and the response cache to off; the fake
+model's latency, errors, 429 bursts and malformed answers are set with the
+HR_FAKE_LLM_* variables (see fake_llm.py).
+
+API mode (--api URL) drives a running server end to end: POST
+/api/start-onboarding, then poll the job until it is done. Start the server
+with HR_LLM_BACKEND=fake to keep it offline. Note that API mode creates real
+employee records on that server.
+
+Reports throughput, latency percentiles, failures, and (in-process) the
+fake model's, the JSON parser's and the coalescers' counters and the tokens
+per node. Run with HR_LLM_COALESCE=1 to share concurrent identical node calls.
+
+Usage:
+    python benchmark_onboarding.py [--requests 200] [--concurrency 20] [--mode sync|async] [--single-shot]
+    python benchmark_onboarding.py --api http://localhost:3000 [--requests 50] [--concurrency 10]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import contextlib
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+POSITIONS = [
+    ("Software Engineer", "Engineering"),
+    ("Data Analyst", "Finance"),
+    ("Account Executive", "Sales"),
+    ("Marketing Manager", "Marketing"),
+    ("HR Generalist", "HR"),
+    ("QA Engineer", "Engineering"),
+    ("Product Designer", "Design"),
+    ("Office Manager", "Operations"),
+]
+
+def make_employees(count, seed=7):
+    rng = random.Random(seed)
+    employees = []
+    for i in range(count):
+        position, department = rng.choice(POSITIONS)
+        employees.append({
+            "name": "Load Test {}".format(i + 1),
+            "position": position,
+            "department": department,
+            "startDate": "2025-07-01"
+        })
+    return employees
+
+def percentile(values, share):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(round(share * (len(ordered) - 1))), len(ordered) - 1)]
+
+def report(title, latencies, failures, elapsed):
+    total = len(latencies) + len(failures)
+    print(f"\n{title}")
+    print(f"  requests      {total} ({len(failures)} failed)")
+    print(f"  wall time     {elapsed:.2f} s")
+    print(f"  throughput    {total / elapsed:.1f} onboardings/s" if elapsed else "  throughput    n/a")
+    if latencies:
+        print("  latency       p50 {:.0f} ms, p90 {:.0f} ms, p99 {:.0f} ms, max {:.0f} ms".format(
+            percentile(latencies, 0.5) * 1000, percentile(latencies, 0.9) * 1000,
+            percentile(latencies, 0.99) * 1000, max(latencies) * 1000))
+    errors = {}
+    for error in failures:
+        errors[error] = errors.get(error, 0) + 1
+    for error, count in sorted(errors.items(), key=lambda item: item[1], reverse=True)[:5]:
+        print(f"  {count:>5} x {error[:100]}")
+
+#############################################
+# In-process
+#############################################
+
+def run_in_process(employees, concurrency, mode, single_shot, verbose):
+    # Must be set before the workflow modules are imported
+    os.environ.setdefault("HR_LLM_BACKEND", "fake")
+    os.environ.setdefault("HR_LLM_CACHE", "0")
+    import fixed_workflow
+    import simplified_workflow
+    import llm_coalescing
+    import llm_parsing
+    import onboarding_memory
+    import workflow_registry
+    fixed_workflow.warm_up()
+
+    latencies, failures = [], []
+    quiet = contextlib.ExitStack()
+    if not verbose:
+        # The workflow prints for every step; keep the report readable
+        devnull = quiet.enter_context(open(os.devnull, "w"))
+        quiet.enter_context(contextlib.redirect_stdout(devnull))
+        quiet.enter_context(contextlib.redirect_stderr(devnull))
+
+    def record(result, started):
+        if result.get("success"):
+            latencies.append(time.perf_counter() - started)
+        else:
+            failures.append(str(result.get("error", "unknown error")))
+
+    def one(employee):
+        started = time.perf_counter()
+        record(fixed_workflow.process_employee(employee, single_shot=single_shot), started)
+
+    async def run_async():
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def aone(employee):
+            async with semaphore:
+                started = time.perf_counter()
+                record(await fixed_workflow.aprocess_employee(employee, single_shot=single_shot), started)
+
+        await asyncio.gather(*(aone(employee) for employee in employees))
+
+    started = time.perf_counter()
+    with quiet:
+        if mode == "async":
+            asyncio.run(run_async())
+        else:
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                list(executor.map(one, employees))
+    elapsed = time.perf_counter() - started
+
+    engine = "single-shot" if simplified_workflow.use_single_shot(single_shot) else "nodes"
+    report(f"In-process {mode}, {engine}, concurrency {concurrency}", latencies, failures, elapsed)
+    llm = workflow_registry.get("llm")
+    if hasattr(llm, "stats"):
+        print(f"  fake LLM      {llm.stats()}")
+    print(f"  JSON parsing  {llm_parsing.stats()['totals']}")
+    for name, counts in sorted(llm_coalescing.stats()["coalescers"].items()):
+        print(f"  coalescing    {name:<28} {counts}")
+    for node, counts in sorted(onboarding_memory.token_stats()["nodes"].items()):
+        print(f"  tokens        {node:<28} {counts['avg_prompt_tokens']:>7.0f} prompt, "
+              f"{counts['avg_completion_tokens']:>5.0f} completion per call")
+
+#############################################
+# API
+#############################################
+
+def http_json(method, url, body=None):
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    request = urllib.request.Request(url, data=data, method=method, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return response.status, json.loads(response.read().decode("utf-8") or "{}")
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read().decode("utf-8") or "{}")
+
+def run_api(base_url, employees, concurrency, poll_interval, timeout):
+    base_url = base_url.rstrip("/")
+    latencies, failures = [], []
+
+    def one(employee):
+        started = time.perf_counter()
+        try:
+            status, body = http_json("POST", base_url + "/api/start-onboarding", employee)
+            if status != 202:
+                failures.append("HTTP {}: {}".format(status, body.get("error", "")))
+                return
+            while time.perf_counter() - started < timeout:
+                time.sleep(poll_interval)
+                status, job = http_json("GET", base_url + body["status_url"])
+                if job.get("status") == "done":
+                    latencies.append(time.perf_counter() - started)
+                    return
+                if job.get("status") == "failed":
+                    failures.append("job failed: {}".format(job.get("error")))
+                    return
+            failures.append("timed out after {}s".format(timeout))
+        except Exception as e:
+            failures.append("{}: {}".format(type(e).__name__, e))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(one, employees))
+    report(f"API {base_url}, concurrency {concurrency}", latencies, failures, time.perf_counter() - started)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test onboarding offline")
+    parser.add_argument("--requests", type=int, default=200, help="Onboardings to run (default: 200)")
+    parser.add_argument("--concurrency", type=int, default=20, help="Onboardings in flight (default: 20)")
+    parser.add_argument("--mode", choices=("sync", "async"), default="sync",
+                        help="In-process: worker threads or one event loop (default: sync)")
+    parser.add_argument("--single-shot", action="store_true",
+                        help="Use the single-shot engine (default: as set by HR_WORKFLOW_ENGINE)")
+    parser.add_argument("--api", help="Base URL of a running server to test instead of in-process")
+    parser.add_argument("--poll-interval", type=float, default=0.2, help="API job poll interval in s (default: 0.2)")
+    parser.add_argument("--timeout", type=float, default=120, help="API per-onboarding timeout in s (default: 120)")
+    parser.add_argument("--verbose", action="store_true", help="Keep the workflow's own output")
+    args = parser.parse_args()
+
+    employees = make_employees(args.requests)
+    try:
+        if args.api:
+            run_api(args.api, employees, args.concurrency, args.poll_interval, args.timeout)
+        else:
+            # Without --single-shot the engine follows HR_WORKFLOW_ENGINE
+            run_in_process(employees, args.concurrency, args.mode, args.single_shot or None, args.verbose)
+    except KeyboardInterrupt:
+        sys.exit(1)
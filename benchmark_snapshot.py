@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark employee snapshot formats
+
+Compares save time, load time and file size of the indented JSON employees
+file against the binary snapshot format from data_store at several dataset
+sizes. A second table times the store's own write_employees_file and
+read_employees_file in both HR_SNAPSHOT_FORMAT modes, which is what a
+server pays at startup and on every full rewrite. Files are written to a
+temporary directory.
+
+Usage:
+    python benchmark_snapshot.py [--sizes 10000,100000,1000000]
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import contextlib
+
+import data_store
+
+def generate_employees(count):
+    """Generate count employee records shaped like the real data"""
+    departments = ["Engineering", "Marketing", "Sales", "HR", "Product", "Finance"]
+    statuses = ["New", "Pending", "In Progress", "Onboarding", "Completed"]
+    return [
+        {
+            "id": str(370000000000000000 + i),
+            "name": f"Employee {i}",
+            "position": "Software Engineer",
+            "department": departments[i % len(departments)],
+            "startDate": "2025-06-01",
+            "status": statuses[i % len(statuses)],
+            "equipmentNeeds": ["Laptop", "Monitor", "Keyboard", "Mouse"],
+            "systemAccess": ["Email", "GitHub", "Jira", "Slack"],
+            "trainingRequirements": ["Security Training", "Code Standards", "Company Orientation"],
+            "created_at": "2025-05-18T16:05:46.882518",
+            "updated_at": "2025-05-18T16:05:46.882518"
+        }
+        for i in range(count)
+    ]
+
+def time_format(name, path, employees, encode, decode, binary):
+    """Save and load employees once with the given codec"""
+    start = time.perf_counter()
+    data_store.atomic_write(path, encode(employees))
+    save_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with open(path, 'rb' if binary else 'r') as f:
+        loaded = decode(f.read())
+    load_time = time.perf_counter() - start
+
+    assert len(loaded) == len(employees)
+    size = os.path.getsize(path)
+    os.remove(path)
+    return name, save_time, load_time, size
+
+def time_store(mode, work_dir, employees):
+    """Write and read employees through data_store with HR_SNAPSHOT_FORMAT=mode"""
+    saved = (data_store.DATA_DIR, data_store.EMPLOYEES_FILE, data_store.EMPLOYEES_SNAPSHOT, data_store.SNAPSHOT_FORMAT)
+    data_store.DATA_DIR = work_dir
+    data_store.EMPLOYEES_FILE = os.path.join(work_dir, "employees.json")
+    data_store.EMPLOYEES_SNAPSHOT = os.path.join(work_dir, "employees.snapshot")
+    data_store.SNAPSHOT_FORMAT = mode
+    try:
+        # Both functions print a line per call; keep the table readable
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            start = time.perf_counter()
+            assert data_store.write_employees_file(employees)
+            save_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            loaded = data_store.read_employees_file()
+            load_time = time.perf_counter() - start
+
+        assert len(loaded) == len(employees)
+        path = data_store.employees_path()
+        size = os.path.getsize(path)
+        os.remove(path)
+        return save_time, load_time, size
+    finally:
+        data_store.DATA_DIR, data_store.EMPLOYEES_FILE, data_store.EMPLOYEES_SNAPSHOT, data_store.SNAPSHOT_FORMAT = saved
+
+def run_benchmark(sizes):
+    formats = [
+        ("json (indent=2)", False,
+         lambda employees: json.dumps(employees, indent=2), json.loads),
+        ("binary/marshal", True,
+         lambda employees: data_store.encode_snapshot(employees, "marshal"), data_store.decode_snapshot),
+    ]
+    if data_store.msgpack is not None:
+        formats.append(("binary/msgpack", True,
+                        lambda employees: data_store.encode_snapshot(employees, "msgpack"), data_store.decode_snapshot))
+    else:
+        print("msgpack is not installed; skipping the msgpack codec")
+
+    work_dir = tempfile.mkdtemp(prefix="hr_snapshot_bench_")
+    print(f"{'records':>9}  {'format':<16} {'save (s)':>9} {'load (s)':>9} {'size (MB)':>10}")
+    for count in sizes:
+        employees = generate_employees(count)
+        for name, binary, encode, decode in formats:
+            path = os.path.join(work_dir, "employees.bench")
+            name, save_time, load_time, size = time_format(name, path, employees, encode, decode, binary)
+            print(f"{count:>9}  {name:<16} {save_time:>9.3f} {load_time:>9.3f} {size / 1e6:>10.1f}")
+
+    modes = ["json", "binary"] if data_store.msgpack is not None else ["json"]
+    print("\nStore round trip (write_employees_file / read_employees_file)")
+    print(f"{'records':>9}  {'HR_SNAPSHOT_FORMAT':<18} {'save (s)':>9} {'load (s)':>9} {'size (MB)':>10}")
+    for count in sizes:
+        employees = generate_employees(count)
+        for mode in modes:
+            save_time, load_time, size = time_store(mode, work_dir, employees)
+            print(f"{count:>9}  {mode:<18} {save_time:>9.3f} {load_time:>9.3f} {size / 1e6:>10.1f}")
+    # The store leaves its lock file behind
+    shutil.rmtree(work_dir)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark employee snapshot formats")
+    parser.add_argument("--sizes", default="10000,100000,1000000",
+                        help="Comma-separated record counts (default: 10000,100000,1000000)")
+    args = parser.parse_args()
+    try:
+        run_benchmark([int(size) for size in args.sizes.split(",")])
+    except KeyboardInterrupt:
+        sys.exit(1)
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark workflow state updates
+
+Simulates a workflow whose nodes each add two messages (a prompt and an
+answer) to the state, and compares the cost of one step as the history grows:
+
+    deepcopy    the old nodes: copy.deepcopy(state) and append
+    list concat partial updates merged with operator.add (a new list per step)
+    History     partial updates merged into a persistent History (workflow_state)
+
+For each history size it reports the average time per step and the peak
+memory one step allocates (tracemalloc), which stays flat only for History.
+
+Usage:
+    python benchmark_state.py [--sizes 10,100,1000,5000] [--steps 50]
+"""
+
+import sys
+import copy
+import time
+import argparse
+import operator
+import tracemalloc
+
+from workflow_state import History, merge_update
+
+PROMPT = "Employee Name: Jane Smith\nPosition: Software Engineer\nDepartment: Engineering\n" * 25
+
+def node_update(step):
+    """The partial update a node returns"""
+    return {
+        "hr_notes": ["Step {} done".format(step)],
+        "messages": [
+            {"role": "user", "content": PROMPT},
+            {"role": "assistant", "content": '{"training_requirements": ["Orientation"]}'}
+        ]
+    }
+
+def deepcopy_step(state, step):
+    update = node_update(step)
+    new_state = copy.deepcopy(state)
+    new_state["hr_notes"].extend(update["hr_notes"])
+    new_state["messages"].extend(update["messages"])
+    return new_state
+
+def concat_step(state, step):
+    return merge_update(state, node_update(step), {"hr_notes": operator.add, "messages": operator.add})
+
+def history_step(state, step):
+    return merge_update(state, node_update(step))
+
+def initial_state(history_size, container):
+    """A state that already holds history_size messages"""
+    messages = [{"role": "user", "content": PROMPT} for _ in range(history_size)]
+    notes = ["Note {}".format(i) for i in range(history_size // 2)]
+    return {"employee": {"name": "Jane Smith"}, "hr_notes": container(notes), "messages": container(messages)}
+
+def measure(step_function, state, steps):
+    """Return (seconds per step, peak bytes allocated per step) over steps updates"""
+    start = time.perf_counter()
+    current = state
+    for step in range(steps):
+        current = step_function(current, step)
+    seconds = (time.perf_counter() - start) / steps
+
+    # Peak memory a single step needs on top of what is already allocated
+    tracemalloc.start()
+    current = state
+    allocated = 0
+    for step in range(steps):
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        current = step_function(current, step)
+        allocated += tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+    return seconds, allocated / steps
+
+def run_benchmark(sizes, steps):
+    strategies = [
+        ("deepcopy", deepcopy_step, list),
+        ("list concat", concat_step, list),
+        ("History", history_step, History),
+    ]
+    print(f"{'history':>8}  {'strategy':<12} {'us/step':>10} {'KB/step':>10}")
+    for size in sizes:
+        for name, step_function, container in strategies:
+            seconds, allocated = measure(step_function, initial_state(size, container), steps)
+            print(f"{size:>8}  {name:<12} {seconds * 1e6:>10.1f} {allocated / 1024:>10.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark workflow state updates")
+    parser.add_argument("--sizes", default="10,100,1000,5000",
+                        help="Comma-separated message history sizes (default: 10,100,1000,5000)")
+    parser.add_argument("--steps", type=int, default=50, help="Steps measured per size (default: 50)")
+    args = parser.parse_args()
+    try:
+        run_benchmark([int(size) for size in args.sizes.split(",")], args.steps)
+    except KeyboardInterrupt:
+        sys.exit(1)
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Chunked Map
+
+A persistent, insertion-ordered mapping for the copy-on-write employee
+versions in data_store: a published map is never modified, and edits derive
+a new map that shares everything they did not touch.
+
+Entries live in chunks of at most CHUNK_SIZE keys, in insertion order, and
+an index of key -> chunk number is split into hash buckets. An edit copies
+only the chunks and buckets it touches plus the two short tuples pointing at
+them, so deriving a map from a large one costs about O(sqrt N) instead of
+copying a whole dict.
+"""
+
+from collections.abc import Mapping, ItemsView, ValuesView
+
+# Keys per chunk, and the average keys per index bucket before the index grows
+CHUNK_SIZE = 256
+BUCKET_SIZE = 256
+
+class ChunkedValues(ValuesView):
+    __slots__ = ()
+
+    def __iter__(self):
+        for chunk in self._mapping.chunks:
+            yield from chunk.values()
+
+class ChunkedItems(ItemsView):
+    __slots__ = ()
+
+    def __iter__(self):
+        for chunk in self._mapping.chunks:
+            yield from chunk.items()
+
+class ChunkedMap(Mapping):
+    """Read-only mapping; use edit() to derive a changed copy"""
+    __slots__ = ("chunks", "where", "size")
+
+    def __init__(self, chunks=(), where=({},), size=0):
+        # chunks: tuple of dicts in insertion order
+        # where: tuple of dicts (key -> chunk number), a power of two long
+        self.chunks = chunks
+        self.where = where
+        self.size = size
+
+    @classmethod
+    def from_items(cls, items):
+        """Build a map from a dict or (key, value) pairs; later duplicates replace earlier ones"""
+        pairs = list(items.items() if isinstance(items, dict) else dict(items).items())
+        chunks = tuple(dict(pairs[start:start + CHUNK_SIZE]) for start in range(0, len(pairs), CHUNK_SIZE))
+        buckets = 1
+        while len(pairs) > buckets * BUCKET_SIZE:
+            buckets *= 2
+        where = [{} for _ in range(buckets)]
+        mask = buckets - 1
+        for number, chunk in enumerate(chunks):
+            for key in chunk:
+                where[hash(key) & mask][key] = number
+        return cls(chunks, tuple(where), len(pairs))
+
+    @classmethod
+    def from_keys(cls, keys):
+        """Build a map from keys to None, for use as an ordered set"""
+        return cls.from_items(dict.fromkeys(keys))
+
+    def edit(self):
+        """Return an editor that derives a new map from this one"""
+        return ChunkedMapEditor(self)
+
+    def __getitem__(self, key):
+        number = self.where[hash(key) & (len(self.where) - 1)][key]
+        return self.chunks[number][key]
+
+    def get(self, key, default=None):
+        number = self.where[hash(key) & (len(self.where) - 1)].get(key)
+        if number is None:
+            return default
+        return self.chunks[number][key]
+
+    def __contains__(self, key):
+        return key in self.where[hash(key) & (len(self.where) - 1)]
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            yield from chunk
+
+    def __len__(self):
+        return self.size
+
+    def values(self):
+        return ChunkedValues(self)
+
+    def items(self):
+        return ChunkedItems(self)
+
+    def __repr__(self):
+        return f"ChunkedMap({dict(self.items())!r})"
+
+EMPTY = ChunkedMap()
+
+class ChunkedMapEditor(object):
+    """
+    Mutable view used to derive a new ChunkedMap. Chunks and index buckets are
+    copied the first time the editor changes them; finish() returns the result.
+    """
+    def __init__(self, base):
+        self.chunks = list(base.chunks)
+        self.where = list(base.where)
+        self.size = base.size
+        # Chunk numbers and bucket numbers this editor has already copied
+        self.own_chunks = set()
+        self.own_buckets = set()
+
+    def bucket(self, key):
+        return hash(key) & (len(self.where) - 1)
+
+    def writable_bucket(self, number):
+        if number not in self.own_buckets:
+            self.where[number] = dict(self.where[number])
+            self.own_buckets.add(number)
+        return self.where[number]
+
+    def writable_chunk(self, number):
+        if number not in self.own_chunks:
+            self.chunks[number] = dict(self.chunks[number])
+            self.own_chunks.add(number)
+        return self.chunks[number]
+
+    def get(self, key, default=None):
+        number = self.where[self.bucket(key)].get(key)
+        if number is None:
+            return default
+        return self.chunks[number][key]
+
+    def __contains__(self, key):
+        return key in self.where[self.bucket(key)]
+
+    def __len__(self):
+        return self.size
+
+    def __setitem__(self, key, value):
+        bucket = self.bucket(key)
+        number = self.where[bucket].get(key)
+        if number is not None:
+            # Replace in place, keeping the key's position
+            self.writable_chunk(number)[key] = value
+            return
+        if not self.chunks or len(self.chunks[-1]) >= CHUNK_SIZE:
+            self.chunks.append({})
+            self.own_chunks.add(len(self.chunks) - 1)
+        number = len(self.chunks) - 1
+        self.writable_chunk(number)[key] = value
+        self.writable_bucket(bucket)[key] = number
+        self.size += 1
+        if self.size > len(self.where) * BUCKET_SIZE:
+            self.grow_index()
+
+    def pop(self, key, default=None):
+        bucket = self.bucket(key)
+        number = self.where[bucket].get(key)
+        if number is None:
+            return default
+        del self.writable_bucket(bucket)[key]
+        self.size -= 1
+        return self.writable_chunk(number).pop(key)
+
+    def grow_index(self):
+        """Rebuild the index with twice as many buckets (amortized O(1) per add)"""
+        where = [{} for _ in range(len(self.where) * 2)]
+        mask = len(where) - 1
+        for number, chunk in enumerate(self.chunks):
+            for key in chunk:
+                where[hash(key) & mask][key] = number
+        self.where = where
+        self.own_buckets = set(range(len(where)))
+
+    def finish(self):
+        """Return the edited map; later edits copy again instead of changing it"""
+        if len(self.chunks) > 2 * (self.size // CHUNK_SIZE + 1):
+            # Deletes left most chunks part empty: repack once (amortized O(1))
+            packed = ChunkedMap.from_items(item for chunk in self.chunks for item in chunk.items())
+            self.chunks, self.where = list(packed.chunks), list(packed.where)
+        self.own_chunks = set()
+        self.own_buckets = set()
+        return ChunkedMap(tuple(self.chunks), tuple(self.where), self.size)
@@ -3,18 +3,131 @@
 Data Store for HR Workflow
 
 This module provides functionality to store and retrieve employee data using JSON files.
+
+Set HR_STORE_LOG_STRUCTURED=1 to append each change to employees.log instead of
+rewriting employees.json; the log is folded back into the snapshot by a
+background compactor once it grows past HR_STORE_LOG_COMPACT_BYTES.
+
+Set HR_SNAPSHOT_FORMAT=binary to keep the snapshot in the compact binary
+employees.snapshot file (msgpack) instead of indented JSON; the module
+refuses to load without msgpack in that mode. Run
+"python data_store.py export-json" to write a human-readable employees.json
+from it.
+
+This is the single storage engine for the Flask API and both Streamlit apps;
+use storage_backend() to get the module selected by HR_STORAGE_BACKEND.
 """
 
 import os
+import sys
 import json
 import time
+import marshal
+import tempfile
 import threading
-from datetime import datetime
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+import id_allocator
+from chunked_map import ChunkedMap, EMPTY as EMPTY_MAP
 
 # Path to the data directory and files
 DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
 EMPLOYEES_FILE = os.path.join(DATA_DIR, "employees.json")
-LOCK = threading.Lock()  # Used to prevent race conditions when multiple writes happen
+EMPLOYEES_LOG = os.path.join(DATA_DIR, "employees.log")
+EMPLOYEES_SNAPSHOT = os.path.join(DATA_DIR, "employees.snapshot")
+
+# Snapshot format: "json" (EMPLOYEES_FILE) or "binary" (EMPLOYEES_SNAPSHOT)
+SNAPSHOT_FORMAT = os.environ.get("HR_SNAPSHOT_FORMAT", "json").lower()
+
+# Log-structured mode: mutations append one JSON line to EMPLOYEES_LOG
+LOG_STRUCTURED = os.environ.get("HR_STORE_LOG_STRUCTURED", "").lower() in ("1", "true", "yes")
+LOG_COMPACT_BYTES = int(os.environ.get("HR_STORE_LOG_COMPACT_BYTES", str(4 * 1024 * 1024)))
+
+class FileLock(object):
+    """
+    Reentrant lock that also holds an OS-level lock on path + ".lock"
+    (EMPLOYEES_FILE by default), so read-modify-write cycles are serialized
+    across worker processes as well as threads. Falls back to a thread lock
+    where fcntl is unavailable.
+    """
+    def __init__(self, path=None):
+        self.path = path
+        self.thread_lock = threading.RLock()
+        self.depth = 0
+        self.handle = None
+    
+    def acquire(self):
+        self.thread_lock.acquire()
+        if self.depth == 0 and fcntl is not None:
+            ensure_data_dir()
+            try:
+                self.handle = open(f"{self.path or EMPLOYEES_FILE}.lock", 'a')
+                fcntl.flock(self.handle, fcntl.LOCK_EX)
+            except Exception:
+                if self.handle is not None:
+                    self.handle.close()
+                    self.handle = None
+                self.thread_lock.release()
+                raise
+        self.depth += 1
+    
+    def release(self):
+        self.depth -= 1
+        if self.depth == 0 and self.handle is not None:
+            fcntl.flock(self.handle, fcntl.LOCK_UN)
+            self.handle.close()
+            self.handle = None
+        self.thread_lock.release()
+    
+    def __enter__(self):
+        self.acquire()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, tb):
+        self.release()
+
+FILE_LOCK = FileLock()  # Serializes writers across threads and processes
+
+def fsync_directory(path):
+    """Flush a directory entry so a rename survives a crash"""
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def atomic_write(path, content):
+    """
+    Replace path with content (str or bytes) so that readers and crashes only
+    ever see the old or the new file: write a temp file, fsync it, then rename
+    it over path.
+    """
+    directory = os.path.dirname(path)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb' if isinstance(content, bytes) else 'w') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    fsync_directory(directory)
 
 def ensure_data_dir():
     """Ensure that the data directory exists"""
@@ -22,35 +135,466 @@ def ensure_data_dir():
         os.makedirs(DATA_DIR)
         print(f"Created data directory: {DATA_DIR}")
 
-def load_employees():
-    """Load employees from the JSON file"""
+# Binary snapshots start with SNAPSHOT_MAGIC followed by one codec byte
+SNAPSHOT_MAGIC = b"HRSNAP1"
+SNAPSHOT_CODECS = {b"p": "msgpack", b"m": "marshal"}
+
+if SNAPSHOT_FORMAT == "binary" and msgpack is None:
+    # Fail at startup rather than write snapshots in a format tied to one Python version
+    raise ImportError("HR_SNAPSHOT_FORMAT=binary needs msgpack (pip install msgpack)")
+
+def encode_snapshot(employees, codec="msgpack"):
+    """
+    Serialize employees to the binary snapshot format. Snapshots are written
+    with msgpack; marshal (whose format can change between Python versions)
+    is only kept for reading older snapshots and for benchmark comparisons.
+    """
+    if codec == "msgpack":
+        if msgpack is None:
+            raise RuntimeError("Binary snapshots need msgpack (pip install msgpack)")
+        return SNAPSHOT_MAGIC + b"p" + msgpack.packb(employees, use_bin_type=True)
+    return SNAPSHOT_MAGIC + b"m" + marshal.dumps(employees)
+
+def decode_snapshot(data):
+    """Parse a binary snapshot produced by encode_snapshot"""
+    if not data.startswith(SNAPSHOT_MAGIC):
+        raise ValueError("Not an employee snapshot file")
+    codec = SNAPSHOT_CODECS.get(data[len(SNAPSHOT_MAGIC):len(SNAPSHOT_MAGIC) + 1])
+    payload = data[len(SNAPSHOT_MAGIC) + 1:]
+    if codec == "msgpack":
+        if msgpack is None:
+            raise ValueError("Snapshot was written with msgpack, which is not installed")
+        return msgpack.unpackb(payload, raw=False)
+    if codec == "marshal":
+        return marshal.loads(payload)
+    raise ValueError("Unknown snapshot codec")
+
+def employees_path():
+    """Return the snapshot file for the configured format"""
+    return EMPLOYEES_SNAPSHOT if SNAPSHOT_FORMAT == "binary" else EMPLOYEES_FILE
+
+def read_employees_file():
+    """Read and parse the employees file, creating sample data if it is missing"""
     ensure_data_dir()
+    path = employees_path()
     
     try:
-        if os.path.exists(EMPLOYEES_FILE):
+        if os.path.exists(path):
+            if SNAPSHOT_FORMAT == "binary":
+                with open(path, 'rb') as f:
+                    employees = decode_snapshot(f.read())
+            else:
+                with open(path, 'r') as f:
+                    employees = json.load(f)
+            print(f"Loaded {len(employees)} employees from {path}")
+            return employees
+        elif SNAPSHOT_FORMAT == "binary" and os.path.exists(EMPLOYEES_FILE):
+            # First start in binary mode: convert the existing JSON file
+            print(f"Converting {EMPLOYEES_FILE} to a binary snapshot")
             with open(EMPLOYEES_FILE, 'r') as f:
                 employees = json.load(f)
-                print(f"Loaded {len(employees)} employees from {EMPLOYEES_FILE}")
-                return employees
+            write_employees_file(employees)
+            return employees
         else:
             # Create an empty employees file
-            print(f"Employees file not found: {EMPLOYEES_FILE}")
+            print(f"Employees file not found: {path}")
             create_sample_data = True
             employees = []
             if create_sample_data:
                 print("Creating sample employee data")
                 employees = generate_sample_employees()
-            save_employees(employees)
+            write_employees_file(employees)
             return employees
-    except (json.JSONDecodeError, IOError) as e:
+    except (ValueError, EOFError, TypeError, IOError) as e:
         print(f"Error loading employees: {e}")
+        if SNAPSHOT_FORMAT == "binary":
+            # Serving an empty store would let the next write replace every record
+            raise RuntimeError(f"Cannot read the employee snapshot {path}: {e!r}") from e
         # If there's an error, backup the file and return empty list
-        if os.path.exists(EMPLOYEES_FILE):
-            backup_file = f"{EMPLOYEES_FILE}.{int(time.time())}.bak"
-            os.rename(EMPLOYEES_FILE, backup_file)
+        if os.path.exists(path):
+            backup_file = f"{path}.{int(time.time())}.bak"
+            os.rename(path, backup_file)
             print(f"Corrupted file backed up to {backup_file}")
         return []
 
+# Canonical onboarding statuses, keyed by the lowercased spellings in use
+STATUS_ALIASES = {
+    "new": "New",
+    "pending": "Pending",
+    "waiting": "Pending",
+    "in progress": "In Progress",
+    "inprogress": "In Progress",
+    "in-progress": "In Progress",
+    "onboarding": "Onboarding",
+    "complete": "Completed",
+    "completed": "Completed",
+    "done": "Completed",
+}
+PENDING_STATUSES = ["New", "Pending", "In Progress", "Onboarding"]
+
+def normalize_status(status):
+    """Map a status to its canonical spelling; unknown statuses are kept as given"""
+    if not isinstance(status, str):
+        return status
+    return STATUS_ALIASES.get(status.strip().lower(), status.strip())
+
+def file_signature(path):
+    """Return (mtime_ns, size) of a file, or None if it is missing"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+def read_log_entries(path, offset=0):
+    """Read change entries from the log, skipping a torn trailing line"""
+    entries = []
+    if not os.path.exists(path):
+        return entries
+    with open(path, 'r') as f:
+        f.seek(offset)
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                # A crash mid-append can leave a partial last line
+                print(f"Skipping unreadable log entry in {path}")
+    return entries
+
+def trim_torn_tail(path):
+    """
+    Cut a partial last line (no trailing newline) left by a crash mid-append,
+    so the next append starts on a line of its own instead of merging into it.
+    The partial entry was never acknowledged, so nothing committed is lost.
+    """
+    if not os.path.exists(path):
+        return
+    with open(path, 'rb+') as f:
+        size = f.seek(0, os.SEEK_END)
+        if size == 0:
+            return
+        f.seek(size - 1)
+        if f.read(1) == b"\n":
+            return
+        # Scan back for the end of the last complete line
+        end = 0
+        position = size
+        while position > 0:
+            start = max(position - 4096, 0)
+            f.seek(start)
+            newline = f.read(position - start).rfind(b"\n")
+            if newline >= 0:
+                end = start + newline + 1
+                break
+            position = start
+        f.truncate(end)
+        f.flush()
+        os.fsync(f.fileno())
+    print(f"Dropped {size - end} bytes of a torn entry at the end of {path}")
+
+class EmployeeVersion(object):
+    """
+    One published, read-only state of the employee records.
+    
+    Versions are never modified after they are published: writers derive a
+    new version with with_entries() and swap it in, so readers can keep using
+    whichever version they picked up without taking a lock.
+    """
+    __slots__ = ("records", "unindexed", "by_status", "by_department", "signature")
+    
+    def __init__(self, records, unindexed, by_status, by_department, signature):
+        # Id -> record, as a ChunkedMap so derived versions share unchanged chunks
+        self.records = records
+        # Records that cannot be keyed (missing or duplicate id) are kept
+        # aside so that they survive the next save
+        self.unindexed = unindexed
+        # Secondary indexes: canonical status -> ids and department -> ids.
+        # The inner ChunkedMaps are used as insertion-ordered sets.
+        self.by_status = by_status
+        self.by_department = by_department
+        self.signature = signature
+    
+    @classmethod
+    def build(cls, employees, signature=None):
+        """Build a version, with its indexes, from a list of employee records"""
+        records = {}
+        unindexed = []
+        by_status = {}
+        by_department = {}
+        for employee in employees:
+            employee_id = employee.get("id")
+            if employee_id is None or employee_id in records:
+                unindexed.append(employee)
+            else:
+                records[employee_id] = employee
+                by_status.setdefault(normalize_status(employee.get("status")), []).append(employee_id)
+                by_department.setdefault(employee.get("department"), []).append(employee_id)
+        if unindexed:
+            print(f"Warning: {len(unindexed)} employee records without a unique id")
+        return cls(ChunkedMap.from_items(records), tuple(unindexed),
+                   {key: ChunkedMap.from_keys(ids) for key, ids in by_status.items()},
+                   {key: ChunkedMap.from_keys(ids) for key, ids in by_department.items()},
+                   signature)
+    
+    def with_signature(self, signature):
+        """Return the same records marked as matching another file signature"""
+        return EmployeeVersion(self.records, self.unindexed, self.by_status, self.by_department, signature)
+    
+    def with_entries(self, entries):
+        """
+        Return a new version with change entries ({"op": "add" | "update" | "delete"})
+        applied. Only the chunks of the id index and of the index buckets that
+        an entry touches are copied; everything else is shared with this version.
+        """
+        records = self.records.edit()
+        unindexed = list(self.unindexed)
+        by_status = dict(self.by_status)
+        by_department = dict(self.by_department)
+        editors = {}
+        
+        def bucket(index, name, key):
+            # Start editing an index bucket the first time this version touches it
+            editor = editors.get((name, key))
+            if editor is None:
+                editor = index.get(key, EMPTY_MAP).edit()
+                editors[(name, key)] = editor
+            return editor
+        
+        def add_to_indexes(employee_id, employee):
+            bucket(by_status, "status", normalize_status(employee.get("status")))[employee_id] = None
+            bucket(by_department, "department", employee.get("department"))[employee_id] = None
+        
+        def remove_from_indexes(employee_id, employee):
+            bucket(by_status, "status", normalize_status(employee.get("status"))).pop(employee_id)
+            bucket(by_department, "department", employee.get("department")).pop(employee_id)
+        
+        for entry in entries:
+            op = entry.get("op")
+            if op == "add":
+                record = entry["record"]
+                if record.get("id") is None:
+                    unindexed.append(record)
+                elif record["id"] in records:
+                    # Ids are never reused, so the add is already in the
+                    # snapshot, possibly with later updates folded in
+                    continue
+                else:
+                    records[record["id"]] = record
+                    add_to_indexes(record["id"], record)
+            elif op == "update":
+                record = entry["record"]
+                existing = records.get(record["id"])
+                if existing is not None:
+                    remove_from_indexes(record["id"], existing)
+                records[record["id"]] = record
+                add_to_indexes(record["id"], record)
+            elif op == "delete":
+                existing = records.pop(entry["id"])
+                if existing is not None:
+                    remove_from_indexes(entry["id"], existing)
+        
+        for (name, key), editor in editors.items():
+            index = by_status if name == "status" else by_department
+            if len(editor):
+                index[key] = editor.finish()
+            else:
+                index.pop(key, None)
+        
+        return EmployeeVersion(records.finish(), tuple(unindexed), by_status, by_department, self.signature)
+    
+    def all(self):
+        """Return every record, in file order"""
+        return list(self.records.values()) + list(self.unindexed)
+    
+    def ids_with(self, statuses=None, department=None):
+        """Return the ids matching canonical statuses and/or a department, from the indexes"""
+        ids = None
+        if statuses is not None:
+            ids = {}
+            for status in statuses:
+                ids.update(dict.fromkeys(self.by_status.get(status, EMPTY_MAP)))
+        if department is not None:
+            department_ids = self.by_department.get(department, EMPTY_MAP)
+            if ids is None:
+                ids = dict(department_ids)
+            else:
+                ids = {employee_id: None for employee_id in ids if employee_id in department_ids}
+        return list(ids) if ids is not None else list(self.records)
+
+class EmployeeRepository(object):
+    """
+    Process-wide cache of the employees file.
+    
+    Records are held in a ChunkedMap keyed by employee id so point lookups are O(1).
+    The file is only re-parsed when its mtime or size changes, which covers
+    edits made by other processes or by hand. In log-structured mode the
+    snapshot is combined with the entries in EMPLOYEES_LOG.
+    
+    Reads are lock-free: they use the currently published EmployeeVersion.
+    Writers hold the lock, derive a new version, write it to disk and only
+    then publish it with a single attribute assignment. Reloading after a change takes FILE_LOCK, then the
+    lock, the same order as writers.
+    """
+    def __init__(self):
+        self.version = EmployeeVersion.build([])
+        self.lock = threading.RLock()
+        self.compactor = None
+    
+    @property
+    def records(self):
+        return self.version.records
+    
+    def file_signature(self):
+        """Return the signature of the snapshot and the log together"""
+        return (file_signature(employees_path()), file_signature(EMPLOYEES_LOG))
+    
+    def current(self):
+        """Return the published version, reloading it first if the files changed"""
+        signature = self.file_signature()
+        version = self.version
+        if signature[0] is not None and signature == version.signature:
+            return version
+        self.refresh()
+        return self.version
+    
+    def refresh(self):
+        """Reload the records if the files changed since they were last read"""
+        # Take the locks in the writers' order: read_employees_file writes the
+        # snapshot (under FILE_LOCK) when it is missing or first converted
+        with FILE_LOCK, self.lock:
+            signature = self.file_signature()
+            if signature[0] is not None and signature == self.version.signature:
+                return
+            version = EmployeeVersion.build(read_employees_file())
+            entries = read_log_entries(EMPLOYEES_LOG)
+            if entries:
+                version = version.with_entries(entries)
+                print(f"Replayed {len(entries)} log entries from {EMPLOYEES_LOG}")
+            # Use the signature taken before reading: if another process writes
+            # while we read, the next refresh sees the change and reloads
+            self.version = version.with_signature(signature)
+    
+    @contextmanager
+    def transaction(self):
+        """Hold the cross-process write lock with up-to-date records"""
+        with FILE_LOCK:
+            with self.lock:
+                self.refresh()
+                yield self
+    
+    def replace(self, employees):
+        """Write a list of employee records to the snapshot, then publish them"""
+        with FILE_LOCK:
+            with self.lock:
+                version = EmployeeVersion.build(employees, self.version.signature)
+                if not self.write_snapshot(version):
+                    return False
+                self.version = version
+                self.mark_clean()
+                return True
+    
+    def apply(self, entries):
+        """
+        Make change entries durable, then publish a new version with them
+        applied. Raises IOError, leaving the published version as it was, if
+        they could not be written.
+        """
+        with FILE_LOCK:
+            with self.lock:
+                version = self.version.with_entries(entries)
+                if LOG_STRUCTURED:
+                    success = self.append_log(entries)
+                else:
+                    success = self.write_snapshot(version)
+                if not success:
+                    raise IOError("Could not save employee changes, nothing was applied")
+                self.version = version
+                self.mark_clean()
+                if LOG_STRUCTURED:
+                    log_signature = self.version.signature[1]
+                    if log_signature is not None and log_signature[1] >= LOG_COMPACT_BYTES:
+                        self.schedule_compaction()
+    
+    def all(self):
+        """Return every record, in file order"""
+        return self.current().all()
+    
+    def get(self, employee_id):
+        """Return the record for employee_id, or None"""
+        return self.current().records.get(employee_id)
+    
+    def mark_clean(self):
+        """Record that the files on disk match the published version"""
+        with self.lock:
+            self.version = self.version.with_signature(self.file_signature())
+    
+    def write_snapshot(self, version):
+        """Write a version's records to the snapshot file and empty the log"""
+        with FILE_LOCK:
+            if not write_employees_file(version.all()):
+                return False
+            # The snapshot now contains everything, so the log can go
+            if os.path.exists(EMPLOYEES_LOG):
+                atomic_write(EMPLOYEES_LOG, "")
+            return True
+    
+    def append_log(self, entries):
+        """Append one compact JSON line per entry to the log"""
+        ensure_data_dir()
+        with FILE_LOCK:
+            try:
+                trim_torn_tail(EMPLOYEES_LOG)
+                lines = "".join(json.dumps(entry, separators=(",", ":")) + "\n" for entry in entries)
+                with open(EMPLOYEES_LOG, 'a') as f:
+                    start = f.tell()
+                    try:
+                        f.write(lines)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    except IOError:
+                        # Drop whatever part of the batch reached the file, so
+                        # a failed change is never replayed
+                        f.truncate(start)
+                        raise
+            except IOError as e:
+                print(f"Error appending to employee log: {e}")
+                return False
+            return True
+    
+    def schedule_compaction(self):
+        """Start the background compactor unless it is already running"""
+        with self.lock:
+            if self.compactor is not None and self.compactor.is_alive():
+                return
+            self.compactor = threading.Thread(target=self.compact, name="employee-log-compactor", daemon=True)
+            self.compactor.start()
+    
+    def compact(self):
+        """Fold the log into a new snapshot"""
+        # Other writers wait on the file lock, but readers keep using the
+        # published version while the snapshot is serialized
+        with FILE_LOCK:
+            employees = self.current().all()
+            
+            # Replaying the log on top of the new snapshot is idempotent (adds
+            # of known ids are skipped, updates and deletes are last-write-wins),
+            # so a crash between these two steps loses nothing
+            if not write_employees_file(employees):
+                return
+            atomic_write(EMPLOYEES_LOG, "")
+            self.mark_clean()
+            print(f"Compacted employee log into {employees_path()}")
+
+REPOSITORY = EmployeeRepository()
+
+def load_employees():
+    """Load employees from the JSON file"""
+    # Hand out copies so callers cannot modify the cached records in place
+    return [dict(employee) for employee in REPOSITORY.all()]
+
 def generate_sample_employees():
     """Generate sample employee data"""
     sample_data = [
@@ -96,69 +640,94 @@ def generate_sample_employees():
     ]
     return sample_data
 
-def save_employees(employees):
-    """Save employees to the JSON file"""
+def write_employees_file(employees):
+    """Write the full employees list to the snapshot file"""
     ensure_data_dir()
+    path = employees_path()
     
-    with LOCK:
+    with FILE_LOCK:
         try:
-            with open(EMPLOYEES_FILE, 'w') as f:
-                json.dump(employees, f, indent=2)
-            print(f"Saved {len(employees)} employees to {EMPLOYEES_FILE}")
+            if SNAPSHOT_FORMAT == "binary":
+                atomic_write(path, encode_snapshot(employees))
+            else:
+                atomic_write(path, json.dumps(employees, indent=2))
+            print(f"Saved {len(employees)} employees to {path}")
             return True
         except IOError as e:
             print(f"Error saving employees: {e}")
             return False
 
-def add_employee(employee_data):
-    """Add a new employee to the storage"""
-    employees = load_employees()
-    
+def export_json(path=None):
+    """Write all employees as indented JSON for humans (EMPLOYEES_FILE by default)"""
+    path = path or EMPLOYEES_FILE
+    employees = REPOSITORY.all()
+    atomic_write(path, json.dumps(employees, indent=2))
+    print(f"Exported {len(employees)} employees to {path}")
+    return path
+
+def save_employees(employees):
+    """Save employees to the JSON file"""
+    return REPOSITORY.replace([dict(employee) for employee in employees])
+
+# Fields every new employee record must carry
+REQUIRED_FIELDS = ['name', 'position', 'department', 'startDate']
+
+def prepare_new_employee(employee_data):
+    """Assign an id and timestamps to a new employee record"""
     # Generate a unique ID
-    employee_id = str(int(time.time()))
+    employee_data["id"] = id_allocator.next_id()
     
-    # Add timestamp and ID
-    employee_data["id"] = employee_id
+    # Add timestamps
     employee_data["created_at"] = datetime.now().isoformat()
     employee_data["updated_at"] = employee_data["created_at"]
     
-    # Ensure status field exists
-    if "status" not in employee_data:
-        employee_data["status"] = "New"
+    # Ensure status field exists and uses the canonical spelling
+    employee_data["status"] = normalize_status(employee_data.get("status") or "New")
+    return employee_data
+
+def merge_employee_update(employee, employee_id, updated_data):
+    """Merge an update into an existing record, preserving id, created_at and untouched fields"""
+    # Preserve id and created_at
+    updated_data["id"] = employee_id
+    updated_data["created_at"] = employee.get("created_at")
+    updated_data["updated_at"] = datetime.now().isoformat()
+    
+    # Preserve additional fields that may not be in the update
+    for key in employee:
+        if key not in updated_data and key not in ["id", "created_at", "updated_at"]:
+            updated_data[key] = employee[key]
     
-    employees.append(employee_data)
-    save_employees(employees)
-    print(f"Added new employee: {employee_data['name']} with ID {employee_id}")
+    if "status" in updated_data:
+        updated_data["status"] = normalize_status(updated_data["status"])
+    return updated_data
+
+def add_employee(employee_data):
+    """Add a new employee to the storage (raises IOError if it cannot be saved)"""
+    with REPOSITORY.transaction():
+        prepare_new_employee(employee_data)
+        entry = {"op": "add", "record": dict(employee_data)}
+        REPOSITORY.apply([entry])
+    print(f"Added new employee: {employee_data['name']} with ID {employee_data['id']}")
     return employee_data
 
 def get_employee(employee_id):
     """Get an employee by ID"""
-    employees = load_employees()
-    for employee in employees:
-        if employee.get("id") == employee_id:
-            return employee
+    employee = REPOSITORY.get(employee_id)
+    if employee is not None:
+        return dict(employee)
     print(f"Employee not found with ID: {employee_id}")
     return None
 
 def update_employee(employee_id, updated_data):
     """Update an existing employee"""
-    employees = load_employees()
-    
-    for i, employee in enumerate(employees):
-        if employee.get("id") == employee_id:
-            # Preserve id and created_at
-            updated_data["id"] = employee_id
-            updated_data["created_at"] = employee.get("created_at")
-            updated_data["updated_at"] = datetime.now().isoformat()
-            
-            # Preserve additional fields that may not be in the update
-            for key in employee:
-                if key not in updated_data and key not in ["id", "created_at", "updated_at"]:
-                    updated_data[key] = employee[key]
+    with REPOSITORY.transaction():
+        employee = REPOSITORY.records.get(employee_id)
+        if employee is not None:
+            merge_employee_update(employee, employee_id, updated_data)
             
-            # Replace the employee in the list
-            employees[i] = updated_data
-            save_employees(employees)
+            # Replace the employee record
+            entry = {"op": "update", "record": dict(updated_data)}
+            REPOSITORY.apply([entry])
             print(f"Updated employee with ID: {employee_id}")
             return updated_data
     
@@ -167,23 +736,201 @@ def update_employee(employee_id, updated_data):
 
 def delete_employee(employee_id):
     """Delete an employee by ID"""
-    employees = load_employees()
-    
-    for i, employee in enumerate(employees):
-        if employee.get("id") == employee_id:
-            deleted_employee = employees.pop(i)
-            save_employees(employees)
+    with REPOSITORY.transaction():
+        deleted_employee = REPOSITORY.records.get(employee_id)
+        if deleted_employee is not None:
+            entry = {"op": "delete", "id": employee_id}
+            REPOSITORY.apply([entry])
             print(f"Deleted employee: {deleted_employee.get('name')} with ID {employee_id}")
             return True
     
     print(f"Failed to delete - employee not found with ID: {employee_id}")
     return False  # Employee not found
 
+def add_employees(records):
+    """
+    Add many employees with a single load and a single commit.
+    
+    Returns one result per input record, in order:
+    {"success": True, "employee": {...}} or {"success": False, "error": "..."}
+    """
+    results = []
+    entries = []
+    with REPOSITORY.transaction():
+        for employee_data in records:
+            if not isinstance(employee_data, dict):
+                results.append({"success": False, "error": "Employee record must be an object"})
+                continue
+            missing = [field for field in REQUIRED_FIELDS if field not in employee_data]
+            if missing:
+                results.append({"success": False, "error": f"Missing required field: {missing[0]}"})
+                continue
+            prepare_new_employee(employee_data)
+            entries.append({"op": "add", "record": dict(employee_data)})
+            results.append({"success": True, "employee": employee_data})
+        if entries:
+            REPOSITORY.apply(entries)
+    print(f"Added {len(entries)} of {len(results)} employees in one batch")
+    return results
+
+def update_employees(updates):
+    """
+    Apply {employee_id: patch} updates with a single load and a single commit.
+    
+    Returns one result per id: {"id": ..., "success": True, "employee": {...}}
+    or {"id": ..., "success": False, "error": "..."}
+    """
+    results = []
+    entries = []
+    with REPOSITORY.transaction():
+        for employee_id, updated_data in updates.items():
+            employee = REPOSITORY.records.get(employee_id)
+            if employee is None:
+                results.append({"id": employee_id, "success": False, "error": "Employee not found"})
+                continue
+            if not isinstance(updated_data, dict):
+                results.append({"id": employee_id, "success": False, "error": "Update must be an object"})
+                continue
+            merge_employee_update(employee, employee_id, updated_data)
+            entries.append({"op": "update", "record": dict(updated_data)})
+            results.append({"id": employee_id, "success": True, "employee": updated_data})
+        if entries:
+            REPOSITORY.apply(entries)
+    print(f"Updated {len(entries)} of {len(results)} employees in one batch")
+    return results
+
+def delete_employees(employee_ids):
+    """
+    Delete many employees with a single load and a single commit.
+    
+    Returns one result per id: {"id": ..., "success": True|False}
+    """
+    results = []
+    entries = []
+    deleted = set()
+    with REPOSITORY.transaction():
+        for employee_id in employee_ids:
+            # A repeated id is reported as not found, as it would be one call at a time
+            if employee_id not in REPOSITORY.records or employee_id in deleted:
+                results.append({"id": employee_id, "success": False, "error": "Employee not found"})
+                continue
+            deleted.add(employee_id)
+            entries.append({"op": "delete", "id": employee_id})
+            results.append({"id": employee_id, "success": True})
+        if entries:
+            REPOSITORY.apply(entries)
+    print(f"Deleted {len(entries)} of {len(results)} employees in one batch")
+    return results
+
 def get_all_employees():
     """Get all employees"""
     employees = load_employees()
     print(f"Returning all {len(employees)} employees")
     return employees
 
+def find_employees(status=None, department=None, start_date_from=None, start_date_to=None):
+    """
+    Find employees matching the given filters.
+
+    status may be a single value or a list; it is normalized with
+    normalize_status and looked up in the status index, as is department,
+    so the cost depends on the number of matches rather than all employees.
+    start_date_from / start_date_to are inclusive YYYY-MM-DD bounds.
+    """
+    statuses = None
+    if status is not None:
+        statuses = set(normalize_status(s) for s in ([status] if isinstance(status, str) else status))
+    
+    version = REPOSITORY.current()
+    candidates = [version.records[employee_id] for employee_id in version.ids_with(statuses, department)]
+    # Records without a unique id are not indexed, so check them directly
+    for employee in version.unindexed:
+        if statuses is not None and normalize_status(employee.get("status")) not in statuses:
+            continue
+        if department is not None and employee.get("department") != department:
+            continue
+        candidates.append(employee)
+    
+    matches = []
+    for employee in candidates:
+        start_date = employee.get("startDate") or ""
+        if start_date_from is not None and start_date < start_date_from:
+            continue
+        if start_date_to is not None and start_date > start_date_to:
+            continue
+        matches.append(dict(employee))
+    return matches
+
+def count_by_status():
+    """Return {canonical status: number of employees} from the status index"""
+    version = REPOSITORY.current()
+    counts = {status: len(ids) for status, ids in version.by_status.items()}
+    for employee in version.unindexed:
+        status = normalize_status(employee.get("status"))
+        counts[status] = counts.get(status, 0) + 1
+    return counts
+
+def count_by_department():
+    """Return {department: number of employees} from the department index"""
+    version = REPOSITORY.current()
+    counts = {department: len(ids) for department, ids in version.by_department.items()}
+    for employee in version.unindexed:
+        department = employee.get("department")
+        counts[department] = counts.get(department, 0) + 1
+    return counts
+
+def created_since_bounds(since):
+    """Return the lowest new-style id and the lowest legacy id created at or after a datetime"""
+    return id_allocator.id_bounds(since, since)[0], int(since.timestamp())
+
+def count_created_since(since):
+    """
+    Return how many employees were created at or after a datetime, using the
+    creation time encoded in their ids rather than reading the records
+    """
+    lowest_id, lowest_legacy_id = created_since_bounds(since)
+    count = 0
+    for employee_id in REPOSITORY.current().records:
+        try:
+            value = int(employee_id)
+        except (TypeError, ValueError):
+            continue
+        if value >= id_allocator.LEGACY_ID_LIMIT:
+            count += value >= lowest_id
+        else:
+            count += value >= lowest_legacy_id
+    return count
+
+def build_employee_stats(by_status, by_department, recent):
+    """Assemble the dashboard numbers from the per-status and per-department counts"""
+    return {
+        "total": sum(by_status.values()),
+        "by_status": by_status,
+        "by_department": by_department,
+        "departments": len([department for department in by_department if department]),
+        "pending": sum(by_status.get(status, 0) for status in PENDING_STATUSES),
+        "completed": by_status.get("Completed", 0),
+        "recent": recent
+    }
+
+def employee_stats(days=7):
+    """Return the dashboard numbers; "recent" counts employees created in the last `days` days"""
+    since = datetime.now() - timedelta(days=days)
+    return build_employee_stats(count_by_status(), count_by_department(), count_created_since(since))
+
 # Initialize data directory on module load
-ensure_data_dir() 
\ No newline at end of file
+ensure_data_dir()
+
+def storage_backend():
+    """Return the storage module selected by HR_STORAGE_BACKEND (this module by default)"""
+    if os.environ.get("HR_STORAGE_BACKEND", "json").lower() == "sqlite":
+        import sqlite_store
+        return sqlite_store
+    return sys.modules[__name__]
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "export-json":
+        export_json(sys.argv[2] if len(sys.argv) > 2 else None)
+    else:
+        print("Usage: python data_store.py export-json [path/to/employees.json]")
+        sys.exit(1) 
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Offline Fake Chat Model for HR Workflow
+
+A drop-in stand-in for ChatGroq so onboarding can be load-tested without
+calling Groq. It recognizes the workflow prompts and answers with JSON that
+matches what each node asks for (equipment/access, training plan, or the
+single-shot answer), derived from the position and department in the prompt.
+
+It can also make itself misbehave the way the real API does:
+
+    latency     constant, uniform, normal or lognormal around a median
+    errors      a share of calls fail with a 500
+    429 bursts  a call can start a run of consecutive rate-limit errors,
+                shared by every thread, like an account-level limit
+    malformed   a share of JSON answers come back wrapped in prose, fenced,
+                with single quotes, trailing commas, cut off or not as JSON
+
+Errors are the groq SDK's RateLimitError/InternalServerError when it is
+installed, so callers see the same exception types as in production.
+
+Enable it with HR_LLM_BACKEND=fake (see hr_onboarding_workflow.create_llm).
+
+Configuration:
+    HR_FAKE_LLM_LATENCY_MS       median latency in ms (default 300)
+    HR_FAKE_LLM_LATENCY          constant | uniform | normal | lognormal (default lognormal)
+    HR_FAKE_LLM_SIGMA            spread: lognormal sigma, or a fraction of the median (default 0.5)
+    HR_FAKE_LLM_ERROR_RATE       share of calls failing with a 500 (default 0)
+    HR_FAKE_LLM_429_RATE         chance that a call starts a 429 burst (default 0)
+    HR_FAKE_LLM_429_BURST        calls rejected per burst (default 5)
+    HR_FAKE_LLM_MALFORMED_RATE   share of JSON answers that come back malformed (default 0)
+    HR_FAKE_LLM_SEED             random seed for reproducible runs
+"""
+
+import os
+import re
+import json
+import time
+import random
+import asyncio
+import threading
+from typing import Any, List, Optional
+
+from pydantic import PrivateAttr
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+try:
+    import groq
+    import httpx
+    HAS_GROQ = True
+except ImportError:
+    HAS_GROQ = False
+
+LATENCY_DISTRIBUTIONS = ("constant", "uniform", "normal", "lognormal")
+MALFORMATIONS = ("prose", "fence", "single_quotes", "trailing_comma", "truncated", "no_json")
+
+# Role profiles: (whole-word keywords in position/department, equipment, system access, training)
+ROLE_PROFILES = [
+    (("engineer", "developer", "engineering", "devops", "data", "qa"),
+     ["Laptop", "External Monitor", "Keyboard", "Mouse", "Headset"],
+     ["Email", "GitHub", "Jira", "CI/CD Pipeline", "Cloud Console"],
+     ["Company Orientation", "Security Awareness", "Code Review Process", "Development Environment Setup"]),
+    (("sales", "account executive", "account manager", "business development"),
+     ["Laptop", "Mobile Phone", "Headset"],
+     ["Email", "CRM", "Sales Dashboard", "Video Conferencing"],
+     ["Company Orientation", "Product Training", "CRM Training", "Sales Methodology"]),
+    (("marketing", "content", "brand", "design", "designer"),
+     ["Laptop", "External Monitor", "Drawing Tablet"],
+     ["Email", "Marketing Automation", "Analytics Dashboard", "Design Tools"],
+     ["Company Orientation", "Brand Guidelines", "Analytics Training", "Campaign Tools"]),
+    (("hr", "human resources", "recruiter", "recruiting", "people"),
+     ["Laptop", "Monitor", "Headset"],
+     ["Email", "HRIS", "Applicant Tracking System", "Payroll System"],
+     ["Company Orientation", "HR Policies", "Data Privacy Training", "HRIS Training"]),
+    (("finance", "accounting", "accountant", "analyst"),
+     ["Laptop", "Dual Monitors", "Keyboard", "Mouse"],
+     ["Email", "ERP", "Financial Reporting", "Expense System"],
+     ["Company Orientation", "Finance Systems", "Compliance Training", "Reporting Tools"]),
+]
+DEFAULT_PROFILE = (
+    ["Laptop", "Monitor", "Keyboard", "Mouse"],
+    ["Email", "Company Intranet", "Department Shared Drive"],
+    ["Company Orientation", "Department Introduction", "System Training"]
+)
+
+FIELD_RE = re.compile(r"(Position|Department|Employee Name):\s*(.+?)\s*$", re.MULTILINE)
+
+def _env_float(name, default):
+    return float(os.environ.get(name, str(default)))
+
+class FakeLLMError(Exception):
+    """Raised for injected errors when the groq SDK is not installed"""
+    def __init__(self, message, status_code):
+        super(FakeLLMError, self).__init__(message)
+        self.status_code = status_code
+
+def api_error(status_code, message):
+    """Build the exception the Groq client would raise for status_code"""
+    if not HAS_GROQ:
+        return FakeLLMError(message, status_code)
+    request = httpx.Request("POST", "https://api.groq.com/openai/v1/chat/completions")
+    response = httpx.Response(status_code, request=request, headers={"retry-after": "1"})
+    error_class = groq.RateLimitError if status_code == 429 else groq.InternalServerError
+    return error_class(message, response=response, body={"error": {"message": message}})
+
+def role_profile(position, department):
+    """Return (equipment, access, training) for a role, matching the department before the position"""
+    for text in (department, position):
+        text = (text or "").lower()
+        for keywords, equipment, access, training in ROLE_PROFILES:
+            # Whole words only, so "hr" does not match "three" nor "account" match "accountant"
+            if any(re.search(r"\b" + re.escape(keyword) + r"\b", text) for keyword in keywords):
+                return list(equipment), list(access), list(training)
+    return tuple(list(items) for items in DEFAULT_PROFILE)
+
+def answer_for(prompt):
+    """Return (content, is_json) answering one of the workflow prompts"""
+    fields = dict(FIELD_RE.findall(prompt))
+    name = fields.get("Employee Name", "the employee")
+    position = fields.get("Position", "")
+    department = fields.get("Department", "")
+    equipment, access, training = role_profile(position, department)
+    if "validation_notes" in prompt:
+        return json.dumps({
+            "validation_notes": ["Information for {} is complete".format(name)],
+            "equipment_needs": equipment,
+            "system_access": access,
+            "training_requirements": training
+        }), True
+    # The training prompt quotes earlier answers, so check for it before equipment
+    if "training_requirements" in prompt:
+        return json.dumps({"training_requirements": training + ["{} Onboarding".format(department or "Team")]}), True
+    if "equipment_needs" in prompt:
+        return json.dumps({"equipment_needs": equipment, "system_access": access}), True
+    return ("The information for {} ({}, {}) looks complete. "
+            "No missing details were found.".format(name, position or "unknown position", department or "unknown department")), False
+
+def malform(content, kind):
+    """Break a JSON answer the way models do"""
+    if kind == "prose":
+        return "Sure! Here is the JSON you asked for:\n{}\nLet me know if you need anything else.".format(content)
+    if kind == "fence":
+        return "```json\n{}\n```".format(json.dumps(json.loads(content), indent=2))
+    if kind == "single_quotes":
+        return content.replace('"', "'")
+    if kind == "trailing_comma":
+        return content[:-2] + "],}" if content.endswith("]}") else content[:-1] + ",}"
+    if kind == "truncated":
+        return content[:max(len(content) * 2 // 3, 1)]
+    return "I am unable to provide that in JSON, but the role needs a laptop and email access."
+
+class FakeGroqChat(BaseChatModel):
+    """Chat model that emulates Groq's answers, latency and failures offline"""
+    model_name: str = "llama3-70b-8192"
+    temperature: float = 0
+    latency_ms: float = 300.0
+    latency_distribution: str = "lognormal"
+    sigma: float = 0.5
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    rate_limit_burst: int = 5
+    malformed_rate: float = 0.0
+    seed: Optional[int] = None
+
+    _rng: Any = PrivateAttr(default=None)
+    _lock: Any = PrivateAttr(default=None)
+    _burst_left: int = PrivateAttr(default=0)
+    _counts: Any = PrivateAttr(default=None)
+
+    def __init__(self, **kwargs):
+        super(FakeGroqChat, self).__init__(**kwargs)
+        if self.latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError("latency_distribution must be one of {}".format(", ".join(LATENCY_DISTRIBUTIONS)))
+        self._rng = random.Random(self.seed)
+        self._lock = threading.Lock()
+        self._counts = {"calls": 0, "ok": 0, "errors": 0, "rate_limited": 0, "malformed": 0, "latency_seconds": 0.0}
+
+    @classmethod
+    def from_env(cls):
+        """Create the model from the HR_FAKE_LLM_* environment variables"""
+        seed = os.environ.get("HR_FAKE_LLM_SEED")
+        return cls(
+            latency_ms=_env_float("HR_FAKE_LLM_LATENCY_MS", 300),
+            latency_distribution=os.environ.get("HR_FAKE_LLM_LATENCY", "lognormal").lower(),
+            sigma=_env_float("HR_FAKE_LLM_SIGMA", 0.5),
+            error_rate=_env_float("HR_FAKE_LLM_ERROR_RATE", 0),
+            rate_limit_rate=_env_float("HR_FAKE_LLM_429_RATE", 0),
+            rate_limit_burst=int(os.environ.get("HR_FAKE_LLM_429_BURST", "5")),
+            malformed_rate=_env_float("HR_FAKE_LLM_MALFORMED_RATE", 0),
+            seed=int(seed) if seed else None
+        )
+
+    @property
+    def _llm_type(self):
+        return "fake-groq"
+
+    def stats(self):
+        """Calls, injected failures and total simulated latency so far"""
+        with self._lock:
+            return dict(self._counts)
+
+    def _latency(self):
+        """Draw one latency in seconds (caller holds self._lock)"""
+        median = self.latency_ms / 1000.0
+        if self.latency_distribution == "constant":
+            seconds = median
+        elif self.latency_distribution == "uniform":
+            seconds = self._rng.uniform(median * (1 - self.sigma), median * (1 + self.sigma))
+        elif self.latency_distribution == "normal":
+            seconds = self._rng.gauss(median, median * self.sigma)
+        else:
+            seconds = self._rng.lognormvariate(0, self.sigma) * median
+        return max(seconds, 0.0)
+
+    def _plan(self, messages):
+        """Decide the outcome of one call: returns (delay seconds, content or exception)"""
+        prompt = "\n".join(str(message.content) for message in messages)
+        content, is_json = answer_for(prompt)
+        with self._lock:
+            self._counts["calls"] += 1
+            delay = self._latency()
+            if self._burst_left == 0 and self._rng.random() < self.rate_limit_rate:
+                self._burst_left = self.rate_limit_burst
+            if self._burst_left > 0:
+                # Rate limits are rejected before any work is done
+                self._burst_left -= 1
+                self._counts["rate_limited"] += 1
+                delay = min(delay, 0.02)
+                self._counts["latency_seconds"] += delay
+                return delay, api_error(429, "Rate limit reached for model {}".format(self.model_name))
+            self._counts["latency_seconds"] += delay
+            if self._rng.random() < self.error_rate:
+                self._counts["errors"] += 1
+                return delay, api_error(500, "Internal server error")
+            if is_json and self._rng.random() < self.malformed_rate:
+                self._counts["malformed"] += 1
+                content = malform(content, self._rng.choice(MALFORMATIONS))
+            self._counts["ok"] += 1
+        return delay, content
+
+    @staticmethod
+    def _result(outcome):
+        if isinstance(outcome, Exception):
+            raise outcome
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=outcome))])
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        delay, outcome = self._plan(messages)
+        time.sleep(delay)
+        return self._result(outcome)
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        delay, outcome = self._plan(messages)
+        await asyncio.sleep(delay)
+        return self._result(outcome)
+
+if __name__ == "__main__":
+    # Show what the fake model answers with the current configuration
+    from langchain_core.messages import HumanMessage
+    model = FakeGroqChat.from_env()
+    prompt = ("Employee Name: Jane Smith\nPosition: Software Engineer\nDepartment: Engineering\n"
+              "Respond with ONLY a JSON object with 'equipment_needs' and 'system_access' as lists.")
+    for _ in range(5):
+        try:
+            print(model.invoke([HumanMessage(content=prompt)]).content)
+        except Exception as e:
+            print("{}: {}".format(type(e).__name__, e))
+    print(model.stats())
@@ -8,17 +8,17 @@ This script replaces the LangGraph integration with the simplified workflow.
 import os
 import json
 import sys
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 from datetime import datetime
 
 # Import the simplified workflow
 try:
-    from simplified_workflow import process_onboarding
+    from simplified_workflow import process_onboarding, aprocess_onboarding, warm_up
     print("Successfully imported simplified_workflow module")
 except ImportError:
     sys.path.append(os.path.dirname(os.path.abspath(__file__)))
     try:
-        from simplified_workflow import process_onboarding
+        from simplified_workflow import process_onboarding, aprocess_onboarding, warm_up
         print("Successfully imported simplified_workflow module (after path adjustment)")
     except ImportError:
         print("ERROR: Could not import simplified_workflow module.")
@@ -26,46 +26,79 @@ except ImportError:
         raise
 
 # Function to process an employee through the simplified workflow
-def process_employee(employee_data: Dict) -> Dict:
+def process_employee(employee_data: Dict, single_shot: Optional[bool] = None,
+                     on_event: Optional[Callable] = None) -> Dict:
     """
     Process an employee through the simplified workflow and return the result
+
+    single_shot=True gets everything from one structured LLM call instead of
+    three; None follows HR_WORKFLOW_ENGINE. on_event(event, data) receives
+    the progress of every node.
     """
     try:
         print(f"Starting simplified workflow processing for {employee_data.get('name', '')}")
         
         # Run the workflow
         print("Executing workflow...")
-        result = process_onboarding(employee_data)
+        result = process_onboarding(employee_data, single_shot=single_shot, on_event=on_event)
         print(f"Workflow execution completed for {employee_data.get('name', '')}")
         
-        # Format the result to match what the frontend expects
-        return {
-            "success": True,
-            "employee": {
-                "name": employee_data.get('name', ''),
-                "position": employee_data.get('position', ''),
-                "department": employee_data.get('department', ''),
-                "startDate": employee_data.get('startDate', ''),
-                "equipmentNeeds": result.get("employee", {}).get("equipmentNeeds", []),
-                "systemAccess": result.get("employee", {}).get("systemAccess", []),
-                "trainingRequirements": result.get("employee", {}).get("trainingRequirements", []),
-                "status": "completed"
-            },
-            "hrNotes": result.get("hrNotes", []),
-            "itNotes": result.get("itNotes", []),
-            "completed_steps": ["employee_info", "equipment_access", "training_plan"],
-            "documents": ["Welcome Letter", "Equipment Request Form", "Access Request Form", "Training Plan"],
-        }
+        return format_workflow_result(employee_data, result)
     except Exception as e:
         print(f"Error in process_employee: {str(e)}")
         import traceback
         traceback.print_exc()
-        return {
-            "success": False,
-            "error": str(e),
-            "employee_name": employee_data.get('name', ''),
-            "status": "failed"
-        }
+        return workflow_error_result(employee_data, e)
+
+async def aprocess_employee(employee_data: Dict, single_shot: Optional[bool] = None,
+                            on_event: Optional[Callable] = None) -> Dict:
+    """
+    Async version of process_employee: awaits the LLM calls so many employees
+    can be processed concurrently on one event loop
+    """
+    try:
+        print(f"Starting async workflow processing for {employee_data.get('name', '')}")
+        result = await aprocess_onboarding(employee_data, single_shot=single_shot, on_event=on_event)
+        print(f"Workflow execution completed for {employee_data.get('name', '')}")
+        return format_workflow_result(employee_data, result)
+    except Exception as e:
+        print(f"Error in aprocess_employee: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return workflow_error_result(employee_data, e)
+
+def format_workflow_result(employee_data: Dict, result: Dict) -> Dict:
+    """Format the workflow result to match what the frontend expects"""
+    return {
+        "success": True,
+        "employee": {
+            "name": employee_data.get('name', ''),
+            "position": employee_data.get('position', ''),
+            "department": employee_data.get('department', ''),
+            "startDate": employee_data.get('startDate', ''),
+            "equipmentNeeds": result.get("employee", {}).get("equipmentNeeds", []),
+            "systemAccess": result.get("employee", {}).get("systemAccess", []),
+            "trainingRequirements": result.get("employee", {}).get("trainingRequirements", []),
+            "status": "completed"
+        },
+        "hrNotes": result.get("hrNotes", []),
+        "itNotes": result.get("itNotes", []),
+        "completed_steps": ["employee_info", "equipment_access", "training_plan"],
+        "documents": ["Welcome Letter", "Equipment Request Form", "Access Request Form", "Training Plan"],
+        # "rules" when the answer came from the mined rule table instead of the LLM
+        "source": result.get("source", "workflow"),
+        # Nodes answered from the response cache: copies of an earlier run's answer
+        "cachedNodes": result.get("cachedNodes", []),
+    }
+
+def workflow_error_result(employee_data: Dict, error: Exception) -> Dict:
+    """Result returned when the workflow raised"""
+    return {
+        "success": False,
+        "error": str(error),
+        "employee_name": employee_data.get('name', ''),
+        "status": "failed"
+    }
 
 # Function to save workflow results to a file
 def save_workflow_results(result: Dict, employee_id: str) -> str:
@@ -16,6 +16,7 @@ const logoutBtn = document.getElementById('logout-btn');
 // API endpoints
 const API_URL = '/api';
 const EMPLOYEES_API = `${API_URL}/admin/employees`;
+const STATS_API = `${EMPLOYEES_API}/stats`;
 const AUTH_CHECK_API = `${API_URL}/admin/check-auth`;
 const LOGOUT_API = `${API_URL}/admin/logout`;
 
@@ -29,7 +30,7 @@ document.addEventListener('DOMContentLoaded', () => {
     checkAuthentication().then(isAuthenticated => {
         if (isAuthenticated) {
             // Fetch initial data
-            fetchEmployees();
+            refreshDashboard();
 
             // Setup event listeners
             setupEventListeners();
@@ -73,7 +74,7 @@ async function checkAuthentication() {
 function setupEventListeners() {
     // Refresh button
     if (refreshBtn) {
-        refreshBtn.addEventListener('click', fetchEmployees);
+        refreshBtn.addEventListener('click', refreshDashboard);
     }
     
     // Add employee button
@@ -116,6 +117,43 @@ async function logoutUser() {
     }
 }
 
+/**
+ * Reload the stats and the employees table
+ */
+function refreshDashboard() {
+    fetchStats();
+    fetchEmployees();
+}
+
+/**
+ * Fetch the dashboard counts, computed by the server from its indexes
+ */
+async function fetchStats() {
+    try {
+        const response = await fetch(STATS_API, {
+            method: 'GET',
+            credentials: 'include',
+            headers: {
+                'Accept': 'application/json'
+            }
+        });
+        
+        if (response.status === 401) {
+            window.location.href = '/login';
+            return;
+        }
+        
+        const stats = await response.json();
+        if (response.ok) {
+            updateDashboardStats(stats);
+        } else {
+            console.error('Error fetching stats:', stats.error);
+        }
+    } catch (error) {
+        console.error('Error fetching stats:', error);
+    }
+}
+
 /**
  * Fetch all employees from the API
  */
@@ -144,9 +182,6 @@ async function fetchEmployees() {
             employees = data.employees || [];
             console.log(`Loaded ${employees.length} employees`);
             
-            // Update dashboard stats
-            updateDashboardStats();
-            
             // Render recent employees table
             renderRecentEmployees();
         } else {
@@ -162,53 +197,25 @@ async function fetchEmployees() {
 /**
  * Update the dashboard statistics
  */
-function updateDashboardStats() {
-    if (!employees) return;
+function updateDashboardStats(stats) {
+    if (!stats) return;
     
-    // Total employees
     if (totalEmployeesEl) {
-        totalEmployeesEl.textContent = employees.length;
+        totalEmployeesEl.textContent = stats.total;
     }
     
-    // Count departments (unique)
+    // Departments with at least one employee
     if (totalDepartmentsEl) {
-        // Filter out null, undefined, or empty departments
-        const departmentsArray = employees
-            .map(emp => emp.department)
-            .filter(dept => dept && dept.trim() !== '');
-            
-        // Count only unique valid departments
-        const departments = new Set(departmentsArray);
-        totalDepartmentsEl.textContent = departments.size;
+        totalDepartmentsEl.textContent = stats.departments;
     }
     
-    // Recent employees (added in the last 7 days)
+    // Employees added in the last 7 days
     if (recentEmployeesEl) {
-        const oneWeekAgo = new Date();
-        oneWeekAgo.setDate(oneWeekAgo.getDate() - 7);
-        
-        const recentCount = employees.filter(emp => {
-            if (!emp.created_at) return false;
-            const createdAt = new Date(emp.created_at);
-            return createdAt >= oneWeekAgo;
-        }).length;
-        
-        recentEmployeesEl.textContent = recentCount;
+        recentEmployeesEl.textContent = stats.recent;
     }
     
-    // Completed onboarding - use case-insensitive matching
     if (completedOnboardingEl) {
-        const completedCount = employees.filter(emp => {
-            // Handle case when status is null/undefined
-            if (!emp.status) return false;
-            
-            // Case-insensitive matching
-            const status = emp.status.toLowerCase();
-            return status === 'complete' || status === 'completed';
-        }).length;
-        
-        completedOnboardingEl.textContent = completedCount;
-        console.log(`Found ${completedCount} employees with completed status`);
+        completedOnboardingEl.textContent = stats.completed;
     }
 }
 
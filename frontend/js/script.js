@@ -11,10 +11,20 @@ document.addEventListener('DOMContentLoaded', function() {
     const restartBtn = document.getElementById('restart-btn');
     const errorRetryBtn = document.getElementById('error-retry-btn');
     const progressBar = document.getElementById('progress-bar');
+    const loadingStep = document.getElementById('loading-step');
+    const progressSteps = document.getElementById('progress-steps');
     
     // API endpoint - Updated to use port 3000
     const apiBaseUrl = 'http://localhost:3000';
     const apiEndpoint = apiBaseUrl + '/api/start-onboarding';
+    const jobPollIntervalMs = 1000;
+    const stepLabels = {
+        collect_employee_info: 'Validating employee information',
+        determine_equipment_access: 'Determining equipment and access',
+        create_training_plan: 'Creating training plan',
+        single_shot_onboarding: 'Preparing onboarding plan',
+        rules: 'Applying onboarding rules'
+    };
     
     // Check API health on page load
     checkApiHealth();
@@ -66,9 +76,6 @@ document.addEventListener('DOMContentLoaded', function() {
         employeeFormSection.classList.add('d-none');
         loadingSection.classList.remove('d-none');
         
-        // Simulate progress bar
-        simulateProgress();
-        
         // Call API
         fetch(apiEndpoint, {
             method: 'POST',
@@ -92,6 +99,18 @@ document.addEventListener('DOMContentLoaded', function() {
             }
             return response.json();
         })
+        .then(data => {
+            // The server answers 202 with a job id; follow its progress events,
+            // or poll the job when the browser has no EventSource
+            if (data.job_id && data.events_url && window.EventSource) {
+                return followJob(apiBaseUrl + data.events_url, apiBaseUrl + data.status_url);
+            }
+            if (data.job_id) {
+                simulateProgress();
+                return waitForJob(apiBaseUrl + data.status_url);
+            }
+            return data;
+        })
         .then(data => {
             // Complete progress bar
             progressBar.style.width = '100%';
@@ -133,6 +152,96 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
     
+    // Function to follow an onboarding job's progress events until it is done or failed
+    function followJob(eventsUrl, jobUrl) {
+        return new Promise((resolve, reject) => {
+            const source = new EventSource(eventsUrl);
+            let finished = false;
+            const finish = () => {
+                finished = true;
+                source.close();
+            };
+            
+            source.addEventListener('node_start', event => {
+                const data = JSON.parse(event.data);
+                loadingStep.textContent = (stepLabels[data.node] || data.node) + '...';
+                progressBar.style.width = `${Math.round(100 * (data.step - 1) / data.steps) + 5}%`;
+            });
+            source.addEventListener('node_finish', event => {
+                const data = JSON.parse(event.data);
+                progressBar.style.width = `${Math.round(100 * data.step / data.steps)}%`;
+                showStepResult(data);
+            });
+            source.addEventListener('done', event => {
+                finish();
+                const data = JSON.parse(event.data);
+                // A server that did not run the job sends the job itself
+                resolve(data.result);
+            });
+            source.addEventListener('failed', event => {
+                finish();
+                const data = JSON.parse(event.data);
+                reject(new Error(JSON.stringify({ error: data.error || 'Onboarding failed' })));
+            });
+            source.addEventListener('queued', event => {
+                loadingStep.textContent = 'Waiting for a free workflow worker...';
+            });
+            source.addEventListener('running', event => {
+                loadingStep.textContent = 'Processing onboarding workflow...';
+            });
+            source.onerror = () => {
+                // EventSource reconnects by itself while the server is reachable;
+                // once it gives up, fall back to polling the job
+                if (!finished && source.readyState === EventSource.CLOSED) {
+                    finish();
+                    waitForJob(jobUrl).then(resolve, reject);
+                }
+            };
+        });
+    }
+    
+    // Function to show what a finished step decided while later steps still run
+    function showStepResult(data) {
+        const result = data.result || {};
+        const facts = result.equipment || result.training || {};
+        const items = [].concat(facts.equipment_needs || [], facts.system_access || [],
+                                facts.training_requirements || [], result.equipmentNeeds || [],
+                                result.systemAccess || []);
+        const li = document.createElement('li');
+        const seconds = (data.duration_ms / 1000).toFixed(1);
+        li.innerHTML = `<i class="fa fa-check-circle text-success"></i> ${stepLabels[data.node] || data.node} (${seconds}s)`;
+        if (items.length) {
+            const detail = document.createElement('div');
+            detail.className = 'text-muted ms-4';
+            detail.textContent = items.join(', ');
+            li.appendChild(detail);
+        }
+        progressSteps.appendChild(li);
+    }
+    
+    // Function to poll an onboarding job until it is done or failed
+    function waitForJob(jobUrl) {
+        return new Promise((resolve, reject) => {
+            const poll = () => {
+                fetch(jobUrl)
+                    .then(response => response.json().then(job => ({ ok: response.ok, job: job })))
+                    .then(({ ok, job }) => {
+                        if (!ok) {
+                            reject(new Error(JSON.stringify(job)));
+                        } else if (job.status === 'done') {
+                            resolve(job.result);
+                        } else if (job.status === 'failed') {
+                            reject(new Error(JSON.stringify({ error: job.error || 'Onboarding failed' })));
+                        } else {
+                            setTimeout(poll, jobPollIntervalMs);
+                        }
+                    })
+                    .catch(reject);
+            };
+            poll();
+        });
+    }
+    
     // Function to display results
     function displayResults(data) {
         // Set employee info
@@ -214,6 +323,8 @@ document.addEventListener('DOMContentLoaded', function() {
         
         // Reset progress bar
         progressBar.style.width = '0%';
+        loadingStep.textContent = 'Processing onboarding workflow...';
+        progressSteps.innerHTML = '';
         
         // Hide all sections except employee form
         loadingSection.classList.add('d-none');
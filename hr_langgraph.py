@@ -1,13 +1,17 @@
 import os
 import json
-from typing import Dict, List, TypedDict, Annotated, Sequence, Any
+import time
+import operator
+from typing import Dict, List, TypedDict, Annotated, Sequence, Any, Callable, Optional
 from datetime import datetime
 
 from langchain_core.messages import HumanMessage, AIMessage
 from langchain_core.output_parsers import StrOutputParser
 from langchain_groq import ChatGroq
-from langgraph.graph import StateGraph, END
-from langgraph_checkpoint import MemorySaver
+from langgraph.graph import StateGraph, START, END
+
+import workflow_registry
+import sqlite_checkpointer
 
 # Type definitions for our workflow
 class EmployeeInfo(TypedDict):
@@ -20,30 +24,31 @@ class EmployeeInfo(TypedDict):
     system_access: List[str]
     status: str
 
+def merge_memory(left: Dict[str, Any], right: Dict[str, Any]) -> Dict[str, Any]:
+    """Combine memory updates from nodes that ran in the same step"""
+    merged = dict(left or {})
+    merged.update(right or {})
+    return merged
+
+# Nodes return only the keys they change; the annotated fields are merged so
+# parallel nodes can update them in the same step
 class WorkflowState(TypedDict):
     employee: EmployeeInfo
     current_step: str
-    completed_steps: List[str]
-    messages: List[Any]
+    completed_steps: Annotated[List[str], operator.add]
+    messages: Annotated[List[Any], operator.add]
     documents_ready: List[str]
     feedback: str
-    memory: Dict[str, Any]  # New field for persistent memory
+    memory: Annotated[Dict[str, Any], merge_memory]  # New field for persistent memory
 
 # Initialize LLM (using Groq, but this can be changed to any provider)
 # You'll need to set GROQ_API_KEY environment variable
 api_key = os.environ.get("GROQ_API_KEY", "")
 llm = ChatGroq(temperature=0, model_name="llama3-70b-8192", api_key=api_key)
 
-# Create storage for workflow persistence
-memory_saver = MemorySaver()
-
 # Node 1: Documentation Preparation Node
 def prepare_documents(state: WorkflowState) -> WorkflowState:
     """Generate a list of required documents based on employee information."""
-    # Initialize memory if not present
-    if "memory" not in state:
-        state["memory"] = {}
-    
     # Create a message to ask the LLM for required documents
     employee = state["employee"]
     prompt = f"""
@@ -89,23 +94,23 @@ def prepare_documents(state: WorkflowState) -> WorkflowState:
             "Department Specific Policies"
         ]
     
-    # Add to memory
-    state["memory"]["documents_generated_at"] = datetime.now().isoformat()
-    state["memory"]["document_requirements"] = {
-        "based_on_department": employee["department"],
-        "based_on_position": employee["position"]
+    # Update state with document list and memory
+    return {
+        "documents_ready": documents,
+        "current_step": "documents_prepared",
+        "completed_steps": ["document_preparation"],
+        "messages": [{
+            "role": "system",
+            "content": f"Documents prepared for {employee['name']}: {', '.join(documents)}"
+        }],
+        "memory": {
+            "documents_generated_at": datetime.now().isoformat(),
+            "document_requirements": {
+                "based_on_department": employee["department"],
+                "based_on_position": employee["position"]
+            }
+        }
     }
-    
-    # Update state with document list
-    state["documents_ready"] = documents
-    state["current_step"] = "documents_prepared"
-    state["completed_steps"].append("document_preparation")
-    state["messages"].append({
-        "role": "system",
-        "content": f"Documents prepared for {employee['name']}: {', '.join(documents)}"
-    })
-    
-    return state
 
 # Node 2: Personalized Welcome Message
 def generate_welcome_message(state: WorkflowState) -> WorkflowState:
@@ -161,19 +166,19 @@ def generate_welcome_message(state: WorkflowState) -> WorkflowState:
     HR Department
     """
     
-    # Add to memory
-    state["memory"]["welcome_message_generated_at"] = datetime.now().isoformat()
-    state["memory"]["sentiment"] = "positive"
-    
-    # Update state with welcome message
-    state["messages"].append({
-        "role": "assistant",
-        "content": welcome_message
-    })
-    state["current_step"] = "welcome_message_sent"
-    state["completed_steps"].append("welcome_message")
-    
-    return state
+    # Update state with welcome message and memory; current_step is left to
+    # the join node because equipment provisioning runs in the same step
+    return {
+        "messages": [{
+            "role": "assistant",
+            "content": welcome_message
+        }],
+        "completed_steps": ["welcome_message"],
+        "memory": {
+            "welcome_message_generated_at": datetime.now().isoformat(),
+            "sentiment": "positive"
+        }
+    }
 
 # Node 3: Equipment Provisioning
 def provision_equipment(state: WorkflowState) -> WorkflowState:
@@ -181,7 +186,7 @@ def provision_equipment(state: WorkflowState) -> WorkflowState:
     employee = state["employee"]
     
     # Access memory from previous steps
-    welcome_message_time = state["memory"].get("welcome_message_generated_at", "unknown time")
+    documents_generated_at = state["memory"].get("documents_generated_at", "unknown time")
     document_requirements = state["memory"].get("document_requirements", {})
     
     # Get the equipment needs from employee data
@@ -202,33 +207,41 @@ def provision_equipment(state: WorkflowState) -> WorkflowState:
         })
     
     # Create a summary message with context from memory
+    ticket_lines = "".join(
+        f"- {item['item']}: Ticket #{item['ticket_id']} ({item['status']}, Priority: {item['priority']})\n"
+        for item in provisioning_details
+    )
     summary = f"""
     Equipment provisioning for {employee['name']}:
     
-    {"".join([f"- {item['item']}: Ticket #{item['ticket_id']} ({item['status']}, Priority: {item['priority']})\n" for item in provisioning_details])}
+    {ticket_lines}
     
     All equipment will be ready by {employee['start_date']}.
     
-    Note: Welcome message was sent at {welcome_message_time}
+    Note: Onboarding documents were prepared at {documents_generated_at}
     Equipment requirements are based on the employee's role as {employee['position']} in {employee['department']}.
     """
     
-    # Add to memory
-    state["memory"]["equipment_provisioned_at"] = datetime.now().isoformat()
-    state["memory"]["equipment_details"] = [
-        {"item": item["item"], "ticket_id": item["ticket_id"]} 
-        for item in provisioning_details
-    ]
-    
-    # Update state
-    state["messages"].append({
-        "role": "system",
-        "content": summary
-    })
-    state["current_step"] = "equipment_provisioned"
-    state["completed_steps"].append("equipment_provisioning")
-    
-    return state
+    # Update state and memory
+    return {
+        "messages": [{
+            "role": "system",
+            "content": summary
+        }],
+        "completed_steps": ["equipment_provisioning"],
+        "memory": {
+            "equipment_provisioned_at": datetime.now().isoformat(),
+            "equipment_details": [
+                {"item": item["item"], "ticket_id": item["ticket_id"]}
+                for item in provisioning_details
+            ]
+        }
+    }
+
+# Join: runs once both the welcome message and the equipment are done
+def finish_onboarding(state: WorkflowState) -> WorkflowState:
+    """Mark the onboarding as ready after the parallel steps have merged."""
+    return {"current_step": "onboarding_ready"}
 
 # Define our workflow graph with persistence
 def create_workflow_graph():
@@ -239,23 +252,40 @@ def create_workflow_graph():
     workflow.add_node("document_preparation", prepare_documents)
     workflow.add_node("welcome_message", generate_welcome_message)
     workflow.add_node("equipment_provisioning", provision_equipment)
+    workflow.add_node("finish_onboarding", finish_onboarding)
     
-    # Add edges (define the flow)
+    # Add edges (define the flow): the welcome message and equipment
+    # provisioning only need the documents, so they run in parallel
+    workflow.add_edge(START, "document_preparation")
     workflow.add_edge("document_preparation", "welcome_message")
-    workflow.add_edge("welcome_message", "equipment_provisioning")
-    workflow.add_edge("equipment_provisioning", END)
-    
-    # Set the entry point
-    workflow.set_entry_point("document_preparation")
+    workflow.add_edge("document_preparation", "equipment_provisioning")
+    workflow.add_edge(["welcome_message", "equipment_provisioning"], "finish_onboarding")
+    workflow.add_edge("finish_onboarding", END)
     
-    # Configure persistence
-    persisted_workflow = workflow.compile(checkpointer=memory_saver)
+    # Configure persistence (SQLite unless HR_CHECKPOINTER=memory)
+    persisted_workflow = workflow.compile(checkpointer=sqlite_checkpointer.get_checkpointer())
     
     return persisted_workflow
 
+# Compiled once per process; runs are kept apart by their thread_id
+workflow_registry.register("langgraph.onboarding_graph", create_workflow_graph)
+
+def get_workflow_graph():
+    """Return the compiled workflow graph shared by this process"""
+    return workflow_registry.get("langgraph.onboarding_graph")
+
+def warm_up():
+    """Compile the workflow graph ahead of the first onboarding"""
+    return workflow_registry.warm_up(["langgraph.onboarding_graph"])
+
 # Function to start a new onboarding workflow
-def start_onboarding_workflow(employee_data: Dict) -> Dict:
-    """Start the onboarding workflow for a new employee."""
+def start_onboarding_workflow(employee_data: Dict, on_event: Optional[Callable] = None) -> Dict:
+    """
+    Start the onboarding workflow for a new employee.
+
+    on_event(event, data), if given, receives node_start and node_finish
+    events (with duration and the node's update) as the graph runs.
+    """
     # Prepare the initial state with memory
     initial_state = WorkflowState(
         employee=employee_data,
@@ -267,17 +297,41 @@ def start_onboarding_workflow(employee_data: Dict) -> Dict:
         memory={}  # Initialize empty memory
     )
     
-    # Create the workflow
-    workflow = create_workflow_graph()
+    # Reuse the compiled workflow
+    workflow = get_workflow_graph()
     
     # Generate a unique thread ID for this workflow
     thread_id = f"thread_{employee_data['employee_id']}_{datetime.now().timestamp()}"
     
     # Run the workflow with persistence
-    for event, state in workflow.stream(initial_state, thread_id=thread_id):
-        print(f"Step completed: {event}")
-    
-    # Return the final state
+    config = {"configurable": {"thread_id": thread_id}}
+    if on_event is None:
+        for update in workflow.stream(initial_state, config):
+            for step in update:
+                print(f"Step completed: {step}")
+    else:
+        # Debug mode reports when each node's task starts and finishes
+        started = {}
+        for event in workflow.stream(initial_state, config, stream_mode="debug"):
+            payload = event.get("payload") or {}
+            if event.get("type") == "task":
+                started[payload.get("id")] = time.perf_counter()
+                on_event("node_start", {"node": payload.get("name"), "step": event.get("step")})
+            elif event.get("type") == "task_result":
+                print(f"Step completed: {payload.get('name')}")
+                duration = time.perf_counter() - started.pop(payload.get("id"), time.perf_counter())
+                on_event("node_finish", {
+                    "node": payload.get("name"),
+                    "step": event.get("step"),
+                    "duration_ms": round(duration * 1000, 1),
+                    "error": payload.get("error"),
+                    "result": dict(payload.get("result") or [])
+                })
+    
+    # Return the final state (stream yields only each node's updates); the
+    # finished thread's checkpoints are pruned after the retention period
+    state = workflow.get_state(config).values
+    sqlite_checkpointer.mark_finished(workflow.checkpointer, thread_id)
     return state
 
 # Example usage
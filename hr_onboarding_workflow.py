@@ -8,7 +8,13 @@ This script implements a simple HR onboarding workflow with multiple nodes and m
 # Import necessary libraries
 import os
 import sys
-import copy  # Add copy module for deepcopy
+import copy
+from datetime import datetime
+import llm_cache
+import llm_parsing
+import workflow_registry
+import onboarding_memory
+from workflow_state import History, append_history
 
 # Version check
 if sys.version_info[0] < 3:
@@ -37,17 +43,17 @@ class BaseModel(object):
             return None
         return self.__dict__[name]
 
-# LangGraph and LangChain imports
+# LangGraph and LangChain imports (the Groq client is imported in create_llm)
 try:
-    from langgraph.graph import StateGraph, END
-    from langchain_groq import ChatGroq
+    from langgraph.graph import StateGraph, START, END
     from langchain.prompts import ChatPromptTemplate
-    from langchain_core.output_parsers import JsonOutputParser
-    from langchain_core.messages import HumanMessage, AIMessage
+    from langchain_core.messages import HumanMessage
+    import sqlite_checkpointer
 except ImportError:
+    # Raise instead of exiting so an importer (the API) can run without the workflow
     print("Error: Required packages not found. Please install the requirements:")
     print("pip install -r requirements.txt")
-    sys.exit(1)
+    raise
 
 # Set Groq API key
 os.environ["GROQ_API_KEY"] = "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"
@@ -70,6 +76,10 @@ class EmployeeInfo(object):
         self.training_requirements = training_requirements or []
         self.onboarding_status = onboarding_status
 
+    def _asdict(self):
+        # The checkpoint serde stores objects with _asdict as their constructor arguments
+        return dict(self.__dict__)
+
 # Define the state structure - Python 2 compatible
 class State(dict):
     """Custom state class that extends dict to ensure compatibility with LangGraph"""
@@ -77,20 +87,110 @@ class State(dict):
         super(State, self).__init__(*args, **kwargs)
     
     def copy(self):
-        """Return a deep copy of the state"""
-        return copy.deepcopy(self)
+        """Return a shallow copy; the values are never modified in place, so they can be shared"""
+        return State(self)
+
+# Graph state: nodes return only the keys they change, and the growing fields
+# are persistent Histories that parallel branches append to in the same step
+# without copying what came before
+class OnboardingState(TypedDict, total=False):
+    employee: EmployeeInfo
+    equipment: Dict
+    hr_notes: Annotated[History, append_history]
+    it_notes: Annotated[History, append_history]
+    messages: Annotated[History, append_history]
+    # Compact facts per step, rendered as context for later prompts
+    memory: Annotated[Dict, onboarding_memory.merge_memory]
 
 #############################################
 # Define Nodes
 #############################################
 
-# Initialize LLM
-try:
-    llm = ChatGroq(model="llama3-70b-8192", temperature=0)
-except Exception as e:
-    print("Error initializing ChatGroq: {}".format(e))
-    print("Check your API key and internet connection.")
-    sys.exit(1)
+# HR_LLM_BACKEND=fake swaps Groq for the offline fake model (fake_llm) so
+# the workflow can be load-tested without network access
+LLM_BACKEND = os.environ.get("HR_LLM_BACKEND", "groq").lower()
+
+# The LLM client is created on first use, not at import
+def create_llm():
+    """Create the chat model client"""
+    if LLM_BACKEND == "fake":
+        import fake_llm
+        print("Using the offline fake LLM (HR_LLM_BACKEND=fake)")
+        return fake_llm.FakeGroqChat.from_env()
+    try:
+        from langchain_groq import ChatGroq
+        return ChatGroq(model="llama3-70b-8192", temperature=0)
+    except Exception as e:
+        print("Error initializing ChatGroq: {}".format(e))
+        print("Check your API key and internet connection.")
+        raise
+
+workflow_registry.register("llm", create_llm)
+
+def get_llm():
+    """Return the chat model shared by this process"""
+    return workflow_registry.get("llm")
+
+# Bump these when the prompt of a cached node changes. Both engines
+# (simplified_workflow imports these) share the cache entries of a node.
+EQUIPMENT_PROMPT_VERSION = 1
+TRAINING_PROMPT_VERSION = 3
+
+# Answers used when the model gives no usable JSON
+DEFAULT_EQUIPMENT_NEEDS = ["Laptop", "Monitor", "Keyboard", "Mouse"]
+DEFAULT_SYSTEM_ACCESS = ["Email", "Company Intranet", "Department Shared Drive"]
+DEFAULT_TRAINING_REQUIREMENTS = [
+    "Company Orientation",
+    "Department Introduction",
+    "System Training",
+    "Role-specific Training",
+    "Equipment Training"
+]
+
+# Prompt templates are built once at import and shared by every run
+VALIDATION_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "You are an HR assistant helping with employee onboarding. "
+              "Validate the following employee information and add any missing details."),
+    ("user", "Employee Name: {name}\n"
+            "Position: {position}\n"
+            "Department: {department}\n"
+            "Start Date: {start_date}")
+])
+
+EQUIPMENT_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "You are an IT specialist helping with employee onboarding. "
+              "Determine appropriate equipment and system access based on the role. "
+              "Your response MUST be valid JSON with double quotes, containing ONLY 'equipment_needs' and 'system_access' lists "
+              "with no additional text before or after the JSON."),
+    ("user", "Based on the following employee information, list required equipment and system access:\n"
+            "Employee Name: {name}\n"
+            "Position: {position}\n"
+            "Department: {department}\n"
+            "Respond with ONLY a JSON object with 'equipment_needs' and 'system_access' as lists. "
+            "Do not include any explanations or text outside the JSON.")
+])
+
+TRAINING_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "You are a training coordinator helping with employee onboarding. "
+              "Create a training plan for the new employee. "
+              "Your response MUST be valid JSON with double quotes, containing ONLY a 'training_requirements' list "
+              "with no additional text before or after the JSON."),
+    ("user", "Based on the following employee information and previous onboarding steps, "
+            "determine appropriate training requirements:\n"
+            "Employee Name: {name}\n"
+            "Position: {position}\n"
+            "Department: {department}\n"
+            "Equipment: {equipment}\n"
+            "System Access: {access}\n\n"
+            "Context from previous steps:\n{context}\n\n"
+            "Return ONLY a JSON object with only a 'training_requirements' key containing an array of strings. "
+            "Do not include any explanations or text outside the JSON.")
+])
+
+# The prompt | llm chains and the compiled graph are built once per process
+# (see workflow_registry) and reused by every onboarding
+workflow_registry.register("onboarding.equipment_chain", lambda: EQUIPMENT_PROMPT | get_llm())
+workflow_registry.register("onboarding.training_chain", lambda: TRAINING_PROMPT | get_llm())
 
 # Node 1: Collect and validate employee information
 def collect_employee_info(state):
@@ -109,17 +209,9 @@ def collect_employee_info(state):
             
         employee = state["employee"]
         print("DEBUG Node 1 - Employee: {}".format(employee.name))
-        messages = state.get("messages", [])
         
-        # Create a prompt for the LLM
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", "You are an HR assistant helping with employee onboarding. "
-                      "Validate the following employee information and add any missing details."),
-            ("user", "Employee Name: {name}\n"
-                    "Position: {position}\n"
-                    "Department: {department}\n"
-                    "Start Date: {start_date}")
-        ])
+        # Prompt templates are built once at import
+        prompt = VALIDATION_PROMPT
         
         # Format the prompt with employee info
         formatted_prompt = prompt.format(
@@ -131,21 +223,18 @@ def collect_employee_info(state):
         
         # Get response from LLM - fixing the content attribute issue
         human_message = HumanMessage(content=str(formatted_prompt))
-        response = llm.invoke([human_message])
-        
-        # Store the message in memory
-        messages.append({"role": "user", "content": str(formatted_prompt)})
-        messages.append({"role": "assistant", "content": response.content})
-        
-        # Add a note to HR notes
-        hr_notes = state.get("hr_notes", [])
-        hr_notes.append("Employee information validated for {}".format(employee.name))
-        
-        # Return updated state
-        new_state = copy.deepcopy(state)
-        new_state["hr_notes"] = hr_notes
-        new_state["messages"] = messages
-        return new_state
+        response = get_llm().invoke([human_message])
+        onboarding_memory.record_tokens("collect_employee_info", human_message.content, response.content)
+        
+        # Return only this node's updates; the graph appends them to the state
+        return {
+            "hr_notes": ["Employee information validated for {}".format(employee.name)],
+            "messages": [
+                {"role": "user", "content": str(formatted_prompt)},
+                {"role": "assistant", "content": response.content}
+            ],
+            "memory": {"validation": onboarding_memory.validation_facts(response.content)}
+        }
     except Exception as e:
         print("Error in collect_employee_info node: {}".format(e))
         import traceback
@@ -164,21 +253,9 @@ def determine_equipment_access(state):
             
         employee = state["employee"]
         print("DEBUG Node 2 - Employee: {}".format(employee.name))
-        messages = state.get("messages", [])
         
-        # Create a prompt for the LLM
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", "You are an IT specialist helping with employee onboarding. "
-                      "Determine appropriate equipment and system access based on the role. "
-                      "Your response MUST be valid JSON with double quotes, containing ONLY 'equipment_needs' and 'system_access' lists "
-                      "with no additional text before or after the JSON."),
-            ("user", "Based on the following employee information, list required equipment and system access:\n"
-                    "Employee Name: {name}\n"
-                    "Position: {position}\n"
-                    "Department: {department}\n"
-                    "Respond with ONLY a JSON object with 'equipment_needs' and 'system_access' as lists. "
-                    "Do not include any explanations or text outside the JSON.")
-        ])
+        # Prompt templates are built once at import
+        prompt = EQUIPMENT_PROMPT
         
         # Format the prompt with employee info
         formatted_prompt = prompt.format(
@@ -187,85 +264,67 @@ def determine_equipment_access(state):
             department=employee.department
         )
         
-        # Define output parser for structured response
-        parser = JsonOutputParser()
-        
         # Initialize response with default values in case of failure
         response = {
-            "equipment_needs": ["Laptop", "Monitor", "Keyboard", "Mouse"],
-            "system_access": ["Email", "Company Intranet", "Department Shared Drive"]
+            "equipment_needs": list(DEFAULT_EQUIPMENT_NEEDS),
+            "system_access": list(DEFAULT_SYSTEM_ACCESS)
         }
         
-        # Try to get response from LLM and parse
-        try:
-            # Get response from LLM and parse
-            chain = prompt | llm | parser
-            llm_response = chain.invoke({
-                "name": employee.name, 
-                "position": employee.position, 
+        # Hires with the same role profile get the same answer, so reuse it
+        cache_inputs = {"position": employee.position, "department": employee.department}
+        cached_response = llm_cache.get("determine_equipment_access", EQUIPMENT_PROMPT_VERSION, cache_inputs)
+        from_llm = False
+        if cached_response is not None:
+            response = cached_response
+        else:
+            # Parse or repair the first answer; the model is asked again only as a last resort
+            response_json = llm_parsing.invoke_json(get_llm(), prompt, {
+                "name": employee.name,
+                "position": employee.position,
                 "department": employee.department
-            })
-            
-            # Only update response if we got a valid result
-            if llm_response is not None:
-                response = llm_response
-            
-        except Exception as json_error:
-            # Fallback if JSON parsing fails
-            print(f"JSON parsing failed: {json_error}")
-            print("Using fallback approach to extract equipment and access requirements")
-            
-            # Get raw response from LLM
-            message = HumanMessage(content=str(formatted_prompt))
-            llm_response = llm.invoke([message])
-            content = llm_response.content
-            
-            # Try to extract JSON manually
-            import re
-            import json
-            
-            # Try to find JSON block
-            json_match = re.search(r'\{[\s\S]*\}', content)
-            if json_match:
-                json_str = json_match.group(0)
-                # Replace single quotes with double quotes
-                json_str = json_str.replace("'", '"')
-                
-                try:
-                    extracted_response = json.loads(json_str)
-                    print("Successfully extracted JSON using regex")
-                    if extracted_response is not None:
-                        response = extracted_response
-                except json.JSONDecodeError as e:
-                    print(f"Failed to parse extracted JSON: {e}")
-                    print("Using default equipment and access values")
+            }, "determine_equipment_access", workflow_registry.get("onboarding.equipment_chain"),
+                on_completion=onboarding_memory.token_recorder("determine_equipment_access", formatted_prompt))
+            if response_json is not None:
+                response = response_json
+                from_llm = True
             else:
-                print("No JSON found in response, using default values")
-        
-        # Update employee information
-        employee.equipment_needs = response.get("equipment_needs", [])
-        employee.system_access = response.get("system_access", [])
-        
-        # Store the interaction in memory
-        messages.append({"role": "user", "content": formatted_prompt.content})
-        messages.append({"role": "assistant", "content": str(response)})
-        
-        # Add notes
-        it_notes = state.get("it_notes", [])
-        it_notes.append("Equipment and access determined for {}".format(employee.name))
-        
-        # Return updated state with memory
-        new_state = copy.deepcopy(state)
-        new_state["employee"] = employee
-        new_state["it_notes"] = it_notes
-        new_state["messages"] = messages
-        return new_state
+                print("No usable JSON in the answers, using default values")
+
+        if from_llm:
+            llm_cache.put("determine_equipment_access", EQUIPMENT_PROMPT_VERSION, cache_inputs, response)
+
+        # This node runs in parallel with collect_employee_info, so the
+        # employee is not modified here; merge_onboarding_branches applies it
+        return {
+            "equipment": {
+                "equipment_needs": response.get("equipment_needs", []),
+                "system_access": response.get("system_access", [])
+            },
+            "it_notes": ["Equipment and access determined for {}".format(employee.name)],
+            "messages": [
+                {"role": "user", "content": str(formatted_prompt)},
+                {"role": "assistant", "content": str(response)}
+            ],
+            "memory": {"equipment": {
+                "equipment_needs": response.get("equipment_needs", []),
+                "system_access": response.get("system_access", [])
+            }}
+        }
     except Exception as e:
         print("Error in determine_equipment_access node: {}".format(e))
         import traceback
         traceback.print_exc()
         raise
 
+# Join: merge the parallel branches
+def merge_onboarding_branches(state):
+    """Apply the equipment branch's results to the employee once both branches are done"""
+    employee = copy.copy(state["employee"])
+    equipment = state.get("equipment") or {}
+    employee.equipment_needs = equipment.get("equipment_needs", [])
+    employee.system_access = equipment.get("system_access", [])
+    return {"employee": employee}
+
 # Node 3: Create training plan
 def create_training_plan(state):
     """Create personalized training plan for the new employee"""
@@ -276,30 +335,14 @@ def create_training_plan(state):
             print("Current state keys:", state.keys())
             raise KeyError("'employee' key missing from state")
             
-        employee = state["employee"]
+        employee = copy.copy(state["employee"])
         print("DEBUG Node 3 - Employee: {}".format(employee.name))
-        messages = state.get("messages", [])
         
-        # Use message history for context
-        conversation_history = "\n".join(["{}:{}".format(msg['role'], msg['content']) for msg in messages[-4:]])
+        # Compact facts from the earlier steps instead of their full prompts and answers
+        conversation_history = onboarding_memory.render_context(state.get("memory"))
         
-        # Create a prompt for the LLM
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", "You are a training coordinator helping with employee onboarding. "
-                      "Create a training plan for the new employee. "
-                      "Your response MUST be valid JSON with double quotes, containing ONLY a 'training_requirements' list "
-                      "with no additional text before or after the JSON."),
-            ("user", "Based on the following employee information and previous onboarding steps, "
-                    "determine appropriate training requirements:\n"
-                    "Employee Name: {name}\n"
-                    "Position: {position}\n"
-                    "Department: {department}\n"
-                    "Equipment: {equipment}\n"
-                    "System Access: {access}\n\n"
-                    "Context from previous steps:\n{context}\n\n"
-                    "Return ONLY a JSON object with only a 'training_requirements' key containing an array of strings. "
-                    "Do not include any explanations or text outside the JSON.")
-        ])
+        # Prompt templates are built once at import
+        prompt = TRAINING_PROMPT
         
         # Format the prompt with employee info and context
         formatted_prompt = prompt.format(
@@ -311,96 +354,59 @@ def create_training_plan(state):
             context=conversation_history
         )
         
-        # Define output parser
-        parser = JsonOutputParser()
-        
         # Initialize response with default values in case of failure
-        response = {
-            "training_requirements": [
-                "Company Orientation",
-                "Department Introduction",
-                "System Training",
-                "Role-specific Training",
-                "Equipment Training"
-            ]
+        response = {"training_requirements": list(DEFAULT_TRAINING_REQUIREMENTS)}
+        
+        # Hires with the same role profile get the same answer, so reuse it
+        cache_inputs = {
+            "position": employee.position,
+            "department": employee.department,
+            "equipment": employee.equipment_needs,
+            "access": employee.system_access
         }
-        
-        # Try to get response from LLM and parse
-        try:
-            # Get response from LLM and parse
-            chain = prompt | llm | parser
-            llm_response = chain.invoke({
-                "name": employee.name, 
-                "position": employee.position, 
+        cached_response = llm_cache.get("create_training_plan", TRAINING_PROMPT_VERSION, cache_inputs)
+        from_llm = False
+        if cached_response is not None:
+            response = cached_response
+        else:
+            # Parse or repair the first answer; the model is asked again only as a last resort
+            response_json = llm_parsing.invoke_json(get_llm(), prompt, {
+                "name": employee.name,
+                "position": employee.position,
                 "department": employee.department,
                 "equipment": employee.equipment_needs,
                 "access": employee.system_access,
                 "context": conversation_history
-            })
-            
-            # Only update response if we got a valid result
-            if llm_response is not None:
-                response = llm_response
-            
-        except Exception as json_error:
-            # Fallback if JSON parsing fails
-            print(f"JSON parsing failed: {json_error}")
-            print("Using fallback approach to extract training requirements")
-            
-            # Get raw response from LLM
-            message = HumanMessage(content=str(formatted_prompt))
-            llm_response = llm.invoke([message])
-            content = llm_response.content
-            
-            # Try to extract JSON manually
-            import re
-            import json
-            
-            # Try to find JSON block
-            json_match = re.search(r'\{[\s\S]*\}', content)
-            if json_match:
-                json_str = json_match.group(0)
-                # Replace single quotes with double quotes
-                json_str = json_str.replace("'", '"')
-                
-                try:
-                    extracted_response = json.loads(json_str)
-                    print("Successfully extracted JSON using regex")
-                    if extracted_response is not None:
-                        response = extracted_response
-                except json.JSONDecodeError as e:
-                    print(f"Failed to parse extracted JSON: {e}")
-                    print("Using default training requirements")
+            }, "create_training_plan", workflow_registry.get("onboarding.training_chain"),
+                on_completion=onboarding_memory.token_recorder("create_training_plan", formatted_prompt))
+            if response_json is not None:
+                response = response_json
+                from_llm = True
             else:
-                print("No JSON found in response, using default training requirements")
-        
+                print("No usable JSON in the answers, using default values")
+
+        if from_llm:
+            llm_cache.put("create_training_plan", TRAINING_PROMPT_VERSION, cache_inputs, response)
+
         # Update employee information
         employee.training_requirements = response.get("training_requirements", [])
         if not employee.training_requirements:
             # Fallback if somehow we're still empty
-            employee.training_requirements = [
-                "Company Orientation",
-                "Department Introduction",
-                "System Training"
-            ]
+            employee.training_requirements = list(DEFAULT_TRAINING_REQUIREMENTS)
         
         # Mark onboarding as completed
         employee.onboarding_status = "completed"
         
-        # Store the interaction in memory
-        messages.append({"role": "user", "content": formatted_prompt.content})
-        messages.append({"role": "assistant", "content": str(response)})
-        
-        # Add notes
-        hr_notes = state.get("hr_notes", [])
-        hr_notes.append("Training plan created for {}".format(employee.name))
-        
-        # Return updated state with memory
-        new_state = copy.deepcopy(state)
-        new_state["employee"] = employee
-        new_state["hr_notes"] = hr_notes
-        new_state["messages"] = messages
-        return new_state
+        # Return only this node's updates
+        return {
+            "employee": employee,
+            "hr_notes": ["Training plan created for {}".format(employee.name)],
+            "messages": [
+                {"role": "user", "content": str(formatted_prompt)},
+                {"role": "assistant", "content": str(response)}
+            ],
+            "memory": {"training": {"training_requirements": employee.training_requirements}}
+        }
     except Exception as e:
         print("Error in create_training_plan node: {}".format(e))
         import traceback
@@ -411,40 +417,60 @@ def create_training_plan(state):
 # Building the Workflow Graph
 #############################################
 
-def build_workflow():
+def build_workflow(checkpointer=None):
+    """
+    Build the onboarding graph. With a checkpointer (e.g. the SQLite one from
+    sqlite_checkpointer) every step is saved, and runs need a thread_id.
+    """
     try:
         # Create the workflow graph
-        workflow = StateGraph(State)
+        workflow = StateGraph(OnboardingState)
         
         # Add nodes to the graph
         workflow.add_node("collect_employee_info", collect_employee_info)
         workflow.add_node("determine_equipment_access", determine_equipment_access)
+        workflow.add_node("merge_onboarding_branches", merge_onboarding_branches)
         workflow.add_node("create_training_plan", create_training_plan)
         
-        # Define edges in the graph
-        workflow.add_edge("collect_employee_info", "determine_equipment_access")
-        workflow.add_edge("determine_equipment_access", "create_training_plan")
-        workflow.add_edge("create_training_plan", END)
+        # Validation and equipment/access do not depend on each other, so both
+        # start right away and run in parallel
+        workflow.add_edge(START, "collect_employee_info")
+        workflow.add_edge(START, "determine_equipment_access")
         
-        # Set the entry point
-        workflow.set_entry_point("collect_employee_info")
+        # The join waits for both branches before the training plan, which
+        # needs the equipment and the messages of both
+        workflow.add_edge(["collect_employee_info", "determine_equipment_access"], "merge_onboarding_branches")
+        workflow.add_edge("merge_onboarding_branches", "create_training_plan")
+        workflow.add_edge("create_training_plan", END)
         
         # Compile the graph with no special options for better compatibility
-        return workflow.compile()
+        return workflow.compile(checkpointer=checkpointer)
     except Exception as e:
         print("Error building workflow: {}".format(e))
         import traceback
         traceback.print_exc()
         raise
 
+# The shared graph saves its steps with the process's checkpointer
+workflow_registry.register("onboarding.graph",
+                           lambda: build_workflow(checkpointer=sqlite_checkpointer.get_checkpointer()))
+
+def get_workflow():
+    """Return the compiled workflow shared by this process (compiled on first use)"""
+    return workflow_registry.get("onboarding.graph")
+
+def warm_up():
+    """Build the compiled workflow and the LLM chains ahead of the first onboarding"""
+    return workflow_registry.warm_up(["llm", "onboarding.graph", "onboarding.equipment_chain", "onboarding.training_chain"])
+
 #############################################
 # Running the Workflow
 #############################################
 
 def run_workflow():
     try:
-        # Build the workflow
-        app = build_workflow()
+        # Get the compiled workflow
+        app = get_workflow()
         
         # Initialize the employee information
         initial_employee = EmployeeInfo(
@@ -461,7 +487,8 @@ def run_workflow():
             "employee": initial_employee,
             "hr_notes": [],
             "it_notes": [],
-            "messages": []
+            "messages": [],
+            "memory": {}
         }
         
         print("DEBUG: Initial state keys: {}".format(initial_state.keys()))
@@ -469,7 +496,9 @@ def run_workflow():
         
         # Run the workflow
         print("Starting HR onboarding workflow...\n")
-        result = app.invoke(initial_state)
+        thread_id = "onboarding_{}_{}".format(initial_employee.name.replace(" ", "_"), datetime.now().timestamp())
+        result = app.invoke(initial_state, {"configurable": {"thread_id": thread_id}})
+        sqlite_checkpointer.mark_finished(app.checkpointer, thread_id)
         
         # Print the results
         print("ONBOARDING WORKFLOW RESULTS\n")
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Employee ID Allocator
+
+Generates unique, time-ordered employee IDs that are safe to create from many
+threads and worker processes at once. Each ID packs:
+
+    41 bits  milliseconds since ID_EPOCH_MS
+    10 bits  worker id (one per process)
+    12 bits  sequence number within the millisecond
+
+so a single worker can hand out 4096 IDs per millisecond, and sorting IDs
+numerically sorts them by creation time.
+
+The worker id comes from HR_WORKER_ID when set. Otherwise each process claims
+a free slot by holding a lock file in data/worker_ids for its lifetime, so
+workers sharing the data directory never get the same slot.
+
+New IDs are 18-19 digit strings while legacy IDs (made from int(time.time()))
+have 10 digits, so IDs only sort by creation time when compared as integers;
+a plain string sort puts "1700000000" after "1000000000000000000". Sort with
+key=int (or CAST(id AS INTEGER) in SQL) wherever order matters.
+"""
+
+import os
+import time
+import threading
+from datetime import datetime, timezone
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Custom epoch (2024-01-01T00:00:00Z) keeps the IDs short
+ID_EPOCH_MS = 1704067200000
+
+WORKER_ID_BITS = 10
+SEQUENCE_BITS = 12
+MAX_WORKER_ID = (1 << WORKER_ID_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+
+WORKER_IDS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "worker_ids")
+
+# IDs below this value are legacy IDs made from int(time.time())
+LEGACY_ID_LIMIT = 10 ** 12
+
+# How far the clock may go backwards before next_id() gives up instead of
+# waiting for it to catch up
+MAX_CLOCK_SKEW_MS = 1000
+
+def current_ms():
+    """Milliseconds since ID_EPOCH_MS"""
+    return int(time.time() * 1000) - ID_EPOCH_MS
+
+def claim_worker_id():
+    """Claim a worker id for this process"""
+    if os.environ.get("HR_WORKER_ID"):
+        value = os.environ["HR_WORKER_ID"]
+        try:
+            worker_id = int(value)
+        except ValueError:
+            worker_id = -1
+        if not 0 <= worker_id <= MAX_WORKER_ID:
+            raise ValueError(f"HR_WORKER_ID must be an integer from 0 to {MAX_WORKER_ID}, got {value!r}")
+        return worker_id, None
+
+    if fcntl is not None:
+        os.makedirs(WORKER_IDS_DIR, exist_ok=True)
+        start = os.getpid() & MAX_WORKER_ID
+        for offset in range(MAX_WORKER_ID + 1):
+            worker_id = (start + offset) & MAX_WORKER_ID
+            lock_file = open(os.path.join(WORKER_IDS_DIR, f"{worker_id}.lock"), 'w')
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                continue
+            # Keep the file open: the lock is released when the process exits
+            return worker_id, lock_file
+        print("Warning: all worker id slots are taken, falling back to the process id")
+
+    return os.getpid() & MAX_WORKER_ID, None
+
+class IdAllocator(object):
+    """Thread-safe generator of time-ordered 63-bit IDs"""
+    def __init__(self, worker_id=None):
+        self.lock = threading.Lock()
+        self.worker_id = worker_id
+        self.worker_lock_file = None
+        self.last_ms = -1
+        self.sequence = 0
+
+    def next_id(self):
+        """Return the next ID as an int"""
+        with self.lock:
+            if self.worker_id is None:
+                self.worker_id, self.worker_lock_file = claim_worker_id()
+
+            now_ms = current_ms()
+            if now_ms < self.last_ms:
+                # The clock went backwards; keep counting from the last timestamp
+                now_ms = self.last_ms
+
+            if now_ms == self.last_ms:
+                self.sequence = (self.sequence + 1) & MAX_SEQUENCE
+                if self.sequence == 0:
+                    # Sequence exhausted for this millisecond, sleep until the next one
+                    now_ms = self.wait_for_next_ms()
+            else:
+                self.sequence = 0
+
+            self.last_ms = now_ms
+            return (now_ms << (WORKER_ID_BITS + SEQUENCE_BITS)) | (self.worker_id << SEQUENCE_BITS) | self.sequence
+
+    def wait_for_next_ms(self):
+        """Sleep until the clock passes last_ms and return the new time"""
+        while True:
+            now_ms = current_ms()
+            behind = self.last_ms - now_ms
+            if behind < 0:
+                return now_ms
+            if behind >= MAX_CLOCK_SKEW_MS:
+                raise RuntimeError(f"Clock moved backwards by {behind} ms, refusing to generate IDs")
+            time.sleep((behind + 1) / 1000.0)
+
+    def reset(self):
+        """Forget the worker id, e.g. in a forked child that must claim its own"""
+        self.lock = threading.Lock()
+        self.worker_id = None
+        self.worker_lock_file = None
+        self.last_ms = -1
+        self.sequence = 0
+
+ALLOCATOR = IdAllocator()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=ALLOCATOR.reset)
+
+def next_id():
+    """Return a new unique employee ID string"""
+    return str(ALLOCATOR.next_id())
+
+def id_timestamp(employee_id):
+    """Return the creation time encoded in an employee ID as a UTC datetime"""
+    value = int(employee_id)
+    if value < LEGACY_ID_LIMIT:
+        return datetime.fromtimestamp(value, tz=timezone.utc)
+    ms = (value >> (WORKER_ID_BITS + SEQUENCE_BITS)) + ID_EPOCH_MS
+    return datetime.fromtimestamp(ms / 1000.0, tz=timezone.utc)
+
+def id_bounds(start, end):
+    """
+    Return the (lowest, highest) IDs that can be created between two datetimes,
+    for range scans by creation time
+    """
+    shift = WORKER_ID_BITS + SEQUENCE_BITS
+    start_ms = max(int(start.timestamp() * 1000) - ID_EPOCH_MS, 0)
+    end_ms = max(int(end.timestamp() * 1000) - ID_EPOCH_MS, 0)
+    return start_ms << shift, ((end_ms + 1) << shift) - 1
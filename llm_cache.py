@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+LLM Response Cache for HR Workflow
+
+Caches the parsed LLM results of the onboarding nodes so that hires with the
+same role profile (e.g. "Software Engineer / Engineering") do not pay for the
+same Groq round trip again. Entries are keyed by node name, prompt template
+version and the normalized node inputs, kept in an in-memory LRU with a TTL,
+and persisted to data/llm_cache.json so they survive restarts.
+
+put() only updates memory and marks the cache dirty; a background timer
+writes the file at most every HR_LLM_CACHE_FLUSH_SECONDS, and once more at
+exit, so node calls (and the event loop in the async nodes) never wait on
+the disk. A crash loses at most the entries of the last interval.
+
+Several worker processes can share the file: a flush takes a lock on
+llm_cache.json.lock, merges the entries on disk with its own (the newest
+copy of a key wins, expired entries are dropped) and writes the result, so
+no worker overwrites the others' answers. Entries only another worker had
+are taken into memory as well.
+
+Configuration:
+    HR_LLM_CACHE=0             disable the cache
+    HR_LLM_CACHE_TTL           entry lifetime in seconds (default 7 days)
+    HR_LLM_CACHE_SIZE          maximum number of entries (default 1000)
+    HR_LLM_CACHE_PATH          cache file (default data/llm_cache.json)
+    HR_LLM_CACHE_FLUSH_SECONDS delay before new entries are written (default 2)
+
+Bump a node's prompt version whenever its prompt changes so stale answers are
+not served. Run "python llm_cache.py stats" or "python llm_cache.py clear".
+"""
+
+import os
+import sys
+import copy
+import json
+import time
+import atexit
+import hashlib
+import threading
+from collections import OrderedDict
+
+from data_store import DATA_DIR, FileLock, ensure_data_dir, atomic_write
+
+CACHE_ENABLED = os.environ.get("HR_LLM_CACHE", "1").lower() not in ("0", "false", "no")
+CACHE_TTL = float(os.environ.get("HR_LLM_CACHE_TTL", str(7 * 24 * 3600)))
+CACHE_SIZE = int(os.environ.get("HR_LLM_CACHE_SIZE", "1000"))
+CACHE_FILE = os.environ.get("HR_LLM_CACHE_PATH", os.path.join(DATA_DIR, "llm_cache.json"))
+CACHE_FLUSH_SECONDS = float(os.environ.get("HR_LLM_CACHE_FLUSH_SECONDS", "2"))
+
+def normalize_inputs(value):
+    """Normalize node inputs so trivially different spellings share a cache key"""
+    if isinstance(value, str):
+        return " ".join(value.split()).lower()
+    if isinstance(value, dict):
+        return {str(key): normalize_inputs(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = [normalize_inputs(item) for item in value]
+        if isinstance(value, (set, frozenset)):
+            items.sort(key=lambda item: json.dumps(item, sort_keys=True))
+        return items
+    return value
+
+def cache_key(node, prompt_version, inputs):
+    """Return the cache key for a node call"""
+    payload = json.dumps([node, str(prompt_version), normalize_inputs(inputs)], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class LLMCache(object):
+    """Thread-safe LRU cache with a TTL, persisted to a JSON file"""
+    def __init__(self, path=CACHE_FILE, max_entries=CACHE_SIZE, ttl=CACHE_TTL, enabled=CACHE_ENABLED,
+                 flush_seconds=CACHE_FLUSH_SECONDS):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.enabled = enabled
+        self.flush_seconds = flush_seconds
+        self.lock = threading.Lock()
+        # Keeps flushes in order so an older snapshot never overwrites a newer one
+        self.save_lock = threading.Lock()
+        self.dirty = False
+        # Set by clear(): the next flush replaces the file instead of merging with it
+        self.cleared = False
+        self.timer = None
+        self.exit_hook = False
+        self.entries = OrderedDict()  # key -> {"node", "value", "created"}, least recently used first
+        self.hits = 0
+        self.misses = 0
+        self.loaded = False
+
+    def read_file(self):
+        """Return the unexpired entries in the file as an OrderedDict, least recently used first"""
+        entries = OrderedDict()
+        if not self.path or not os.path.exists(self.path):
+            return entries
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"Ignoring unreadable LLM cache {self.path}: {e}")
+            return entries
+        now = time.time()
+        for key, entry in data.get("entries", []):
+            if now - entry.get("created", 0) < self.ttl:
+                entries[key] = entry
+        return entries
+
+    def load(self):
+        """Read the persisted entries, dropping expired ones (called lazily)"""
+        self.loaded = True
+        self.entries = self.read_file()
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        if self.entries:
+            print(f"Loaded {len(self.entries)} cached LLM responses from {self.path}")
+
+    def schedule_flush(self):
+        """Mark the entries dirty and arm the flush timer (caller holds self.lock)"""
+        self.dirty = True
+        if not self.path or self.timer is not None:
+            return
+        if not self.exit_hook:
+            atexit.register(self.flush)
+            self.exit_hook = True
+        self.timer = threading.Timer(self.flush_seconds, self.flush)
+        self.timer.daemon = True
+        self.timer.start()
+
+    def flush(self):
+        """Merge the entries into the file, under its lock, if they changed since the last write"""
+        with self.save_lock:
+            with self.lock:
+                self.timer = None
+                if not self.dirty or not self.path:
+                    return
+                self.dirty = False
+                cleared, self.cleared = self.cleared, False
+                # Entries are never modified in place, so a shallow copy is a consistent snapshot
+                entries = list(self.entries.items())
+            try:
+                ensure_data_dir()
+                with FileLock(self.path):
+                    merged = OrderedDict() if cleared else self.read_file()
+                    ours = dict(entries)
+                    on_disk_only = [key for key in merged if key not in ours]
+                    for key, entry in entries:
+                        other = merged.get(key)
+                        if other is None or entry["created"] >= other["created"]:
+                            merged[key] = entry
+                        merged.move_to_end(key)
+                    while len(merged) > self.max_entries:
+                        merged.popitem(last=False)
+                    atomic_write(self.path, json.dumps({"entries": list(merged.items())}))
+            except (IOError, OSError, TypeError) as e:
+                print(f"Error saving LLM cache: {e}")
+                with self.lock:
+                    # Try again with the next flush
+                    self.dirty = True
+                    self.cleared = self.cleared or cleared
+                return
+            with self.lock:
+                # Take in what other workers cached, as the least recently used
+                # entries, and their newer copies of keys we also had
+                for key in reversed(on_disk_only):
+                    if key in merged and key not in self.entries:
+                        self.entries[key] = merged[key]
+                        self.entries.move_to_end(key, last=False)
+                for key, entry in entries:
+                    newer = merged.get(key)
+                    if newer is not None and newer is not entry and self.entries.get(key) is entry:
+                        self.entries[key] = newer
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+
+    def get(self, node, prompt_version, inputs):
+        """Return the cached value for a node call, or None"""
+        if not self.enabled:
+            return None
+        key = cache_key(node, prompt_version, inputs)
+        with self.lock:
+            if not self.loaded:
+                self.load()
+            entry = self.entries.get(key)
+            if entry is not None and time.time() - entry["created"] >= self.ttl:
+                del self.entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+        print(f"LLM cache hit for {node}")
+        # Callers may modify the result, so never hand out the cached object
+        return copy.deepcopy(entry["value"])
+
+    def put(self, node, prompt_version, inputs, value):
+        """Store a JSON-serializable node result"""
+        if not self.enabled:
+            return
+        key = cache_key(node, prompt_version, inputs)
+        with self.lock:
+            if not self.loaded:
+                self.load()
+            self.entries[key] = {"node": node, "value": copy.deepcopy(value), "created": time.time()}
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            self.schedule_flush()
+
+    def clear(self):
+        """Drop every entry and reset the counters"""
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.loaded = True
+            self.dirty = True
+            self.cleared = True
+        self.flush()
+
+    def stats(self):
+        """Return hit/miss counters and the current size"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0
+            }
+
+CACHE = LLMCache()
+
+def get(node, prompt_version, inputs):
+    """Return the cached result for a node call, or None"""
+    return CACHE.get(node, prompt_version, inputs)
+
+def put(node, prompt_version, inputs, value):
+    """Cache the result of a node call"""
+    CACHE.put(node, prompt_version, inputs, value)
+
+def stats():
+    """Return the cache hit/miss counters"""
+    return CACHE.stats()
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "stats":
+        CACHE.load()
+        print(json.dumps(CACHE.stats(), indent=2))
+    elif len(sys.argv) >= 2 and sys.argv[1] == "clear":
+        CACHE.clear()
+        print(f"Cleared LLM cache {CACHE.path}")
+    else:
+        print("Usage: python llm_cache.py stats|clear")
+        sys.exit(1)
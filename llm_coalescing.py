@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+In-flight LLM Call Coalescer for HR Workflow
+
+When several onboardings for the same role arrive together, they all miss
+the response cache at once and every one of them sends the same prompt.
+A Coalescer sits in front of a prompt | llm chain: the first caller with a
+given key sends the request, and callers (threads or coroutines) that
+arrive with the same key while it is in flight wait for that answer
+instead of sending their own. Nothing is held back: a call with a new key
+goes out immediately, so there is no batching window to wait for.
+
+The key function is the same role profile the response cache uses, so the
+coalescer only shares answers the cache would share anyway.
+
+This replaces the earlier batching dispatcher. Groq's chat API has no
+multi-prompt request, so batches still went out as one request per prompt,
+and the window made onboardings slower (37/s against 39/s unbatched). The
+deduplication was the only part that saved calls, and it is what remains.
+
+Configuration:
+    HR_LLM_COALESCE           set to 1 to share in-flight JSON node calls (default off)
+"""
+
+import os
+import json
+import asyncio
+import threading
+from concurrent.futures import Future
+
+COALESCE_ENABLED = os.environ.get("HR_LLM_COALESCE", "0").lower() in ("1", "true", "yes")
+
+def default_key(inputs):
+    """Coalescing key: the complete inputs"""
+    return json.dumps(inputs, sort_keys=True, default=str)
+
+class Coalescer(object):
+    """Shares the answer of an in-flight invoke() with concurrent calls that have the same key"""
+    def __init__(self, runnable, name="llm", key=default_key):
+        self.runnable = runnable
+        self.name = name
+        self.key = key
+        self.lock = threading.Lock()
+        self.in_flight = {}  # key -> Future of the call being sent
+        self.counts = {"requests": 0, "sent": 0, "shared": 0}
+
+    def _join(self, inputs):
+        """Return (key, future, True) to send the call, or (key, future, False) to wait for it"""
+        try:
+            key = self.key(inputs)
+        except Exception:
+            key = default_key(inputs)
+        with self.lock:
+            self.counts["requests"] += 1
+            future = self.in_flight.get(key)
+            if future is not None:
+                self.counts["shared"] += 1
+                return key, future, False
+            future = Future()
+            self.in_flight[key] = future
+            self.counts["sent"] += 1
+            return key, future, True
+
+    def _finish(self, key, future, output=None, error=None):
+        """Stop sharing the call and hand its answer to everyone waiting"""
+        with self.lock:
+            del self.in_flight[key]
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(output)
+
+    def invoke(self, inputs, config=None, **kwargs):
+        """Same as runnable.invoke(inputs), shared with concurrent calls for the same key"""
+        key, future, send = self._join(inputs)
+        if not send:
+            return future.result()
+        try:
+            output = self.runnable.invoke(inputs, config, **kwargs)
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, output)
+        return output
+
+    async def ainvoke(self, inputs, config=None, **kwargs):
+        """Async version of invoke; the event loop is not blocked while waiting"""
+        key, future, send = self._join(inputs)
+        if not send:
+            return await asyncio.wrap_future(future)
+        try:
+            output = await self.runnable.ainvoke(inputs, config, **kwargs)
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, output)
+        return output
+
+    def stats(self):
+        """Calls received, calls actually sent and calls answered by one in flight"""
+        with self.lock:
+            counts = dict(self.counts)
+        counts["shared_rate"] = round(counts["shared"] / counts["requests"], 3) if counts["requests"] else 0.0
+        return counts
+
+_coalescers = {}
+_coalescers_lock = threading.Lock()
+
+def coalesced(runnable, name, key=default_key):
+    """Wrap runnable in a Coalescer when HR_LLM_COALESCE is on, else return it unchanged"""
+    if not COALESCE_ENABLED:
+        return runnable
+    coalescer = Coalescer(runnable, name=name, key=key)
+    with _coalescers_lock:
+        _coalescers[name] = coalescer
+    return coalescer
+
+def stats():
+    """Return {name: counters} for every coalescer created by coalesced()"""
+    with _coalescers_lock:
+        coalescers = dict(_coalescers)
+    return {"enabled": COALESCE_ENABLED,
+            "coalescers": {name: coalescer.stats() for name, coalescer in coalescers.items()}}
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Tolerant JSON parsing of LLM answers for HR Workflow
+
+The onboarding nodes ask the model for a JSON object, but answers often come
+back wrapped in prose or code fences, with single quotes, trailing commas,
+Python literals or a truncated tail. Instead of asking the model again, the
+raw first completion goes through parse_llm_json, which extracts and repairs
+the object. The model is re-queried only when that fails.
+
+Every outcome is counted per node so we can see how often repair saves a
+round trip:
+
+    parsed      the answer was valid JSON as-is
+    repaired    the object was extracted/repaired from the first answer
+    requeried   the first answer was unusable and the second one parsed
+    failed      neither answer gave an object; the node used its defaults
+"""
+
+import re
+import ast
+import json
+import threading
+
+FENCE_RE = re.compile(r"```(?:json|JSON)?\s*([\s\S]*?)```")
+TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+UNQUOTED_KEY_RE = re.compile(r'([{,]\s*)([A-Za-z_][A-Za-z0-9_ ]*?)\s*:')
+SMART_QUOTES = {"“": '"', "”": '"', "‘": "'", "’": "'"}
+CLOSERS = {"{": "}", "[": "]"}
+
+OUTCOMES = ("parsed", "repaired", "requeried", "failed")
+
+_lock = threading.Lock()
+_stats = {}
+
+def record(node, outcome):
+    """Count a parsing outcome for a node"""
+    with _lock:
+        counts = _stats.setdefault(node, dict.fromkeys(OUTCOMES, 0))
+        counts[outcome] += 1
+
+def stats():
+    """Return {node: {outcome: count}} plus totals and the share of saved round trips"""
+    with _lock:
+        nodes = {node: dict(counts) for node, counts in _stats.items()}
+    totals = dict.fromkeys(OUTCOMES, 0)
+    for counts in nodes.values():
+        for outcome, count in counts.items():
+            totals[outcome] += count
+    needed_repair = totals["repaired"] + totals["requeried"] + totals["failed"]
+    return {
+        "nodes": nodes,
+        "totals": totals,
+        "repair_success_rate": (totals["repaired"] / needed_repair) if needed_repair else 0.0
+    }
+
+def reset_stats():
+    """Clear the outcome counters"""
+    with _lock:
+        _stats.clear()
+
+def find_json_object(text):
+    """
+    Return the first {...} block in text, honoring strings. A block that is
+    cut off is closed with the missing quotes and brackets.
+    """
+    start = text.find("{")
+    if start < 0:
+        return None
+    stack = []
+    quote = None
+    escaped = False
+    for index in range(start, len(text)):
+        char = text[index]
+        if quote:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == quote:
+                quote = None
+        elif char in "\"'":
+            # An apostrophe inside a word is not a string delimiter
+            if char == "'" and index > 0 and text[index - 1].isalnum():
+                continue
+            quote = char
+        elif char in CLOSERS:
+            stack.append(CLOSERS[char])
+        elif char in "}]":
+            if stack and stack[-1] == char:
+                stack.pop()
+            if not stack:
+                return text[start:index + 1]
+    # Truncated answer: close whatever is still open
+    block = text[start:].rstrip().rstrip(",")
+    if quote:
+        block += quote
+    return block + "".join(reversed(stack))
+
+def _loads(candidate):
+    """Try strict JSON, then the common repairs; return a dict or None"""
+    attempts = [candidate]
+    cleaned = TRAILING_COMMA_RE.sub(r"\1", candidate)
+    attempts.append(cleaned)
+    attempts.append(UNQUOTED_KEY_RE.sub(r'\1"\2":', cleaned))
+    for attempt in attempts:
+        try:
+            value = json.loads(attempt)
+        except ValueError:
+            continue
+        if isinstance(value, dict):
+            return value
+    # Single quotes and True/False/None are valid Python literals
+    try:
+        value = ast.literal_eval(cleaned)
+        if isinstance(value, dict):
+            return value
+    except (ValueError, SyntaxError, MemoryError, RecursionError):
+        pass
+    # Last resort: the old blanket quote swap
+    try:
+        value = json.loads(cleaned.replace("'", '"'))
+        if isinstance(value, dict):
+            return value
+    except ValueError:
+        pass
+    return None
+
+def repair_json(content):
+    """Extract and repair a JSON object from a raw LLM answer; returns a dict or None"""
+    if not content:
+        return None
+    for wrong, right in SMART_QUOTES.items():
+        content = content.replace(wrong, right)
+    candidates = [match.group(1) for match in FENCE_RE.finditer(content)]
+    candidates.append(content)
+    for candidate in candidates:
+        block = find_json_object(candidate)
+        if block is None:
+            continue
+        value = _loads(block)
+        if value is not None:
+            return value
+    return None
+
+def parse_llm_json(content, node=None):
+    """
+    Parse the JSON object in a raw answer. Returns (value, outcome) where
+    outcome is "parsed", "repaired" or None when nothing usable was found.
+    Counts the outcome when node is given.
+    """
+    try:
+        value = json.loads(content)
+        if isinstance(value, dict):
+            if node:
+                record(node, "parsed")
+            return value, "parsed"
+    except (TypeError, ValueError):
+        pass
+    value = repair_json(content)
+    if value is not None:
+        if node:
+            record(node, "repaired")
+        print(f"Repaired JSON answer for {node or 'LLM call'} without re-querying")
+        return value, "repaired"
+    return None, None
+
+def _requery_message(prompt, inputs):
+    # Imported here so the API can import this module for its stats without langchain
+    from langchain_core.messages import HumanMessage
+    return [HumanMessage(content=str(prompt.format(**inputs)))]
+
+def invoke_json(llm, prompt, inputs, node, chain=None, on_completion=None):
+    """
+    Ask the model for a JSON object: parse or repair the first completion and
+    re-query only if that fails. Returns the dict, or None. Pass the prebuilt
+    prompt | llm chain as chain to avoid composing it on every call.
+    on_completion(content) is called with the raw text of every completion,
+    the re-query's included, e.g. for token accounting.
+    """
+    content = (chain or (prompt | llm)).invoke(inputs).content
+    if on_completion:
+        on_completion(content)
+    value, outcome = parse_llm_json(content, node)
+    if value is not None:
+        return value
+
+    print(f"Could not repair the JSON answer for {node}, asking the model again")
+    content = llm.invoke(_requery_message(prompt, inputs)).content
+    if on_completion:
+        on_completion(content)
+    value, outcome = parse_llm_json(content)
+    record(node, "requeried" if value is not None else "failed")
+    return value
+
+async def ainvoke_json(llm, prompt, inputs, node, chain=None, on_completion=None):
+    """Async version of invoke_json"""
+    content = (await (chain or (prompt | llm)).ainvoke(inputs)).content
+    if on_completion:
+        on_completion(content)
+    value, outcome = parse_llm_json(content, node)
+    if value is not None:
+        return value
+
+    print(f"Could not repair the JSON answer for {node}, asking the model again")
+    content = (await llm.ainvoke(_requery_message(prompt, inputs))).content
+    if on_completion:
+        on_completion(content)
+    value, outcome = parse_llm_json(content)
+    record(node, "requeried" if value is not None else "failed")
+    return value
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Onboarding Progress Events for HR Workflow
+
+The onboarding job queue and the workflow nodes publish what happens to a
+job as it happens: the job's status changes (queued, running, done, failed)
+and every node's start and finish, with its duration and partial result.
+GET /api/onboarding/<job id>/events streams them to the browser as
+Server-Sent Events, so the page can show the equipment while the training
+plan is still being written instead of polling the job.
+
+Every event gets an id (1, 2, ...) within its job. A client that reconnects
+with Last-Event-ID gets only the events it missed. Events of finished jobs
+are kept for HR_ONBOARDING_EVENTS_KEEP jobs so a late subscriber still sees
+the whole run.
+
+Events are kept in memory in the process that runs the job. With several
+server processes a stream may be unknown to the process serving it; the
+endpoint then sends the job's current status once and clients fall back to
+polling /api/onboarding-jobs/<job id>.
+
+Configuration:
+    HR_ONBOARDING_EVENTS_KEEP         finished jobs whose events are kept (default 200)
+    HR_ONBOARDING_EVENTS_KEEPALIVE    seconds between keep-alive comments (default 15)
+"""
+
+import os
+import json
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+EVENTS_KEEP = int(os.environ.get("HR_ONBOARDING_EVENTS_KEEP", "200"))
+EVENTS_KEEPALIVE = float(os.environ.get("HR_ONBOARDING_EVENTS_KEEPALIVE", "15"))
+
+# Events after which nothing more is published for a job
+FINAL_EVENTS = ("done", "failed")
+
+class EventStream(object):
+    """The events of one job, with a condition to wait for new ones"""
+    def __init__(self):
+        self.events = []
+        self.closed = False
+        self.condition = threading.Condition()
+
+class EventBroker(object):
+    """Keeps the event streams of recent jobs and lets clients follow them"""
+    def __init__(self, keep=EVENTS_KEEP):
+        self.keep = keep
+        self.lock = threading.Lock()
+        self.streams = OrderedDict()  # job id -> EventStream, oldest first
+
+    def _stream(self, stream_id, create=False):
+        with self.lock:
+            stream = self.streams.get(stream_id)
+            if stream is None and create:
+                stream = self.streams[stream_id] = EventStream()
+                # Forget the oldest finished jobs
+                closed = [key for key, item in self.streams.items() if item.closed]
+                for key in closed[:max(len(closed) - self.keep, 0)]:
+                    del self.streams[key]
+            return stream
+
+    def publish(self, stream_id, event, data=None):
+        """Add an event to a job's stream; done and failed close it"""
+        stream = self._stream(stream_id, create=True)
+        with stream.condition:
+            if stream.closed:
+                return None
+            item = {"id": len(stream.events) + 1, "event": event, "time": datetime.now().isoformat(),
+                    "data": data or {}}
+            stream.events.append(item)
+            stream.closed = event in FINAL_EVENTS
+            stream.condition.notify_all()
+        return item
+
+    def has_stream(self, stream_id):
+        """True if events are known for the job"""
+        return self._stream(stream_id) is not None
+
+    def follow(self, stream_id, after=0, keepalive=EVENTS_KEEPALIVE):
+        """
+        Yield the job's events after id `after`, waiting for new ones until
+        the stream closes; yields None every keepalive seconds without events
+        """
+        stream = self._stream(stream_id)
+        if stream is None:
+            return
+        while True:
+            with stream.condition:
+                if len(stream.events) <= after and not stream.closed:
+                    stream.condition.wait(keepalive)
+                pending = stream.events[after:]
+                closed = stream.closed
+            if not pending and not closed:
+                yield None
+                continue
+            for item in pending:
+                yield item
+            after += len(pending)
+            if closed:
+                return
+
+BROKER = EventBroker()
+
+def publish(stream_id, event, data=None):
+    """Publish an event on the shared broker"""
+    return BROKER.publish(stream_id, event, data)
+
+def has_stream(stream_id):
+    """Check the shared broker for a job's events"""
+    return BROKER.has_stream(stream_id)
+
+def follow(stream_id, after=0):
+    """Follow a job's events on the shared broker"""
+    return BROKER.follow(stream_id, after)
+
+def publisher(stream_id):
+    """Return an on_event(event, data) callback that publishes to the job's stream"""
+    return lambda event, data=None: publish(stream_id, event, data)
+
+def format_sse(item):
+    """Format an event (None: a keep-alive comment) as a Server-Sent Events message"""
+    if item is None:
+        return ": keep-alive\n\n"
+    data = dict(item["data"], time=item["time"])
+    return "id: {}\nevent: {}\ndata: {}\n\n".format(item["id"], item["event"], json.dumps(data, default=str))
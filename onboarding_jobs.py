@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""
+Onboarding Job Queue for HR Workflow
+
+Runs onboarding workflows in a bounded pool of background worker threads so
+that /api/start-onboarding can answer 202 Accepted right away instead of
+holding the request open for every LLM call. Each job moves through
+queued -> running -> done | failed, with timestamps and timings. Every
+transition, and the progress the handler reports, is published to the
+job's event stream (onboarding_events).
+
+Jobs are rows in a SQLite database (data/onboarding_jobs.db, WAL mode), so
+a transition writes one row instead of the whole job list, and several
+server processes can share the queue. A worker claims a job with a single
+UPDATE that only matches a queued job it owns, so each job runs once.
+
+Each queue holds a lease (a locked file in data/onboarding_workers) for as
+long as its process lives, and records it as the owner of the jobs it
+queues. On start, and every HR_ONBOARDING_RECOVERY_SECONDS while it runs,
+the queue takes over queued or running jobs whose owner's lease is no
+longer held (the process stopped) and queues them again, and drops the
+oldest finished jobs. Jobs of live processes are left to them.
+
+Configuration:
+    HR_ONBOARDING_WORKERS            worker threads (default 4)
+    HR_ONBOARDING_QUEUE_SIZE         maximum queued jobs before submit is refused (default 100)
+    HR_ONBOARDING_JOBS_KEEP          finished jobs kept in the database (default 500)
+    HR_ONBOARDING_JOBS_PATH          database file (default data/onboarding_jobs.db)
+    HR_ONBOARDING_RECOVERY_SECONDS   how often to recover jobs of stopped processes (default 30)
+
+Unfinished jobs in a data/onboarding_jobs.json file written by earlier
+versions are imported once, and the file is renamed to
+onboarding_jobs.json.imported.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+import traceback
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import id_allocator
+import onboarding_events
+from data_store import DATA_DIR
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+JOB_WORKERS = int(os.environ.get("HR_ONBOARDING_WORKERS", "4"))
+JOB_QUEUE_SIZE = int(os.environ.get("HR_ONBOARDING_QUEUE_SIZE", "100"))
+JOBS_KEEP = int(os.environ.get("HR_ONBOARDING_JOBS_KEEP", "500"))
+JOBS_DB = os.environ.get("HR_ONBOARDING_JOBS_PATH", os.path.join(DATA_DIR, "onboarding_jobs.db"))
+RECOVERY_SECONDS = float(os.environ.get("HR_ONBOARDING_RECOVERY_SECONDS", "30"))
+LEGACY_JOBS_FILE = os.path.join(DATA_DIR, "onboarding_jobs.json")
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+# Columns of the jobs table, in order; data and result hold JSON
+JOB_FIELDS = ["id", "employee_id", "employee_name", "status", "owner", "attempts", "data",
+              "created_at", "started_at", "finished_at", "queued_seconds", "run_seconds", "result", "error"]
+JSON_FIELDS = ("data", "result")
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS jobs (
+        id TEXT PRIMARY KEY,
+        employee_id TEXT,
+        employee_name TEXT,
+        status TEXT NOT NULL,
+        owner TEXT,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        data TEXT,
+        created_at TEXT,
+        started_at TEXT,
+        finished_at TEXT,
+        queued_seconds REAL,
+        run_seconds REAL,
+        result TEXT,
+        error TEXT
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_jobs_status_owner ON jobs (status, owner)",
+]
+
+class QueueFullError(Exception):
+    """Raised when the queue already holds JOB_QUEUE_SIZE waiting jobs"""
+    pass
+
+def row_to_job(row):
+    job = dict(zip(JOB_FIELDS, row))
+    for field in JSON_FIELDS:
+        if job[field] is not None:
+            job[field] = json.loads(job[field])
+    return job
+
+class JobQueue(object):
+    """Bounded background worker pool with job state shared through a SQLite database"""
+    def __init__(self, path=JOBS_DB, workers=JOB_WORKERS, max_queued=JOB_QUEUE_SIZE, keep=JOBS_KEEP,
+                 recovery_seconds=RECOVERY_SECONDS):
+        self.path = path
+        self.workers = workers
+        self.max_queued = max_queued
+        self.keep = keep
+        self.recovery_seconds = recovery_seconds
+        self.lock = threading.RLock()
+        self.leases_dir = os.path.join(os.path.dirname(path), "onboarding_workers")
+        self.local = threading.local()
+        self.owner = None
+        self.lease = None
+        self.handler = None
+        self.executor = None
+        self.stopping = threading.Event()
+        self.maintainer = None
+
+    def connection(self):
+        """Return the calling thread's connection to the jobs database, creating the schema on first use"""
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            # Autocommit mode: transaction() issues BEGIN IMMEDIATE itself
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            for statement in SCHEMA:
+                conn.execute(statement)
+            self.local.conn = conn
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """Yield a connection inside a write transaction that other processes wait for"""
+        conn = self.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def start(self, handler):
+        """
+        Start the workers (once), requeue jobs interrupted by a stopped process
+        and keep doing so in the background.
+        handler(job_data, employee_id, on_event) runs one onboarding and returns
+        its result; on_event(event, data) publishes progress to the job's stream.
+        """
+        with self.lock:
+            if self.executor is not None:
+                return
+            self.handler = handler
+            self.take_lease()
+            self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="onboarding-job")
+            if self.path == JOBS_DB and os.path.exists(LEGACY_JOBS_FILE):
+                self.import_json(LEGACY_JOBS_FILE)
+            self.recover()
+            self.prune()
+            if self.recovery_seconds > 0:
+                self.maintainer = threading.Thread(target=self.maintain, name="onboarding-job-recovery", daemon=True)
+                self.maintainer.start()
+
+    def stop(self):
+        """Stop the recovery thread and wait for running jobs"""
+        self.stopping.set()
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+
+    def maintain(self):
+        """Background loop: recover jobs of stopped processes and drop old finished jobs"""
+        while not self.stopping.wait(self.recovery_seconds):
+            try:
+                self.recover()
+                self.prune()
+            except sqlite3.Error as e:
+                print(f"Error recovering onboarding jobs: {e}")
+
+    def take_lease(self):
+        """Hold this queue's lease file for the life of the process (caller holds self.lock)"""
+        self.owner = id_allocator.next_id()
+        if fcntl is None:
+            return
+        os.makedirs(self.leases_dir, exist_ok=True)
+        path = os.path.join(self.leases_dir, f"{self.owner}.lock")
+        while True:
+            fd = os.open(path, os.O_CREAT | os.O_RDWR, 0o644)
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            # Another process's sweep may have removed the file between the
+            # open and the lock; only a lock on the file at the path counts
+            try:
+                if os.stat(path).st_ino == os.fstat(fd).st_ino:
+                    break
+            except FileNotFoundError:
+                pass
+            os.close(fd)
+        self.lease = fd
+        # Clear away the leases of stopped processes
+        for name in os.listdir(self.leases_dir):
+            if name.endswith(".lock"):
+                self.owner_alive(name[:-len(".lock")])
+
+    def owner_alive(self, owner):
+        """True if the queue that owns a job is still running; removes a stopped owner's lease"""
+        if owner is None:
+            return False
+        if owner == self.owner:
+            return True
+        if fcntl is None:
+            # Without leases there is only this process
+            return False
+        path = os.path.join(self.leases_dir, f"{owner}.lock")
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            return False
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return True
+        try:
+            # Remove the file only if it is still the one we locked
+            if os.stat(path).st_ino == os.fstat(fd).st_ino:
+                os.remove(path)
+        except FileNotFoundError:
+            pass
+        finally:
+            os.close(fd)
+        return False
+
+    def recover(self):
+        """Take over and requeue the unfinished jobs of stopped processes"""
+        conn = self.connection()
+        owners = [row[0] for row in conn.execute(
+            "SELECT DISTINCT owner FROM jobs WHERE status IN (?, ?)", (QUEUED, RUNNING))]
+        dead = [owner for owner in owners if not self.owner_alive(owner)]
+        if not dead:
+            return []
+        recovered = []
+        with self.transaction() as conn:
+            for owner in dead:
+                where = "status IN (?, ?) AND owner IS ?"
+                params = (QUEUED, RUNNING, owner)
+                recovered += [row[0] for row in conn.execute(f"SELECT id FROM jobs WHERE {where}", params)]
+                conn.execute(f"UPDATE jobs SET status = ?, owner = ? WHERE {where}", (QUEUED, self.owner) + params)
+        for job_id in recovered:
+            onboarding_events.publish(job_id, QUEUED, {"status": QUEUED, "recovered": True})
+            self.executor.submit(self.run, job_id)
+        if recovered:
+            print(f"Requeued {len(recovered)} unfinished onboarding jobs")
+        return recovered
+
+    def prune(self):
+        """Delete all but the newest `keep` finished jobs"""
+        with self.transaction() as conn:
+            cursor = conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND rowid NOT IN "
+                "(SELECT rowid FROM jobs WHERE status IN (?, ?) ORDER BY rowid DESC LIMIT ?)",
+                (DONE, FAILED, DONE, FAILED, self.keep))
+        return cursor.rowcount
+
+    def import_json(self, path):
+        """Import the jobs from a JSON state file written by earlier versions"""
+        try:
+            with open(path, 'r') as f:
+                jobs = json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"Error importing onboarding jobs from {path}: {e}")
+            return
+        with self.transaction() as conn:
+            for job in jobs:
+                self.insert(conn, job, "INSERT OR IGNORE")
+        os.replace(path, path + ".imported")
+        print(f"Imported {len(jobs)} onboarding jobs from {path}")
+
+    def insert(self, conn, job, verb="INSERT"):
+        values = [json.dumps(job.get(field)) if field in JSON_FIELDS else job.get(field) for field in JOB_FIELDS]
+        conn.execute(f"{verb} INTO jobs ({', '.join(JOB_FIELDS)}) VALUES ({', '.join('?' for _ in JOB_FIELDS)})",
+                     values)
+
+    def submit(self, job_data, employee_id):
+        """Queue an onboarding job and return a copy of it"""
+        if self.executor is None:
+            raise RuntimeError("Onboarding job queue has not been started")
+        job = {
+            "id": id_allocator.next_id(),
+            "employee_id": employee_id,
+            "employee_name": job_data.get("name", ""),
+            "status": QUEUED,
+            "owner": self.owner,
+            "attempts": 0,
+            "data": job_data,
+            "created_at": datetime.now().isoformat(),
+            "started_at": None,
+            "finished_at": None,
+            "queued_seconds": None,
+            "run_seconds": None,
+            "result": None,
+            "error": None
+        }
+        with self.transaction() as conn:
+            queued = conn.execute("SELECT COUNT(*) FROM jobs WHERE status = ?", (QUEUED,)).fetchone()[0]
+            if queued >= self.max_queued:
+                raise QueueFullError(f"{queued} onboarding jobs are already waiting")
+            self.insert(conn, job)
+        onboarding_events.publish(job["id"], QUEUED, {"status": QUEUED})
+        self.executor.submit(self.run, job["id"])
+        print(f"Queued onboarding job {job['id']} for {job['employee_name']}")
+        return dict(job)
+
+    def run(self, job_id):
+        """Worker body: claim one job, run it and record the outcome"""
+        with self.transaction() as conn:
+            row = conn.execute(f"SELECT {', '.join(JOB_FIELDS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            job = row_to_job(row) if row is not None else None
+            if job is None or job["status"] != QUEUED or job["owner"] != self.owner:
+                # Already claimed, or taken over by another process
+                return
+            job["started_at"] = datetime.now().isoformat()
+            job["queued_seconds"] = round(time.time() - datetime.fromisoformat(job["created_at"]).timestamp(), 3)
+            conn.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, started_at = ?, queued_seconds = ? "
+                "WHERE id = ? AND status = ? AND owner = ?",
+                (RUNNING, job["started_at"], job["queued_seconds"], job_id, QUEUED, self.owner))
+        onboarding_events.publish(job_id, RUNNING, {"status": RUNNING, "queued_seconds": job["queued_seconds"]})
+
+        started = time.time()
+        try:
+            result = self.handler(job["data"], job["employee_id"], onboarding_events.publisher(job_id))
+            status, error = DONE, None
+        except Exception as e:
+            print(f"Onboarding job {job_id} failed: {e}")
+            traceback.print_exc()
+            result, status, error = None, FAILED, str(e)
+
+        run_seconds = round(time.time() - started, 3)
+        try:
+            encoded = json.dumps(result)
+        except (TypeError, ValueError) as e:
+            encoded, status, error = None, FAILED, f"Result is not JSON serializable: {e}"
+        with self.transaction() as conn:
+            conn.execute("UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, run_seconds = ? "
+                         "WHERE id = ?",
+                         (status, encoded, error, datetime.now().isoformat(), run_seconds, job_id))
+        # The final event closes the stream
+        onboarding_events.publish(job_id, status, {"status": status, "run_seconds": run_seconds,
+                                                   "result": result, "error": error})
+        print(f"Onboarding job {job_id} {status} in {run_seconds}s")
+
+    def get(self, job_id):
+        """Return a copy of a job without its input data, or None; sees jobs of every process"""
+        fields = [field for field in JOB_FIELDS if field != "data"]
+        row = self.connection().execute(f"SELECT {', '.join(fields)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(zip(fields, row))
+        if job["result"] is not None:
+            job["result"] = json.loads(job["result"])
+        return job
+
+JOB_QUEUE = JobQueue()
+
+def start(handler):
+    """Start the shared job queue"""
+    JOB_QUEUE.start(handler)
+
+def submit(job_data, employee_id):
+    """Queue an onboarding job on the shared queue"""
+    return JOB_QUEUE.submit(job_data, employee_id)
+
+def get_job(job_id):
+    """Look up a job on the shared queue"""
+    return JOB_QUEUE.get(job_id)
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Onboarding Memory for HR Workflow
+
+The training-plan prompt used to get its context from the last four
+messages, i.e. the full formatted prompts and raw answers of the earlier
+nodes. Instead, each node now records a few compact facts about its step
+(validation outcome, equipment, system access) in the state's "memory"
+field, and render_context turns those facts into a short context with a
+fixed size limit for later prompts.
+
+Token counts are recorded per node so we can see the effect on prompt size.
+They are estimates (about four characters per token, the usual rule of
+thumb for English and close enough for Llama 3), because the real tokenizer
+is not available offline.
+
+Configuration:
+    HR_MEMORY_MAX_CHARS     size limit of the rendered context (default 600)
+    HR_MEMORY_MAX_ITEMS     list items shown per fact before "+N more" (default 8)
+"""
+
+import os
+import threading
+
+MEMORY_MAX_CHARS = int(os.environ.get("HR_MEMORY_MAX_CHARS", "600"))
+MEMORY_MAX_ITEMS = int(os.environ.get("HR_MEMORY_MAX_ITEMS", "8"))
+SUMMARY_MAX_CHARS = 160
+
+# Steps in the order they are rendered, with their labels
+STEP_LABELS = [
+    ("validation", "Validation"),
+    ("equipment", "Equipment"),
+    ("training", "Training"),
+]
+FACT_LABELS = {
+    "outcome": "outcome",
+    "summary": "summary",
+    "equipment_needs": "needs",
+    "system_access": "system access",
+    "training_requirements": "plan",
+}
+
+def merge_memory(left, right):
+    """Reducer: add or replace the facts of the steps in a node's update"""
+    merged = dict(left or {})
+    merged.update(right or {})
+    return merged
+
+def summarize(text, limit=SUMMARY_MAX_CHARS):
+    """First sentence of a free-text answer, cut to limit characters"""
+    text = " ".join(str(text or "").split())
+    for end in (". ", "! ", "? "):
+        index = text.find(end)
+        if 0 < index < limit:
+            return text[:index + 1]
+    return text if len(text) <= limit else text[:limit - 3].rstrip() + "..."
+
+def validation_facts(answer):
+    """Facts for the validation step from the model's free-text answer"""
+    lowered = str(answer or "").lower()
+    issues = any(word in lowered for word in ("missing", "invalid", "incorrect", "unclear", "inconsistent"))
+    if "no missing" in lowered or "nothing missing" in lowered:
+        issues = False
+    return {"outcome": "needs review" if issues else "ok", "summary": summarize(answer)}
+
+def _render_value(value):
+    if isinstance(value, (list, tuple)):
+        items = [str(item) for item in value]
+        shown = ", ".join(items[:MEMORY_MAX_ITEMS])
+        if len(items) > MEMORY_MAX_ITEMS:
+            shown += " (+{} more)".format(len(items) - MEMORY_MAX_ITEMS)
+        return shown or "none"
+    return str(value)
+
+def render_context(memory, max_chars=None):
+    """Render the remembered facts as short lines, at most max_chars long"""
+    max_chars = MEMORY_MAX_CHARS if max_chars is None else max_chars
+    memory = memory or {}
+    labels = dict(STEP_LABELS)
+    steps = [step for step, label in STEP_LABELS if step in memory]
+    steps += sorted(step for step in memory if step not in labels)
+
+    lines = []
+    used = 0
+    for step in steps:
+        for key, value in memory[step].items():
+            line = "{} {}: {}".format(labels.get(step, step.title()), FACT_LABELS.get(key, key), _render_value(value))
+            if used + len(line) + 1 > max_chars:
+                # Out of room: keep what fits of this line and stop
+                room = max_chars - used - 4
+                if room > 20:
+                    lines.append(line[:room] + "...")
+                return "\n".join(lines)
+            lines.append(line)
+            used += len(line) + 1
+    return "\n".join(lines)
+
+#############################################
+# Token accounting
+#############################################
+
+_lock = threading.Lock()
+_tokens = {}
+
+def count_tokens(text):
+    """Estimate the tokens in text (about four characters per token)"""
+    text = str(text or "")
+    return (len(text) + 3) // 4
+
+def record_tokens(node, prompt, completion):
+    """Count the prompt and completion tokens of one LLM call made by node"""
+    prompt_tokens = count_tokens(prompt)
+    completion_tokens = count_tokens(completion)
+    with _lock:
+        counts = _tokens.setdefault(node, {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0})
+        counts["calls"] += 1
+        counts["prompt_tokens"] += prompt_tokens
+        counts["completion_tokens"] += completion_tokens
+    return prompt_tokens
+
+def token_recorder(node, prompt):
+    """Return a callback that records one call of node with its raw completion text"""
+    return lambda completion: record_tokens(node, prompt, completion)
+
+def token_stats():
+    """Return {node: counts and per-call averages} plus totals"""
+    with _lock:
+        nodes = {node: dict(counts) for node, counts in _tokens.items()}
+    totals = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+    for counts in nodes.values():
+        for key in totals:
+            totals[key] += counts[key]
+        counts["avg_prompt_tokens"] = round(counts["prompt_tokens"] / counts["calls"], 1)
+        counts["avg_completion_tokens"] = round(counts["completion_tokens"] / counts["calls"], 1)
+    return {"nodes": nodes, "totals": totals}
+
+def reset_token_stats():
+    """Clear the token counters"""
+    with _lock:
+        _tokens.clear()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Onboarding Rules for HR Workflow
+
+Most hires are repeat roles, and data/workflows/ already holds what the
+workflow decided for them. This module mines those results into a rule
+table: for each role (position + department, normalized) the equipment,
+system access and training requirements that the past runs agree on,
+with a confidence score. The onboarding engine answers from the table
+when the confidence is high enough and calls the LLM only for roles it
+has not seen often or consistently enough.
+
+Mining (offline, e.g. nightly):
+
+    python onboarding_rules.py mine [--min-support 2]
+    python onboarding_rules.py show
+
+Every run has a weight: 1 for a result the LLM answered, and
+HR_RULES_CACHED_WEIGHT for one where any node was served from the LLM
+response cache. A cached answer repeats an earlier run, so it counts as
+partial evidence instead of an independent run; skipping those results
+would leave a role that is mostly served from the cache stuck at one run.
+Results answered from the rule table itself are skipped.
+
+Per role and field, the rule keeps the items that appear in at least half
+of the weighted runs, most frequent first. The field's agreement is the
+weighted average Jaccard similarity between each run and the rule, and its
+confidence is agreement * n / (n + 1) for a total weight n, so a single
+run scores at most 0.5 and the score approaches the agreement as runs
+accumulate. The rule's confidence is the lowest of its three fields.
+
+Older result files have no position/department; those are matched to the
+employee record through the id in the file name.
+
+The server reloads the table when the file changes, so a nightly mine takes
+effect without a restart.
+
+Configuration:
+    HR_RULES                   set to 0 to disable the fast path (default on)
+    HR_RULES_MIN_CONFIDENCE    confidence needed to skip the LLM (default 0.8)
+    HR_RULES_MIN_SUPPORT       weighted runs a role needs before it gets a rule (default 2)
+    HR_RULES_CACHED_WEIGHT     weight of a run served from the response cache (default 0.5)
+    HR_RULES_PATH              rule table (default data/onboarding_rules.json)
+"""
+
+import os
+import sys
+import json
+import glob
+import argparse
+import threading
+from collections import Counter
+from datetime import datetime
+
+import data_store
+from data_store import DATA_DIR, ensure_data_dir, atomic_write
+from llm_cache import normalize_inputs
+
+RULES_ENABLED = os.environ.get("HR_RULES", "1").lower() not in ("0", "false", "no")
+RULES_MIN_CONFIDENCE = float(os.environ.get("HR_RULES_MIN_CONFIDENCE", "0.8"))
+RULES_MIN_SUPPORT = float(os.environ.get("HR_RULES_MIN_SUPPORT", "2"))
+RULES_CACHED_WEIGHT = float(os.environ.get("HR_RULES_CACHED_WEIGHT", "0.5"))
+RULES_FILE = os.environ.get("HR_RULES_PATH", os.path.join(DATA_DIR, "onboarding_rules.json"))
+WORKFLOWS_DIR = os.path.join(DATA_DIR, "workflows")
+
+FIELDS = ("equipmentNeeds", "systemAccess", "trainingRequirements")
+
+def role_key(position, department):
+    """Normalized key of a role"""
+    return "{}|{}".format(normalize_inputs(position or ""), normalize_inputs(department or ""))
+
+#############################################
+# Mining
+#############################################
+
+def load_employee_roles():
+    """Return {employee id: (position, department)} from the configured storage backend"""
+    try:
+        employees = data_store.storage_backend().load_employees()
+    except Exception as e:
+        print(f"Could not read employees for role lookup: {e}")
+        return {}
+    return {str(employee.get("id")): (employee.get("position", ""), employee.get("department", ""))
+            for employee in employees if isinstance(employee, dict)}
+
+def load_results(workflows_dir=WORKFLOWS_DIR, employee_roles=None, cached_weight=RULES_CACHED_WEIGHT):
+    """
+    Yield (position, department, {field: [items]}, weight) for every
+    successful workflow result in workflows_dir not answered by the rules
+    """
+    if employee_roles is None:
+        employee_roles = load_employee_roles()
+    for path in sorted(glob.glob(os.path.join(workflows_dir, "workflow_*.json"))):
+        try:
+            with open(path, 'r') as f:
+                result = json.load(f)
+        except (IOError, ValueError) as e:
+            print(f"Skipping unreadable workflow result {path}: {e}")
+            continue
+        # Answers that came from the rule table would only reinforce it
+        if not isinstance(result, dict) or not result.get("success") or result.get("source") == "rules":
+            continue
+        employee = result.get("employee") if isinstance(result.get("employee"), dict) else result
+        position, department = employee.get("position"), employee.get("department")
+        if not position:
+            # Older results: workflow_<employee id>_<timestamp>.json
+            employee_id = os.path.basename(path).split("_")[1]
+            position, department = employee_roles.get(employee_id, (None, None))
+        if not position:
+            continue
+        answers = {field: [str(item) for item in employee.get(field) or []] for field in FIELDS}
+        if all(answers.values()):
+            # Answers served from the response cache repeat an earlier run of
+            # the same role, so they count for less than an independent run
+            yield position, department, answers, cached_weight if result.get("cachedNodes") else 1.0
+
+def _jaccard(left, right):
+    if not left and not right:
+        return 1.0
+    return len(left & right) / float(len(left | right))
+
+def mine_field(runs, weights=None):
+    """Return (items, agreement) for one field over a role's runs, each run weighted (default 1)"""
+    weights = weights or [1.0] * len(runs)
+    total = float(sum(weights))
+    counts = Counter()
+    first_seen = {}
+    for run, weight in zip(runs, weights):
+        for item in dict.fromkeys(run):
+            counts[item] += weight
+            first_seen.setdefault(item, len(first_seen))
+    # Items that at least half of the weighted runs include, most frequent first
+    items = [item for item in sorted(counts, key=lambda item: (-counts[item], first_seen[item]))
+             if counts[item] * 2 >= total]
+    chosen = set(items)
+    agreement = sum(weight * _jaccard(set(run), chosen) for run, weight in zip(runs, weights)) / total
+    return items, agreement
+
+def mine_rules(results, min_support=RULES_MIN_SUPPORT):
+    """Build the rule table from (position, department, answers, weight) results"""
+    roles = {}
+    for position, department, answers, weight in results:
+        role = roles.setdefault(role_key(position, department),
+                                {"position": position, "department": department, "runs": [], "weights": []})
+        role["runs"].append(answers)
+        role["weights"].append(weight)
+
+    rules = {}
+    for key, role in roles.items():
+        # Support is the total weight, so cache-served runs count for less
+        support = round(sum(role["weights"]), 3)
+        if support < min_support:
+            continue
+        rule = {"position": role["position"], "department": role["department"], "support": support,
+                "runs": len(role["runs"]), "field_confidence": {}}
+        for field in FIELDS:
+            items, agreement = mine_field([run[field] for run in role["runs"]], role["weights"])
+            rule[field] = items
+            rule["field_confidence"][field] = round(agreement * support / (support + 1.0), 3)
+        rule["confidence"] = min(rule["field_confidence"].values())
+        rules[key] = rule
+    return rules
+
+def mine(workflows_dir=WORKFLOWS_DIR, path=RULES_FILE, min_support=RULES_MIN_SUPPORT):
+    """Mine the workflow results and write the rule table; returns the table"""
+    results = list(load_results(workflows_dir))
+    table = {
+        "generated_at": datetime.now().isoformat(),
+        "results": len(results),
+        "min_support": min_support,
+        "rules": mine_rules(results, min_support)
+    }
+    ensure_data_dir()
+    atomic_write(path, json.dumps(table, indent=2))
+    print(f"Mined {len(table['rules'])} rules from {len(results)} workflow results into {path}")
+    return table
+
+#############################################
+# Fast path
+#############################################
+
+class RuleTable(object):
+    """The mined rules, loaded on first use and again when the file changes, with hit/miss counters"""
+    def __init__(self, path=RULES_FILE, min_confidence=RULES_MIN_CONFIDENCE, enabled=RULES_ENABLED):
+        self.path = path
+        self.min_confidence = min_confidence
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.rules = None
+        self.mtime = None
+        self.hits = 0
+        self.misses = 0
+
+    def file_mtime(self):
+        """Modification time of the rule table, or None when there is none"""
+        try:
+            return os.stat(self.path).st_mtime_ns if self.path else None
+        except OSError:
+            return None
+
+    def load(self):
+        """(Re)read the rule table; a missing table means no rules"""
+        rules = {}
+        mtime = self.file_mtime()
+        if mtime is not None:
+            try:
+                with open(self.path, 'r') as f:
+                    rules = json.load(f).get("rules", {})
+                print(f"Loaded {len(rules)} onboarding rules from {self.path}")
+            except (IOError, ValueError) as e:
+                print(f"Error loading onboarding rules: {e}")
+        with self.lock:
+            self.rules = rules
+            self.mtime = mtime
+
+    def lookup(self, position, department):
+        """Return the rule for a role if its confidence is high enough, else None"""
+        if not self.enabled:
+            return None
+        # A stat per lookup is cheap next to an onboarding, and picks up a fresh mine
+        if self.rules is None or self.file_mtime() != self.mtime:
+            self.load()
+        rule = self.rules.get(role_key(position, department))
+        with self.lock:
+            if rule is not None and rule["confidence"] >= self.min_confidence:
+                self.hits += 1
+                return rule
+            self.misses += 1
+        return None
+
+    def stats(self):
+        """Rule count and how often the fast path answered"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "rules": len(self.rules or {}),
+                "min_confidence": self.min_confidence,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0
+            }
+
+RULES = RuleTable()
+
+def lookup(position, department):
+    """Look up a confident rule for a role on the shared table"""
+    return RULES.lookup(position, department)
+
+def stats():
+    """Return the shared table's counters"""
+    return RULES.stats()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mine onboarding rules from workflow results")
+    parser.add_argument("command", choices=("mine", "show"))
+    parser.add_argument("--min-support", type=float, default=RULES_MIN_SUPPORT,
+                        help=f"Weighted runs a role needs before it gets a rule (default: {RULES_MIN_SUPPORT})")
+    args = parser.parse_args()
+
+    if args.command == "mine":
+        table = mine(min_support=args.min_support)
+    else:
+        if not os.path.exists(RULES_FILE):
+            print(f"No rule table at {RULES_FILE}; run: python onboarding_rules.py mine")
+            sys.exit(1)
+        with open(RULES_FILE, 'r') as f:
+            table = json.load(f)
+    for rule in sorted(table["rules"].values(), key=lambda rule: -rule["confidence"]):
+        fast = "fast path" if rule["confidence"] >= RULES_MIN_CONFIDENCE else "LLM"
+        print(f"  {rule['position']} / {rule['department']}: confidence {rule['confidence']:.2f} "
+              f"over {rule.get('runs', rule['support'])} runs, support {rule['support']} ({fast})")
@@ -4,359 +4,583 @@ Simplified HR Onboarding Workflow
 
 This script implements the HR workflow without the full complexity of LangGraph.
 It's a temporary solution to ensure we can get the frontend working.
+
+Nodes return partial updates that merge_update folds into the state, so
+the growing message history is shared between steps instead of copied.
+Each node also remembers a few facts about its step (onboarding_memory),
+and the training plan gets those as context instead of earlier prompts.
+
+With HR_LLM_COALESCE=1 concurrent JSON node calls that would share a cache
+entry are sent once, and the other callers wait for that answer
+(llm_coalescing).
+
+Roles with a confident rule in the mined rule table (onboarding_rules) are
+answered from it without calling the LLM.
+
+process_onboarding can report each node's start and finish, with its
+duration and partial result, to an on_event callback (see onboarding_events).
+
+Every node has an async twin (acollect_employee_info, ...) that awaits the
+LLM with ainvoke, and aprocess_onboarding runs them on the event loop, so one
+process can drive many onboardings concurrently.
 """
 
 import os
-import sys
 import copy
-from hr_onboarding_workflow import EmployeeInfo, llm, ChatPromptTemplate, JsonOutputParser, HumanMessage
+import time
+import llm_cache
+import llm_parsing
+import llm_coalescing
+import workflow_registry
+import onboarding_memory
+import onboarding_rules
+from workflow_state import History, merge_update
+from hr_onboarding_workflow import EmployeeInfo, get_llm, ChatPromptTemplate, HumanMessage
+# The node prompts, their cache versions and the fallback answers are shared
+# with the LangGraph engine, so cached answers mean the same in both
+from hr_onboarding_workflow import (VALIDATION_PROMPT, EQUIPMENT_PROMPT, TRAINING_PROMPT,
+                                    EQUIPMENT_PROMPT_VERSION, TRAINING_PROMPT_VERSION,
+                                    DEFAULT_EQUIPMENT_NEEDS, DEFAULT_SYSTEM_ACCESS, DEFAULT_TRAINING_REQUIREMENTS)
 
 # Set Groq API key (using the one from original workflow)
 os.environ["GROQ_API_KEY"] = "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"
 
-def process_onboarding(employee_data):
-    """Process the onboarding workflow with the provided employee data"""
+# Bump when the single-shot prompt changes
+SINGLE_SHOT_PROMPT_VERSION = 1
+
+# HR_WORKFLOW_ENGINE=single_shot makes one structured LLM call per onboarding
+# instead of running the three nodes one after another
+WORKFLOW_ENGINE = os.environ.get("HR_WORKFLOW_ENGINE", "nodes").lower()
+
+# Nodes run by process_onboarding, for the step counts in progress events
+NODE_STEPS = 3
+
+def use_single_shot(single_shot=None):
+    """Resolve the single_shot argument against HR_WORKFLOW_ENGINE"""
+    if single_shot is None:
+        return WORKFLOW_ENGINE in ("single_shot", "single-shot", "singleshot")
+    return single_shot
+
+def new_employee(employee_data):
+    """Create the EmployeeInfo for an onboarding request"""
+    return EmployeeInfo(
+        name=employee_data["name"],
+        position=employee_data["position"],
+        department=employee_data["department"],
+        start_date=employee_data["startDate"]
+    )
+
+def initial_state(employee_data):
+    """Build the state the first node receives"""
+    return {
+        "employee": new_employee(employee_data),
+        "hr_notes": History(),
+        "it_notes": History(),
+        "messages": History(),
+        "memory": {},
+        # Nodes whose answer was served from the response cache
+        "cached_nodes": History()
+    }
+
+def onboarding_result(state):
+    """Convert the final state into the result dict"""
+    return {
+        "employee": {
+            "name": state["employee"].name,
+            "position": state["employee"].position,
+            "department": state["employee"].department,
+            "startDate": state["employee"].start_date,
+            "equipmentNeeds": state["employee"].equipment_needs,
+            "systemAccess": state["employee"].system_access,
+            "trainingRequirements": state["employee"].training_requirements,
+            "status": state["employee"].onboarding_status
+        },
+        "hrNotes": list(state["hr_notes"]),
+        "itNotes": list(state["it_notes"]),
+        "messageCount": len(state["messages"]),
+        "cachedNodes": list(state.get("cached_nodes") or [])
+    }
+
+#############################################
+# LLM helpers shared by the sync and async nodes
+#############################################
+
+def invoke_json(node, version, prompt, inputs, cache_inputs):
+    """
+    Run a prompt that must answer with JSON, through the response cache.
+    Returns (the parsed dict or None when no usable answer came back,
+    True if it was served from the cache).
+    """
+    response = llm_cache.get(node, version, cache_inputs)
+    if response is not None:
+        return response, True
+    # Parse or repair the first answer; the model is asked again only as a last resort
+    response = llm_parsing.invoke_json(get_llm(), prompt, inputs, node, workflow_registry.get("simplified." + node),
+                                       on_completion=onboarding_memory.token_recorder(node, prompt.format(**inputs)))
+    if response is not None:
+        llm_cache.put(node, version, cache_inputs, response)
+    return response, False
+
+async def ainvoke_json(node, version, prompt, inputs, cache_inputs):
+    """Async version of invoke_json"""
+    response = llm_cache.get(node, version, cache_inputs)
+    if response is not None:
+        return response, True
+    response = await llm_parsing.ainvoke_json(get_llm(), prompt, inputs, node,
+                                              workflow_registry.get("simplified." + node),
+                                              on_completion=onboarding_memory.token_recorder(node, prompt.format(**inputs)))
+    if response is not None:
+        llm_cache.put(node, version, cache_inputs, response)
+    return response, False
+
+#############################################
+# Workflow entry points
+#############################################
+
+def report(on_event, event, node, step, steps, started=None, result=None):
+    """Send a node_start/node_finish progress event to on_event(event, data), if given"""
+    if on_event is None:
+        return
+    data = {"node": node, "step": step, "steps": steps}
+    if started is not None:
+        data["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        data["result"] = result or {}
     try:
-        # Create employee object
-        employee = EmployeeInfo(
-            name=employee_data["name"],
-            position=employee_data["position"],
-            department=employee_data["department"],
-            start_date=employee_data["startDate"]
-        )
-        
-        # Initialize state
-        state = {
-            "employee": employee,
-            "hr_notes": [],
-            "it_notes": [],
-            "messages": []
-        }
-        
+        on_event(event, data)
+    except Exception as e:
+        # Progress reporting must never fail the onboarding
+        print(f"Error reporting {event} for {node}: {e}")
+
+def run_node(state, name, node, step, on_event=None):
+    """Run one node, fold its update into the state and report its progress"""
+    report(on_event, "node_start", name, step, NODE_STEPS)
+    started = time.perf_counter()
+    update = node(state)
+    # The step's compact facts (see onboarding_memory) are its partial result
+    report(on_event, "node_finish", name, step, NODE_STEPS, started, update.get("memory"))
+    return merge_update(state, update)
+
+async def arun_node(state, name, node, step, on_event=None):
+    """Async version of run_node; node is the async twin"""
+    report(on_event, "node_start", name, step, NODE_STEPS)
+    started = time.perf_counter()
+    update = await node(state)
+    report(on_event, "node_finish", name, step, NODE_STEPS, started, update.get("memory"))
+    return merge_update(state, update)
+
+def process_onboarding(employee_data, single_shot=None, on_event=None):
+    """
+    Process the onboarding workflow with the provided employee data
+
+    single_shot=True uses process_onboarding_single_shot; None follows
+    HR_WORKFLOW_ENGINE. on_event(event, data), if given, receives a
+    node_start and node_finish event for every step.
+    """
+    # Repeat roles are answered from the mined rule table without the LLM
+    started = time.perf_counter()
+    result = rules_fast_path(employee_data)
+    if result is not None:
+        report(on_event, "node_finish", "rules", 1, 1, started, result["employee"])
+        return result
+
+    if use_single_shot(single_shot):
+        report(on_event, "node_start", "single_shot_onboarding", 1, 1)
+        result = process_onboarding_single_shot(employee_data)
+        report(on_event, "node_finish", "single_shot_onboarding", 1, 1, started, result["employee"])
+        return result
+
+    try:
+        state = initial_state(employee_data)
+
         # Run step 1: Collect employee info
         print("Step 1: Collecting employee info")
-        state = collect_employee_info(state)
-        
+        state = run_node(state, "collect_employee_info", collect_employee_info, 1, on_event)
+
         # Run step 2: Determine equipment and access
         print("Step 2: Determining equipment and access")
-        state = determine_equipment_access(state)
-        
+        state = run_node(state, "determine_equipment_access", determine_equipment_access, 2, on_event)
+
         # Run step 3: Create training plan
         print("Step 3: Creating training plan")
-        state = create_training_plan(state)
-        
-        # Prepare result
-        result = {
-            "employee": {
-                "name": state["employee"].name,
-                "position": state["employee"].position,
-                "department": state["employee"].department,
-                "startDate": state["employee"].start_date,
-                "equipmentNeeds": state["employee"].equipment_needs,
-                "systemAccess": state["employee"].system_access,
-                "trainingRequirements": state["employee"].training_requirements,
-                "status": state["employee"].onboarding_status
-            },
-            "hrNotes": state["hr_notes"],
-            "itNotes": state["it_notes"],
-            "messageCount": len(state["messages"])
-        }
-        
-        return result
-        
+        state = run_node(state, "create_training_plan", create_training_plan, 3, on_event)
+
+        return onboarding_result(state)
+
     except Exception as e:
         print("Error in process_onboarding:", e)
         import traceback
         traceback.print_exc()
         raise
 
+async def aprocess_onboarding(employee_data, single_shot=None, on_event=None):
+    """Async version of process_onboarding"""
+    started = time.perf_counter()
+    result = rules_fast_path(employee_data)
+    if result is not None:
+        report(on_event, "node_finish", "rules", 1, 1, started, result["employee"])
+        return result
+
+    if use_single_shot(single_shot):
+        report(on_event, "node_start", "single_shot_onboarding", 1, 1)
+        result = await aprocess_onboarding_single_shot(employee_data)
+        report(on_event, "node_finish", "single_shot_onboarding", 1, 1, started, result["employee"])
+        return result
+
+    try:
+        state = initial_state(employee_data)
+        print("Step 1: Collecting employee info")
+        state = await arun_node(state, "collect_employee_info", acollect_employee_info, 1, on_event)
+        print("Step 2: Determining equipment and access")
+        state = await arun_node(state, "determine_equipment_access", adetermine_equipment_access, 2, on_event)
+        print("Step 3: Creating training plan")
+        state = await arun_node(state, "create_training_plan", acreate_training_plan, 3, on_event)
+        return onboarding_result(state)
+
+    except Exception as e:
+        print("Error in aprocess_onboarding:", e)
+        import traceback
+        traceback.print_exc()
+        raise
+
+#############################################
+# Rule table fast path
+#############################################
+
+def rules_fast_path(employee_data):
+    """Return the result from a confident mined rule for this role, or None"""
+    rule = onboarding_rules.lookup(employee_data["position"], employee_data["department"])
+    if rule is None:
+        return None
+    print("Answering onboarding for {} from rules (confidence {:.2f} over {} runs)".format(
+        employee_data["name"], rule["confidence"], rule["support"]))
+
+    employee = new_employee(employee_data)
+    employee.equipment_needs = list(rule["equipmentNeeds"])
+    employee.system_access = list(rule["systemAccess"])
+    employee.training_requirements = list(rule["trainingRequirements"])
+    employee.onboarding_status = "completed"
+
+    result = onboarding_result({
+        "employee": employee,
+        "hr_notes": [
+            "Employee information recorded for {}".format(employee.name),
+            "Training plan for {} taken from rules for {} / {}".format(employee.name, rule["position"], rule["department"])
+        ],
+        "it_notes": ["Equipment and access for {} taken from rules".format(employee.name)],
+        "messages": []
+    })
+    result["source"] = "rules"
+    return result
+
+#############################################
+# Single-shot engine
+#############################################
+
+SINGLE_SHOT_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", "You are an HR onboarding assistant covering HR, IT and training. "
+              "Your response MUST be valid JSON with double quotes, containing ONLY the keys "
+              "'validation_notes', 'equipment_needs', 'system_access' and 'training_requirements', "
+              "each a list of strings, with no additional text before or after the JSON."),
+    ("user", "Validate the following employee information, then list the required equipment, "
+            "system access and training requirements for the role:\n"
+            "Employee Name: {name}\n"
+            "Position: {position}\n"
+            "Department: {department}\n"
+            "Start Date: {start_date}\n"
+            "Respond with ONLY the JSON object. "
+            "Do not include any explanations or text outside the JSON.")
+])
+
+def single_shot_inputs(employee):
+    """Return the single-shot prompt inputs and the role profile used as cache key"""
+    inputs = {
+        "name": employee.name,
+        "position": employee.position,
+        "department": employee.department,
+        "start_date": employee.start_date
+    }
+    return inputs, {"position": employee.position, "department": employee.department}
+
+def as_notes(value):
+    """Return a list of note strings from a JSON value (list, string or missing)"""
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [value]
+    return [str(item) for item in value]
+
+def single_shot_result(employee, inputs, response, cached=False):
+    """Build the process_onboarding result from the single-shot answer (or the defaults)"""
+    hr_notes = []
+    it_notes = []
+    if not isinstance(response, dict):
+        print("No usable JSON in the single-shot answer, using default values")
+        response = {}
+        hr_notes.append("No usable answer from the model; default training plan used")
+        it_notes.append("No usable answer from the model; default equipment and access used")
+    employee.equipment_needs = response.get("equipment_needs") or list(DEFAULT_EQUIPMENT_NEEDS)
+    employee.system_access = response.get("system_access") or list(DEFAULT_SYSTEM_ACCESS)
+    employee.training_requirements = response.get("training_requirements") or list(DEFAULT_TRAINING_REQUIREMENTS)
+    employee.onboarding_status = "completed"
+
+    validation_notes = as_notes(response.get("validation_notes"))
+    if not validation_notes and response:
+        validation_notes = ["Employee information validated for {}".format(employee.name)]
+
+    return onboarding_result({
+        "employee": employee,
+        "hr_notes": validation_notes + hr_notes + ["Training plan created for {}".format(employee.name)],
+        "it_notes": it_notes + ["Equipment and access determined for {}".format(employee.name)],
+        "messages": [
+            {"role": "user", "content": str(SINGLE_SHOT_PROMPT.format(**inputs))},
+            {"role": "assistant", "content": str(response)}
+        ],
+        "cached_nodes": ["single_shot_onboarding"] if cached else []
+    })
+
+def process_onboarding_single_shot(employee_data):
+    """
+    Process the onboarding with a single structured LLM call.
+
+    Validation, equipment, system access and training come back in one JSON
+    answer, and the result has the same shape as process_onboarding.
+    """
+    try:
+        employee = new_employee(employee_data)
+        inputs, cache_inputs = single_shot_inputs(employee)
+        print("Running single-shot onboarding call")
+        response, cached = invoke_json("single_shot_onboarding", SINGLE_SHOT_PROMPT_VERSION, SINGLE_SHOT_PROMPT,
+                                       inputs, cache_inputs)
+        return single_shot_result(employee, inputs, response, cached)
+
+    except Exception as e:
+        print("Error in process_onboarding_single_shot:", e)
+        import traceback
+        traceback.print_exc()
+        raise
+
+async def aprocess_onboarding_single_shot(employee_data):
+    """Async version of process_onboarding_single_shot"""
+    try:
+        employee = new_employee(employee_data)
+        inputs, cache_inputs = single_shot_inputs(employee)
+        print("Running single-shot onboarding call")
+        response, cached = await ainvoke_json("single_shot_onboarding", SINGLE_SHOT_PROMPT_VERSION,
+                                              SINGLE_SHOT_PROMPT, inputs, cache_inputs)
+        return single_shot_result(employee, inputs, response, cached)
+
+    except Exception as e:
+        print("Error in aprocess_onboarding_single_shot:", e)
+        import traceback
+        traceback.print_exc()
+        raise
+
+#############################################
+# Nodes
+#############################################
+
+def coalesce_key(node, version, keys):
+    """Coalescing key of a node: its cache key, so calls the cache would share are sent once"""
+    return lambda inputs: llm_cache.cache_key(node, version, {key: inputs[key] for key in keys})
+
+# The prompt | llm chain of each JSON node is composed once per process,
+# behind an in-flight coalescer when HR_LLM_COALESCE is on
+workflow_registry.register("simplified.determine_equipment_access", lambda: llm_coalescing.coalesced(
+    EQUIPMENT_PROMPT | get_llm(), "determine_equipment_access",
+    coalesce_key("determine_equipment_access", EQUIPMENT_PROMPT_VERSION, ("position", "department"))))
+workflow_registry.register("simplified.create_training_plan", lambda: llm_coalescing.coalesced(
+    TRAINING_PROMPT | get_llm(), "create_training_plan",
+    coalesce_key("create_training_plan", TRAINING_PROMPT_VERSION, ("position", "department", "equipment", "access"))))
+workflow_registry.register("simplified.single_shot_onboarding", lambda: llm_coalescing.coalesced(
+    SINGLE_SHOT_PROMPT | get_llm(), "single_shot_onboarding",
+    coalesce_key("single_shot_onboarding", SINGLE_SHOT_PROMPT_VERSION, ("position", "department"))))
+
+def warm_up():
+    """Create the LLM client and the shared chains before the first onboarding request"""
+    if use_single_shot():
+        return workflow_registry.warm_up(["llm", "simplified.single_shot_onboarding"])
+    return workflow_registry.warm_up(["llm", "simplified.determine_equipment_access", "simplified.create_training_plan"])
+
+def validation_message(state):
+    """Return the formatted validation prompt as a HumanMessage"""
+    employee = state["employee"]
+    formatted_prompt = VALIDATION_PROMPT.format(
+        name=employee.name,
+        position=employee.position,
+        department=employee.department,
+        start_date=employee.start_date
+    )
+    return HumanMessage(content=str(formatted_prompt))
+
+def apply_validation(state, human_message, response):
+    """Return the validation exchange as a partial state update"""
+    employee = state["employee"]
+    onboarding_memory.record_tokens("collect_employee_info", human_message.content, response.content)
+    return {
+        "hr_notes": ["Employee information validated for {}".format(employee.name)],
+        "messages": [
+            {"role": "user", "content": human_message.content},
+            {"role": "assistant", "content": response.content}
+        ],
+        "memory": {"validation": onboarding_memory.validation_facts(response.content)}
+    }
+
+def equipment_inputs(state):
+    """Return the equipment prompt inputs and the role profile used as cache key"""
+    employee = state["employee"]
+    inputs = {
+        "name": employee.name,
+        "position": employee.position,
+        "department": employee.department
+    }
+    return inputs, {"position": employee.position, "department": employee.department}
+
+def apply_equipment(state, inputs, response, cached=False):
+    """Return the equipment answer (or the defaults) as a partial state update"""
+    if response is None:
+        response = {
+            "equipment_needs": list(DEFAULT_EQUIPMENT_NEEDS),
+            "system_access": list(DEFAULT_SYSTEM_ACCESS)
+        }
+
+    # Update a copy of the employee; earlier states keep the old one
+    employee = copy.copy(state["employee"])
+    employee.equipment_needs = response.get("equipment_needs", [])
+    employee.system_access = response.get("system_access", [])
+
+    return {
+        "employee": employee,
+        "it_notes": ["Equipment and access determined for {}".format(employee.name)],
+        "messages": [
+            {"role": "user", "content": str(EQUIPMENT_PROMPT.format(**inputs))},
+            {"role": "assistant", "content": str(response)}
+        ],
+        "memory": {"equipment": {
+            "equipment_needs": employee.equipment_needs,
+            "system_access": employee.system_access
+        }},
+        "cached_nodes": ["determine_equipment_access"] if cached else []
+    }
+
+def training_inputs(state):
+    """Return the training prompt inputs and the role profile used as cache key"""
+    employee = state["employee"]
+
+    # Compact facts from the earlier steps instead of their full prompts and answers
+    conversation_history = onboarding_memory.render_context(state.get("memory"))
+    inputs = {
+        "name": employee.name,
+        "position": employee.position,
+        "department": employee.department,
+        "equipment": employee.equipment_needs,
+        "access": employee.system_access,
+        "context": conversation_history
+    }
+    cache_inputs = {
+        "position": employee.position,
+        "department": employee.department,
+        "equipment": employee.equipment_needs,
+        "access": employee.system_access
+    }
+    return inputs, cache_inputs
+
+def apply_training(state, inputs, response, cached=False):
+    """Return the training plan (or the defaults) as a partial state update"""
+    if response is None:
+        response = {"training_requirements": list(DEFAULT_TRAINING_REQUIREMENTS)}
+
+    # Update a copy of the employee; earlier states keep the old one
+    employee = copy.copy(state["employee"])
+    employee.training_requirements = response.get("training_requirements", [])
+    employee.onboarding_status = "completed"
+
+    return {
+        "employee": employee,
+        "hr_notes": ["Training plan created for {}".format(employee.name)],
+        "messages": [
+            {"role": "user", "content": str(TRAINING_PROMPT.format(**inputs))},
+            {"role": "assistant", "content": str(response)}
+        ],
+        "memory": {"training": {"training_requirements": employee.training_requirements}},
+        "cached_nodes": ["create_training_plan"] if cached else []
+    }
+
 def collect_employee_info(state):
     """Collect and validate basic employee information"""
     try:
-        employee = state["employee"]
-        messages = state.get("messages", [])
-        
-        # Create a prompt for the LLM
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", "You are an HR assistant helping with employee onboarding. "
-                      "Validate the following employee information and add any missing details."),
-            ("user", "Employee Name: {name}\n"
-                    "Position: {position}\n"
-                    "Department: {department}\n"
-                    "Start Date: {start_date}")
-        ])
-        
-        # Format the prompt with employee info
-        formatted_prompt = prompt.format(
-            name=employee.name,
-            position=employee.position,
-            department=employee.department,
-            start_date=employee.start_date
-        )
-        
-        # Get response from LLM
-        human_message = HumanMessage(content=str(formatted_prompt))
-        response = llm.invoke([human_message])
-        
-        # Store the message in memory
-        messages.append({"role": "user", "content": str(formatted_prompt)})
-        messages.append({"role": "assistant", "content": response.content})
-        
-        # Add a note to HR notes
-        hr_notes = state.get("hr_notes", [])
-        hr_notes.append("Employee information validated for {}".format(employee.name))
-        
-        # Return updated state
-        new_state = copy.deepcopy(state)
-        new_state["hr_notes"] = hr_notes
-        new_state["messages"] = messages
-        return new_state
+        human_message = validation_message(state)
+        response = get_llm().invoke([human_message])
+        return apply_validation(state, human_message, response)
     except Exception as e:
         print("Error in collect_employee_info:", e)
         import traceback
         traceback.print_exc()
         raise
 
+async def acollect_employee_info(state):
+    """Async version of collect_employee_info"""
+    try:
+        human_message = validation_message(state)
+        response = await get_llm().ainvoke([human_message])
+        return apply_validation(state, human_message, response)
+    except Exception as e:
+        print("Error in acollect_employee_info:", e)
+        import traceback
+        traceback.print_exc()
+        raise
+
 def determine_equipment_access(state):
     """Determine equipment and system access needs based on role"""
     try:
-        employee = state["employee"]
-        messages = state.get("messages", [])
-        
-        # Create a prompt for the LLM
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", "You are an IT specialist helping with employee onboarding. "
-                      "Determine appropriate equipment and system access based on the role. "
-                      "Your response MUST be valid JSON with double quotes, containing ONLY 'equipment_needs' and 'system_access' lists "
-                      "with no additional text before or after the JSON."),
-            ("user", "Based on the following employee information, list required equipment and system access:\n"
-                    "Employee Name: {name}\n"
-                    "Position: {position}\n"
-                    "Department: {department}\n"
-                    "Respond with ONLY a JSON object with 'equipment_needs' and 'system_access' as lists. "
-                    "Do not include any explanations or text outside the JSON.")
-        ])
-        
-        # Define output parser for structured response
-        parser = JsonOutputParser()
-        
-        # Initialize response with default values in case of failure
-        response = {
-            "equipment_needs": ["Laptop", "Monitor", "Keyboard", "Mouse"],
-            "system_access": ["Email", "Company Intranet", "Department Shared Drive"]
-        }
-        
-        # Try to get response from LLM and parse
-        try:
-            # Get response from LLM and parse
-            chain = prompt | llm | parser
-            llm_response = chain.invoke({
-                "name": employee.name, 
-                "position": employee.position, 
-                "department": employee.department
-            })
-            
-            # Only update response if we got a valid result
-            if llm_response is not None:
-                response = llm_response
-            
-        except Exception as json_error:
-            # Fallback if JSON parsing fails
-            print(f"JSON parsing failed: {json_error}")
-            print("Using fallback approach to extract equipment and access requirements")
-            
-            # Get raw response from LLM
-            raw_prompt = prompt.format(
-                name=employee.name,
-                position=employee.position,
-                department=employee.department
-            )
-            
-            message = HumanMessage(content=str(raw_prompt))
-            llm_response = llm.invoke([message])
-            content = llm_response.content
-            
-            # Try to extract JSON manually
-            import re
-            import json
-            
-            # Try to find JSON block
-            json_match = re.search(r'\{[\s\S]*\}', content)
-            if json_match:
-                json_str = json_match.group(0)
-                # Replace single quotes with double quotes
-                json_str = json_str.replace("'", '"')
-                
-                try:
-                    extracted_response = json.loads(json_str)
-                    print("Successfully extracted JSON using regex")
-                    if extracted_response is not None:
-                        response = extracted_response
-                except json.JSONDecodeError as e:
-                    print(f"Failed to parse extracted JSON: {e}")
-                    print("Using default equipment and access values")
-            else:
-                print("No JSON found in response, using default values")
-        
-        # Update employee information
-        employee.equipment_needs = response.get("equipment_needs", [])
-        employee.system_access = response.get("system_access", [])
-        
-        # Store the interaction in memory
-        formatted_prompt = prompt.format(
-            name=employee.name,
-            position=employee.position,
-            department=employee.department
-        )
-        messages.append({"role": "user", "content": str(formatted_prompt)})
-        messages.append({"role": "assistant", "content": str(response)})
-        
-        # Add notes
-        it_notes = state.get("it_notes", [])
-        it_notes.append("Equipment and access determined for {}".format(employee.name))
-        
-        # Return updated state with memory
-        new_state = copy.deepcopy(state)
-        new_state["employee"] = employee
-        new_state["it_notes"] = it_notes
-        new_state["messages"] = messages
-        return new_state
+        inputs, cache_inputs = equipment_inputs(state)
+        response, cached = invoke_json("determine_equipment_access", EQUIPMENT_PROMPT_VERSION,
+                                       EQUIPMENT_PROMPT, inputs, cache_inputs)
+        return apply_equipment(state, inputs, response, cached)
     except Exception as e:
         print("Error in determine_equipment_access:", e)
         import traceback
         traceback.print_exc()
         raise
 
+async def adetermine_equipment_access(state):
+    """Async version of determine_equipment_access"""
+    try:
+        inputs, cache_inputs = equipment_inputs(state)
+        response, cached = await ainvoke_json("determine_equipment_access", EQUIPMENT_PROMPT_VERSION,
+                                              EQUIPMENT_PROMPT, inputs, cache_inputs)
+        return apply_equipment(state, inputs, response, cached)
+    except Exception as e:
+        print("Error in adetermine_equipment_access:", e)
+        import traceback
+        traceback.print_exc()
+        raise
+
 def create_training_plan(state):
     """Create personalized training plan for the new employee"""
     try:
-        employee = state["employee"]
-        messages = state.get("messages", [])
-        
-        # Use message history for context
-        conversation_history = "\n".join(["{}:{}".format(msg['role'], msg['content']) for msg in messages[-4:]])
-        
-        # Create a prompt for the LLM with clearer JSON formatting instructions
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", "You are a training coordinator helping with employee onboarding. "
-                      "Create a training plan for the new employee. "
-                      "Your response MUST be valid JSON with double quotes, containing ONLY a 'training_requirements' list "
-                      "with no additional text before or after the JSON."),
-            ("user", "Based on the following employee information and previous onboarding steps, "
-                    "determine appropriate training requirements:\n"
-                    "Employee Name: {name}\n"
-                    "Position: {position}\n"
-                    "Department: {department}\n"
-                    "Equipment: {equipment}\n"
-                    "System Access: {access}\n\n"
-                    "Context from previous steps:\n{context}\n\n"
-                    "Return a JSON object with only a 'training_requirements' key containing an array of strings. "
-                    "Do not include any explanations or text outside the JSON.")
-        ])
-        
-        # Define output parser with robust error handling
-        parser = JsonOutputParser()
-        
-        # Initialize response with default values in case of failure
-        response = {
-            "training_requirements": [
-                "Company Orientation",
-                "Department Training",
-                "Role-specific Training",
-                "System Access Training",
-                "Equipment Training"
-            ]
-        }
-        
-        try:
-            # Get response from LLM and parse
-            chain = prompt | llm | parser
-            llm_response = chain.invoke({
-                "name": employee.name, 
-                "position": employee.position, 
-                "department": employee.department,
-                "equipment": employee.equipment_needs,
-                "access": employee.system_access,
-                "context": conversation_history
-            })
-            
-            # Only update response if we got a valid result
-            if llm_response is not None:
-                response = llm_response
-            
-        except Exception as json_error:
-            # Fallback if JSON parsing fails
-            print(f"JSON parsing failed: {json_error}")
-            print("Using fallback approach to extract training requirements")
-            
-            # Get raw response from LLM
-            raw_prompt = prompt.format(
-                name=employee.name,
-                position=employee.position,
-                department=employee.department,
-                equipment=employee.equipment_needs,
-                access=employee.system_access,
-                context=conversation_history
-            )
-            
-            message = HumanMessage(content=str(raw_prompt))
-            llm_response = llm.invoke([message])
-            content = llm_response.content
-            
-            # Try to extract JSON manually
-            import re
-            import json
-            
-            # Try to find JSON block
-            json_match = re.search(r'\{[\s\S]*\}', content)
-            if json_match:
-                json_str = json_match.group(0)
-                # Replace single quotes with double quotes
-                json_str = json_str.replace("'", '"')
-                
-                try:
-                    extracted_response = json.loads(json_str)
-                    if extracted_response is not None:
-                        response = extracted_response
-                except json.JSONDecodeError:
-                    # Keep using default values defined above
-                    print("Failed to parse extracted JSON, using default training requirements")
-            else:
-                # Keep using default values defined above
-                print("No JSON found in response, using default training requirements")
-        
-        # Update employee information
-        employee.training_requirements = response.get("training_requirements", [])
-        employee.onboarding_status = "completed"
-        
-        # Store the interaction in memory
-        formatted_prompt = prompt.format(
-            name=employee.name,
-            position=employee.position,
-            department=employee.department,
-            equipment=employee.equipment_needs,
-            access=employee.system_access,
-            context=conversation_history
-        )
-        messages.append({"role": "user", "content": str(formatted_prompt)})
-        messages.append({"role": "assistant", "content": str(response)})
-        
-        # Add notes
-        hr_notes = state.get("hr_notes", [])
-        hr_notes.append("Training plan created for {}".format(employee.name))
-        
-        # Return updated state
-        new_state = copy.deepcopy(state)
-        new_state["employee"] = employee
-        new_state["hr_notes"] = hr_notes
-        new_state["messages"] = messages
-        return new_state
+        inputs, cache_inputs = training_inputs(state)
+        response, cached = invoke_json("create_training_plan", TRAINING_PROMPT_VERSION,
+                                       TRAINING_PROMPT, inputs, cache_inputs)
+        return apply_training(state, inputs, response, cached)
     except Exception as e:
         print("Error in create_training_plan:", e)
         import traceback
         traceback.print_exc()
         raise
 
+async def acreate_training_plan(state):
+    """Async version of create_training_plan"""
+    try:
+        inputs, cache_inputs = training_inputs(state)
+        response, cached = await ainvoke_json("create_training_plan", TRAINING_PROMPT_VERSION,
+                                              TRAINING_PROMPT, inputs, cache_inputs)
+        return apply_training(state, inputs, response, cached)
+    except Exception as e:
+        print("Error in acreate_training_plan:", e)
+        import traceback
+        traceback.print_exc()
+        raise
+
 if __name__ == "__main__":
     # Test the simplified workflow
     test_data = {
@@ -365,7 +589,7 @@ if __name__ == "__main__":
         "department": "Marketing",
         "startDate": "2023-06-15"
     }
-    
+
     try:
         result = process_onboarding(test_data)
         print("\nWorkflow completed successfully!")
@@ -373,4 +597,4 @@ if __name__ == "__main__":
         print("System access:", result["employee"]["systemAccess"])
         print("Training requirements:", result["employee"]["trainingRequirements"])
     except Exception as e:
-        print("Test failed:", e) 
\ No newline at end of file
+        print("Test failed:", e)
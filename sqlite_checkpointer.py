@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""
+SQLite Checkpointer for HR Workflow
+
+hr_langgraph used to compile its graph with the in-memory MemorySaver, so
+checkpoints died with the process and, because every run gets its own
+thread_id, piled up without bound in a long-running server. SQLiteCheckpointer
+is a LangGraph checkpoint saver that keeps them in data/checkpoints.db
+instead, for create_workflow_graph and build_workflow alike.
+
+Storage follows MemorySaver's layout: a checkpoint row per step, channel
+values stored once per version (a step only writes the channels it changed),
+and the pending writes of each task. Values go through the saver's msgpack
+serde, with the workflow's own state classes (STATE_TYPES) registered so
+they load back as themselves, and are zlib-compressed when at least
+HR_CHECKPOINT_COMPRESS_BYTES long. Every table's primary key starts with
+thread_id, so the lookups and deletes of a thread use an index.
+
+Retention: a thread is finished once its runner calls mark_finished (the
+workflow runners do when a run completes). Finished threads are pruned
+HR_CHECKPOINT_RETENTION_HOURS after they finished; threads that were never
+finished (a crashed or interrupted run) keep their state so they can be
+inspected or resumed, unless HR_CHECKPOINT_STALE_HOURS is set. Pruning runs
+from put() at most every HR_CHECKPOINT_PRUNE_INTERVAL seconds, or by hand:
+
+    python sqlite_checkpointer.py stats
+    python sqlite_checkpointer.py prune
+
+Configuration:
+    HR_CHECKPOINTER                  sqlite (default) or memory
+    HR_CHECKPOINT_DB                 database file (default data/checkpoints.db)
+    HR_CHECKPOINT_RETENTION_HOURS    hours finished threads are kept (default 24)
+    HR_CHECKPOINT_STALE_HOURS        hours after which unfinished threads are pruned (default 0: never)
+    HR_CHECKPOINT_PRUNE_INTERVAL     seconds between automatic prunes (default 300)
+    HR_CHECKPOINT_COMPRESS_BYTES     smallest value that is compressed (default 512)
+"""
+
+import os
+import sys
+import time
+import zlib
+import random
+import sqlite3
+import asyncio
+import argparse
+import threading
+
+from langgraph.checkpoint.base import BaseCheckpointSaver, CheckpointTuple, WRITES_IDX_MAP, get_checkpoint_id, get_checkpoint_metadata
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from data_store import DATA_DIR, ensure_data_dir
+import workflow_registry
+
+CHECKPOINTER = os.environ.get("HR_CHECKPOINTER", "sqlite").lower()
+CHECKPOINT_DB = os.environ.get("HR_CHECKPOINT_DB", os.path.join(DATA_DIR, "checkpoints.db"))
+RETENTION_HOURS = float(os.environ.get("HR_CHECKPOINT_RETENTION_HOURS", "24"))
+STALE_HOURS = float(os.environ.get("HR_CHECKPOINT_STALE_HOURS", "0"))
+PRUNE_INTERVAL = float(os.environ.get("HR_CHECKPOINT_PRUNE_INTERVAL", "300"))
+COMPRESS_BYTES = int(os.environ.get("HR_CHECKPOINT_COMPRESS_BYTES", "512"))
+
+# The workflow's state classes the serde may rebuild from a checkpoint; each
+# stores its constructor arguments through an _asdict method
+STATE_TYPES = [("hr_onboarding_workflow", "EmployeeInfo"), ("workflow_state", "History")]
+
+def state_serde():
+    """Checkpoint serializer that knows the workflow's state classes"""
+    return JsonPlusSerializer(allowed_msgpack_modules=STATE_TYPES)
+
+# Appended to the serde type of compressed values
+COMPRESSED_SUFFIX = "+zlib"
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS threads (
+        thread_id TEXT PRIMARY KEY,
+        created_at REAL NOT NULL,
+        updated_at REAL NOT NULL,
+        finished_at REAL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_threads_finished_at ON threads (finished_at)",
+    "CREATE INDEX IF NOT EXISTS idx_threads_updated_at ON threads (updated_at)",
+    """
+    CREATE TABLE IF NOT EXISTS checkpoints (
+        thread_id TEXT NOT NULL,
+        checkpoint_ns TEXT NOT NULL,
+        checkpoint_id TEXT NOT NULL,
+        parent_checkpoint_id TEXT,
+        type TEXT NOT NULL,
+        checkpoint BLOB NOT NULL,
+        metadata_type TEXT NOT NULL,
+        metadata BLOB NOT NULL,
+        PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS blobs (
+        thread_id TEXT NOT NULL,
+        checkpoint_ns TEXT NOT NULL,
+        channel TEXT NOT NULL,
+        version TEXT NOT NULL,
+        type TEXT NOT NULL,
+        value BLOB,
+        PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS writes (
+        thread_id TEXT NOT NULL,
+        checkpoint_ns TEXT NOT NULL,
+        checkpoint_id TEXT NOT NULL,
+        task_id TEXT NOT NULL,
+        idx INTEGER NOT NULL,
+        channel TEXT NOT NULL,
+        type TEXT NOT NULL,
+        value BLOB,
+        task_path TEXT NOT NULL DEFAULT '',
+        PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+    )
+    """,
+]
+
+THREAD_TABLES = ("checkpoints", "blobs", "writes", "threads")
+
+class SQLiteCheckpointer(BaseCheckpointSaver):
+    """LangGraph checkpoint saver backed by SQLite, with retention pruning"""
+    def __init__(self, path=CHECKPOINT_DB, retention_hours=RETENTION_HOURS, stale_hours=STALE_HOURS,
+                 prune_interval=PRUNE_INTERVAL, compress_bytes=COMPRESS_BYTES, serde=None):
+        super(SQLiteCheckpointer, self).__init__(serde=serde or state_serde())
+        self.path = path
+        self.retention_hours = retention_hours
+        self.stale_hours = stale_hours
+        self.prune_interval = prune_interval
+        self.compress_bytes = compress_bytes
+        self.local = threading.local()
+        self.prune_lock = threading.Lock()
+        self.last_prune = 0.0
+
+    def connection(self):
+        """Return the calling thread's connection, creating the schema on first use"""
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            if os.path.dirname(self.path) == DATA_DIR:
+                ensure_data_dir()
+            elif os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            # WAL lets the API read checkpoints while a worker writes them
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            for statement in SCHEMA:
+                conn.execute(statement)
+            conn.commit()
+            self.local.conn = conn
+        return conn
+
+    #############################################
+    # Serialization
+    #############################################
+
+    def dump(self, value):
+        """Serialize a value to (type, bytes), compressing large ones"""
+        type_, data = self.serde.dumps_typed(value)
+        if data is not None and len(data) >= self.compress_bytes:
+            return type_ + COMPRESSED_SUFFIX, zlib.compress(data)
+        return type_, data
+
+    def load(self, type_, data):
+        """Inverse of dump"""
+        if type_.endswith(COMPRESSED_SUFFIX):
+            type_, data = type_[:-len(COMPRESSED_SUFFIX)], zlib.decompress(data)
+        return self.serde.loads_typed((type_, data))
+
+    #############################################
+    # BaseCheckpointSaver
+    #############################################
+
+    def _tuple(self, conn, config, row):
+        """Build a CheckpointTuple from a checkpoints row"""
+        thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type_, data, metadata_type, metadata = row
+        checkpoint = self.load(type_, data)
+        channel_values = {}
+        for channel, version in checkpoint["channel_versions"].items():
+            blob = conn.execute(
+                "SELECT type, value FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                (thread_id, checkpoint_ns, channel, str(version))).fetchone()
+            if blob is not None and blob[0] != "empty":
+                channel_values[channel] = self.load(blob[0], blob[1])
+        writes = conn.execute(
+            "SELECT task_id, channel, type, value FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_path, task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id)).fetchall()
+        return CheckpointTuple(
+            config=config or {"configurable": {
+                "thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id}},
+            checkpoint=dict(checkpoint, channel_values=channel_values),
+            metadata=self.load(metadata_type, metadata),
+            parent_config={"configurable": {
+                "thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": parent_checkpoint_id}}
+            if parent_checkpoint_id else None,
+            pending_writes=[(task_id, channel, self.load(type_, value)) for task_id, channel, type_, value in writes]
+        )
+
+    def get_tuple(self, config):
+        """Return the checkpoint in config, or the thread's latest one"""
+        conn = self.connection()
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        columns = ("SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, "
+                   "metadata_type, metadata FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?")
+        checkpoint_id = get_checkpoint_id(config)
+        if checkpoint_id:
+            row = conn.execute(columns + " AND checkpoint_id = ?", (thread_id, checkpoint_ns, checkpoint_id)).fetchone()
+            return self._tuple(conn, config, row) if row else None
+        row = conn.execute(columns + " ORDER BY checkpoint_id DESC LIMIT 1", (thread_id, checkpoint_ns)).fetchone()
+        return self._tuple(conn, None, row) if row else None
+
+    def list(self, config, *, filter=None, before=None, limit=None):
+        """Yield checkpoints, newest first, matching the config, metadata filter and before"""
+        conn = self.connection()
+        query = ("SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, "
+                 "metadata_type, metadata FROM checkpoints")
+        where, params = [], []
+        if config:
+            where.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if config["configurable"].get("checkpoint_ns") is not None:
+                where.append("checkpoint_ns = ?")
+                params.append(config["configurable"]["checkpoint_ns"])
+            if get_checkpoint_id(config):
+                where.append("checkpoint_id = ?")
+                params.append(get_checkpoint_id(config))
+        if before and get_checkpoint_id(before):
+            where.append("checkpoint_id < ?")
+            params.append(get_checkpoint_id(before))
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        query += " ORDER BY checkpoint_id DESC"
+
+        for row in conn.execute(query, params).fetchall():
+            if limit is not None and limit <= 0:
+                break
+            if filter:
+                metadata = self.load(row[6], row[7])
+                if not all(metadata.get(key) == value for key, value in filter.items()):
+                    continue
+            if limit is not None:
+                limit -= 1
+            yield self._tuple(conn, None, row)
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        """Save a checkpoint and the channel values that changed in it"""
+        conn = self.connection()
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        saved = dict(checkpoint)
+        values = saved.pop("channel_values")
+        now = time.time()
+        with conn:
+            for channel, version in new_versions.items():
+                type_, value = self.dump(values[channel]) if channel in values else ("empty", None)
+                conn.execute("INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, ?, ?)",
+                             (thread_id, checkpoint_ns, channel, str(version), type_, value))
+            type_, data = self.dump(saved)
+            metadata_type, metadata_data = self.dump(get_checkpoint_metadata(config, metadata))
+            conn.execute("INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                         (thread_id, checkpoint_ns, checkpoint["id"], config["configurable"].get("checkpoint_id"),
+                          type_, data, metadata_type, metadata_data))
+            conn.execute("INSERT INTO threads (thread_id, created_at, updated_at) VALUES (?, ?, ?) "
+                         "ON CONFLICT(thread_id) DO UPDATE SET updated_at = excluded.updated_at",
+                         (thread_id, now, now))
+        self.maybe_prune()
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns,
+                                 "checkpoint_id": checkpoint["id"]}}
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        """Save the writes a task made against a checkpoint"""
+        conn = self.connection()
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        # Special writes (errors, interrupts) replace earlier ones; normal ones are written once
+        verb = "INSERT OR REPLACE" if all(channel in WRITES_IDX_MAP for channel, value in writes) else "INSERT OR IGNORE"
+        with conn:
+            for idx, (channel, value) in enumerate(writes):
+                type_, data = self.dump(value)
+                conn.execute(verb + " INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                             (thread_id, checkpoint_ns, checkpoint_id, task_id, WRITES_IDX_MAP.get(channel, idx),
+                              channel, type_, data, task_path))
+
+    def delete_thread(self, thread_id):
+        """Delete all checkpoints and writes of a thread"""
+        conn = self.connection()
+        with conn:
+            for table in THREAD_TABLES:
+                conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+
+    async def aget_tuple(self, config):
+        return await asyncio.get_running_loop().run_in_executor(None, self.get_tuple, config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        items = await asyncio.get_running_loop().run_in_executor(
+            None, lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for item in items:
+            yield item
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path=""):
+        return await asyncio.get_running_loop().run_in_executor(
+            None, self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id):
+        return await asyncio.get_running_loop().run_in_executor(None, self.delete_thread, thread_id)
+
+    def get_next_version(self, current, channel):
+        """String versions that sort in write order (same scheme as MemorySaver)"""
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return "{:032}.{:016}".format(current_v + 1, random.random())
+
+    #############################################
+    # Retention
+    #############################################
+
+    def mark_finished(self, thread_id):
+        """Record that a thread's run completed, so retention may prune it"""
+        conn = self.connection()
+        with conn:
+            conn.execute("UPDATE threads SET finished_at = ? WHERE thread_id = ?", (time.time(), thread_id))
+
+    def prune_expired(self, now=None):
+        """Delete finished threads past retention (and stale unfinished ones); returns the count"""
+        now = time.time() if now is None else now
+        conn = self.connection()
+        expired = [row[0] for row in conn.execute(
+            "SELECT thread_id FROM threads WHERE finished_at IS NOT NULL AND finished_at < ?",
+            (now - self.retention_hours * 3600,))]
+        if self.stale_hours > 0:
+            expired += [row[0] for row in conn.execute(
+                "SELECT thread_id FROM threads WHERE finished_at IS NULL AND updated_at < ?",
+                (now - self.stale_hours * 3600,))]
+        with conn:
+            for thread_id in expired:
+                for table in THREAD_TABLES:
+                    conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+        self.last_prune = now
+        if expired:
+            print(f"Pruned {len(expired)} expired workflow threads from {self.path}")
+        return len(expired)
+
+    def maybe_prune(self):
+        """Prune if the last prune was more than prune_interval seconds ago"""
+        if time.time() - self.last_prune < self.prune_interval or not self.prune_lock.acquire(False):
+            return
+        try:
+            self.prune_expired()
+        except sqlite3.Error as e:
+            print(f"Error pruning workflow checkpoints: {e}")
+        finally:
+            self.prune_lock.release()
+
+    def stats(self):
+        """Thread, checkpoint and write counts and the stored bytes"""
+        conn = self.connection()
+        threads, finished = conn.execute("SELECT COUNT(*), COUNT(finished_at) FROM threads").fetchone()
+        counts = {"threads": threads, "finished_threads": finished}
+        stored = 0
+        for table, column in (("checkpoints", "length(checkpoint) + length(metadata)"),
+                              ("blobs", "length(value)"), ("writes", "length(value)")):
+            rows, size = conn.execute(f"SELECT COUNT(*), COALESCE(SUM({column}), 0) FROM {table}").fetchone()
+            counts[table] = rows
+            stored += size
+        counts["stored_bytes"] = stored
+        counts["file_bytes"] = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        return counts
+
+def create_checkpointer():
+    """Checkpointer selected by HR_CHECKPOINTER: SQLiteCheckpointer, or MemorySaver for memory"""
+    if CHECKPOINTER == "memory":
+        return MemorySaver(serde=state_serde())
+    return SQLiteCheckpointer()
+
+# One checkpointer per process, shared by the compiled graphs
+workflow_registry.register("checkpointer", create_checkpointer)
+
+def get_checkpointer():
+    """Return the process's shared checkpointer"""
+    return workflow_registry.get("checkpointer")
+
+def mark_finished(checkpointer, thread_id):
+    """Mark a finished run on checkpointers that keep retention (MemorySaver does not)"""
+    if hasattr(checkpointer, "mark_finished"):
+        checkpointer.mark_finished(thread_id)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or prune the workflow checkpoint database")
+    parser.add_argument("command", choices=("stats", "prune"))
+    parser.add_argument("--path", default=CHECKPOINT_DB, help=f"Database file (default: {CHECKPOINT_DB})")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.path):
+        print(f"No checkpoint database at {args.path}")
+        sys.exit(1)
+    saver = SQLiteCheckpointer(path=args.path)
+    if args.command == "prune":
+        saver.prune_expired()
+    for key, value in saver.stats().items():
+        print(f"  {key:<18} {value}")
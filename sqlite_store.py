@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+SQLite Data Store for HR Workflow
+
+Drop-in replacement for data_store that keeps employees in a SQLite database
+with indexes on id, status, department and startDate. Select it by setting
+HR_STORAGE_BACKEND=sqlite before starting the API.
+
+Migrate the existing JSON data once with:
+    python sqlite_store.py migrate [path/to/employees.json]
+"""
+
+import os
+import sys
+import json
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+import id_allocator
+from data_store import (DATA_DIR, EMPLOYEES_FILE, REQUIRED_FIELDS, STATUS_ALIASES, PENDING_STATUSES,
+                        ensure_data_dir, normalize_status, generate_sample_employees,
+                        prepare_new_employee, merge_employee_update,
+                        created_since_bounds, build_employee_stats)
+
+# Path to the database file
+EMPLOYEES_DB = os.environ.get("HR_SQLITE_PATH", os.path.join(DATA_DIR, "employees.db"))
+
+# Columns that are copied out of the record so they can be indexed
+INDEXED_FIELDS = ["name", "position", "department", "startDate", "status", "created_at", "updated_at"]
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS employees (
+        id TEXT PRIMARY KEY,
+        name TEXT,
+        position TEXT,
+        department TEXT,
+        startDate TEXT,
+        status TEXT,
+        created_at TEXT,
+        updated_at TEXT,
+        data TEXT NOT NULL
+    )
+    """,
+    # Status filters are case-insensitive, so index the lowercased value
+    "CREATE INDEX IF NOT EXISTS idx_employees_status ON employees (lower(status))",
+    "CREATE INDEX IF NOT EXISTS idx_employees_department ON employees (department)",
+    "CREATE INDEX IF NOT EXISTS idx_employees_start_date ON employees (startDate)",
+]
+
+_local = threading.local()
+
+def get_connection():
+    """Return the calling thread's database connection, creating the schema on first use"""
+    conn = getattr(_local, "conn", None)
+    if conn is None or getattr(_local, "path", None) != EMPLOYEES_DB:
+        ensure_data_dir()
+        conn = sqlite3.connect(EMPLOYEES_DB, timeout=30)
+        conn.row_factory = sqlite3.Row
+        # WAL lets readers proceed while another process is writing
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in SCHEMA:
+            conn.execute(statement)
+        conn.commit()
+        _local.conn = conn
+        _local.path = EMPLOYEES_DB
+    return conn
+
+def _row_values(employee):
+    """Build the column values for an employee record"""
+    return [employee.get("id")] + [employee.get(field) for field in INDEXED_FIELDS] + [json.dumps(employee)]
+
+def _insert(conn, employee):
+    conn.execute(
+        "INSERT OR REPLACE INTO employees (id, {}, data) VALUES (?, {}, ?)".format(
+            ", ".join(INDEXED_FIELDS), ", ".join("?" for _ in INDEXED_FIELDS)),
+        _row_values(employee)
+    )
+
+def _update(conn, employee):
+    # UPDATE rather than INSERT OR REPLACE keeps the row's rowid, and so its position
+    conn.execute(
+        "UPDATE employees SET {}, data = ? WHERE id = ?".format(
+            ", ".join(f"{field} = ?" for field in INDEXED_FIELDS)),
+        [employee.get(field) for field in INDEXED_FIELDS] + [json.dumps(employee), employee["id"]]
+    )
+
+def _rows_to_employees(rows):
+    return [json.loads(row["data"]) for row in rows]
+
+def load_employees():
+    """Load all employees from the database"""
+    rows = get_connection().execute("SELECT data FROM employees ORDER BY rowid").fetchall()
+    employees = _rows_to_employees(rows)
+    print(f"Loaded {len(employees)} employees from {EMPLOYEES_DB}")
+    return employees
+
+def save_employees(employees):
+    """Replace all employees in the database"""
+    conn = get_connection()
+    try:
+        with conn:
+            conn.execute("DELETE FROM employees")
+            for employee in employees:
+                _insert(conn, employee)
+        print(f"Saved {len(employees)} employees to {EMPLOYEES_DB}")
+        return True
+    except sqlite3.Error as e:
+        print(f"Error saving employees: {e}")
+        return False
+
+def add_employee(employee_data):
+    """Add a new employee to the storage"""
+    conn = get_connection()
+    with conn:
+        prepare_new_employee(employee_data)
+        _insert(conn, employee_data)
+    print(f"Added new employee: {employee_data['name']} with ID {employee_data['id']}")
+    return employee_data
+
+def get_employee(employee_id):
+    """Get an employee by ID"""
+    row = get_connection().execute("SELECT data FROM employees WHERE id = ?", (employee_id,)).fetchone()
+    if row is not None:
+        return json.loads(row["data"])
+    print(f"Employee not found with ID: {employee_id}")
+    return None
+
+def update_employee(employee_id, updated_data):
+    """Update an existing employee"""
+    conn = get_connection()
+    with conn:
+        row = conn.execute("SELECT data FROM employees WHERE id = ?", (employee_id,)).fetchone()
+        if row is not None:
+            merge_employee_update(json.loads(row["data"]), employee_id, updated_data)
+            _update(conn, updated_data)
+            print(f"Updated employee with ID: {employee_id}")
+            return updated_data
+
+    print(f"Failed to update - employee not found with ID: {employee_id}")
+    return None  # Employee not found
+
+def delete_employee(employee_id):
+    """Delete an employee by ID"""
+    conn = get_connection()
+    with conn:
+        cursor = conn.execute("DELETE FROM employees WHERE id = ?", (employee_id,))
+    if cursor.rowcount:
+        print(f"Deleted employee with ID {employee_id}")
+        return True
+
+    print(f"Failed to delete - employee not found with ID: {employee_id}")
+    return False  # Employee not found
+
+def add_employees(records):
+    """
+    Add many employees in a single transaction.
+
+    Returns one result per input record, in order:
+    {"success": True, "employee": {...}} or {"success": False, "error": "..."}
+    """
+    results = []
+    added = []
+    for employee_data in records:
+        if not isinstance(employee_data, dict):
+            results.append({"success": False, "error": "Employee record must be an object"})
+            continue
+        missing = [field for field in REQUIRED_FIELDS if field not in employee_data]
+        if missing:
+            results.append({"success": False, "error": f"Missing required field: {missing[0]}"})
+            continue
+        added.append(prepare_new_employee(employee_data))
+        results.append({"success": True, "employee": employee_data})
+
+    conn = get_connection()
+    with conn:
+        for employee in added:
+            _insert(conn, employee)
+    print(f"Added {len(added)} of {len(results)} employees in one batch")
+    return results
+
+def update_employees(updates):
+    """
+    Apply {employee_id: patch} updates in a single transaction.
+
+    Returns one result per id: {"id": ..., "success": True, "employee": {...}}
+    or {"id": ..., "success": False, "error": "..."}
+    """
+    results = []
+    updated_count = 0
+    conn = get_connection()
+    with conn:
+        for employee_id, updated_data in updates.items():
+            row = conn.execute("SELECT data FROM employees WHERE id = ?", (employee_id,)).fetchone()
+            if row is None:
+                results.append({"id": employee_id, "success": False, "error": "Employee not found"})
+                continue
+            if not isinstance(updated_data, dict):
+                results.append({"id": employee_id, "success": False, "error": "Update must be an object"})
+                continue
+            merge_employee_update(json.loads(row["data"]), employee_id, updated_data)
+            _update(conn, updated_data)
+            updated_count += 1
+            results.append({"id": employee_id, "success": True, "employee": updated_data})
+    print(f"Updated {updated_count} of {len(results)} employees in one batch")
+    return results
+
+def delete_employees(employee_ids):
+    """
+    Delete many employees in a single transaction.
+
+    Returns one result per id: {"id": ..., "success": True|False}
+    """
+    results = []
+    deleted_count = 0
+    conn = get_connection()
+    with conn:
+        for employee_id in employee_ids:
+            cursor = conn.execute("DELETE FROM employees WHERE id = ?", (employee_id,))
+            if cursor.rowcount:
+                deleted_count += 1
+                results.append({"id": employee_id, "success": True})
+            else:
+                results.append({"id": employee_id, "success": False, "error": "Employee not found"})
+    print(f"Deleted {deleted_count} of {len(results)} employees in one batch")
+    return results
+
+def get_all_employees():
+    """Get all employees"""
+    employees = load_employees()
+    print(f"Returning all {len(employees)} employees")
+    return employees
+
+def find_employees(status=None, department=None, start_date_from=None, start_date_to=None):
+    """
+    Find employees using the indexed columns.
+
+    status may be a single value or a list; it is normalized with
+    normalize_status, and rows written before normalization are matched
+    through every alias of the requested statuses.
+    start_date_from / start_date_to are inclusive YYYY-MM-DD bounds.
+    """
+    clauses = []
+    params = []
+    if status is not None:
+        statuses = set(normalize_status(s) for s in ([status] if isinstance(status, str) else status))
+        spellings = set(s.lower() for s in statuses if isinstance(s, str))
+        spellings.update(alias for alias, canonical in STATUS_ALIASES.items() if canonical in statuses)
+        spellings = sorted(spellings)
+        clauses.append("lower(status) IN ({})".format(", ".join("?" for _ in spellings)))
+        params.extend(spellings)
+    if department is not None:
+        clauses.append("department = ?")
+        params.append(department)
+    if start_date_from is not None:
+        clauses.append("startDate >= ?")
+        params.append(start_date_from)
+    if start_date_to is not None:
+        clauses.append("startDate <= ?")
+        params.append(start_date_to)
+
+    query = "SELECT data FROM employees"
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    query += " ORDER BY rowid"
+    return _rows_to_employees(get_connection().execute(query, params).fetchall())
+
+def count_by_status():
+    """Return {canonical status: number of employees}"""
+    counts = {}
+    rows = get_connection().execute("SELECT status, COUNT(*) AS n FROM employees GROUP BY status").fetchall()
+    for row in rows:
+        status = normalize_status(row["status"])
+        counts[status] = counts.get(status, 0) + row["n"]
+    return counts
+
+def count_by_department():
+    """Return {department: number of employees}"""
+    rows = get_connection().execute("SELECT department, COUNT(*) AS n FROM employees GROUP BY department").fetchall()
+    return {row["department"]: row["n"] for row in rows}
+
+def count_created_since(since):
+    """Return how many employees were created at or after a datetime, from the time encoded in their ids"""
+    lowest_id, lowest_legacy_id = created_since_bounds(since)
+    row = get_connection().execute(
+        "SELECT COUNT(*) AS n FROM employees WHERE CAST(id AS INTEGER) >= ? "
+        "OR CAST(id AS INTEGER) BETWEEN ? AND ?",
+        (lowest_id, lowest_legacy_id, id_allocator.LEGACY_ID_LIMIT - 1)
+    ).fetchone()
+    return row["n"]
+
+def employee_stats(days=7):
+    """Return the dashboard numbers; "recent" counts employees created in the last `days` days"""
+    since = datetime.now() - timedelta(days=days)
+    return build_employee_stats(count_by_status(), count_by_department(), count_created_since(since))
+
+def migrate_from_json(json_file=EMPLOYEES_FILE):
+    """Import every employee from a data_store JSON file, replacing the database contents"""
+    if not os.path.exists(json_file):
+        print(f"Employees file not found: {json_file}")
+        return 0
+
+    with open(json_file, 'r') as f:
+        employees = json.load(f)
+
+    # Records without an id, or with a duplicate one, get a fresh id so nothing is dropped
+    seen = set()
+    for employee in employees:
+        if not employee.get("id") or employee["id"] in seen:
+            employee["id"] = id_allocator.next_id()
+            print(f"Assigning new ID {employee['id']} to {employee.get('name')}")
+        seen.add(employee["id"])
+        if "status" in employee:
+            employee["status"] = normalize_status(employee["status"])
+
+    save_employees(employees)
+    print(f"Migrated {len(employees)} employees from {json_file} to {EMPLOYEES_DB}")
+    return len(employees)
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "migrate":
+        migrate_from_json(sys.argv[2] if len(sys.argv) > 2 else EMPLOYEES_FILE)
+    else:
+        print("Usage: python sqlite_store.py migrate [path/to/employees.json]")
+        sys.exit(1)
@@ -5,12 +5,13 @@ import os
 from datetime import datetime
 import time
 
-# Try to import the data_access module (for standalone mode)
+# Try to import the shared storage engine (for standalone mode)
 try:
-    import data_access
-    HAS_DATA_ACCESS = True
+    import data_store
+    data_store = data_store.storage_backend()
+    HAS_DATA_STORE = True
 except ImportError:
-    HAS_DATA_ACCESS = False
+    HAS_DATA_STORE = False
 
 # Configure the app
 st.set_page_config(
@@ -25,6 +26,7 @@ API_URL = os.environ.get('API_URL', 'http://localhost:5000/api')
 EMPLOYEES_API = f"{API_URL}/admin/employees"
 AUTH_CHECK_API = f"{API_URL}/admin/check-auth"
 LOGIN_API = f"{API_URL}/admin/login"
+STATS_API = f"{EMPLOYEES_API}/stats"
 
 # Check if API is available
 API_AVAILABLE = False
@@ -81,10 +83,10 @@ def login(username, password):
             return False
 
 def fetch_employees():
-    # If API is not available and data_access is available, use local data
-    if not st.session_state.api_available and HAS_DATA_ACCESS:
+    # If API is not available and data_store is available, use local data
+    if not st.session_state.api_available and HAS_DATA_STORE:
         try:
-            employees = data_access.load_employees()
+            employees = data_store.load_employees()
             st.session_state.employees = employees
             return employees
         except Exception as e:
@@ -101,11 +103,11 @@ def fetch_employees():
                 return data['employees']
         return []
     except Exception as e:
-        # If API request fails and data_access is available, try local data as fallback
-        if HAS_DATA_ACCESS:
+        # If API request fails and data_store is available, try local data as fallback
+        if HAS_DATA_STORE:
             try:
                 st.warning("Falling back to local data.")
-                employees = data_access.load_employees()
+                employees = data_store.load_employees()
                 st.session_state.employees = employees
                 return employees
             except Exception as inner_e:
@@ -115,6 +117,26 @@ def fetch_employees():
             st.error(f"Error fetching employees: {str(e)}")
             return []
 
+EMPTY_STATS = {"total": 0, "departments": 0, "recent": 0, "completed": 0}
+
+def fetch_stats():
+    # The counts come from the store's indexes, so the dashboard never
+    # loads every employee just to count them
+    if st.session_state.api_available:
+        try:
+            response = requests.get(STATS_API)
+            if response.status_code == 200:
+                return response.json()
+        except Exception as e:
+            if not HAS_DATA_STORE:
+                st.error(f"Error fetching employee stats: {str(e)}")
+    if HAS_DATA_STORE:
+        try:
+            return data_store.employee_stats()
+        except Exception as e:
+            st.error(f"Error counting local employee data: {str(e)}")
+    return EMPTY_STATS
+
 def format_date(date_str):
     if not date_str:
         return "N/A"
@@ -166,26 +188,24 @@ def show_dashboard():
         with st.spinner("Loading data..."):
             fetch_employees()
     
-    # Display stats
+    # Display stats, counted by the API or the local store
     col1, col2, col3, col4 = st.columns(4)
     
     employees = st.session_state.employees
+    stats = fetch_stats()
     
     with col1:
-        st.metric("Total Employees", len(employees))
+        st.metric("Total Employees", stats["total"])
     
     with col2:
-        departments = set([emp.get('department') for emp in employees if emp.get('department')])
-        st.metric("Departments", len(departments))
+        st.metric("Departments", stats["departments"])
     
     with col3:
         # Recent employees (last 7 days)
-        recent_count = 0
-        st.metric("Recent Hires", recent_count)
+        st.metric("Recent Hires", stats["recent"])
     
     with col4:
-        completed_count = len([emp for emp in employees if emp.get('status', '').lower() in ['complete', 'completed']])
-        st.metric("Completed Onboarding", completed_count)
+        st.metric("Completed Onboarding", stats["completed"])
     
     # Display employees table
     st.subheader("Employee List")
@@ -337,16 +357,17 @@ def show_add_employee():
                             json=employee_data,
                             headers={"Content-Type": "application/json"}
                         )
-                        if response.status_code == 200:
+                        # The API answers 202 Accepted once the onboarding job is queued
+                        if response.ok:
                             success = True
                     except Exception as e:
                         st.error(f"Error adding employee via API: {str(e)}")
                         # Will try fallback below
                 
-                # If API failed or not available, try using local data access
-                if not success and HAS_DATA_ACCESS:
+                # If API failed or not available, try using the local data store
+                if not success and HAS_DATA_STORE:
                     try:
-                        data_access.add_employee(employee_data)
+                        data_store.add_employee(employee_data)
                         success = True
                     except Exception as e:
                         st.error(f"Error adding employee locally: {str(e)}")
@@ -2,7 +2,10 @@ import streamlit as st
 import json
 import os
 from datetime import datetime
-import data_access
+import data_store
+
+# Same storage engine as the API, selected by HR_STORAGE_BACKEND
+data_store = data_store.storage_backend()
 
 # Configure the app
 st.set_page_config(
@@ -68,43 +71,26 @@ def show_dashboard():
     # Fetch data if needed
     if not st.session_state.employees:
         with st.spinner("Loading data..."):
-            st.session_state.employees = data_access.load_employees()
+            st.session_state.employees = data_store.load_employees()
     
-    # Display stats
+    # Display stats, counted from the store's indexes
     col1, col2, col3, col4 = st.columns(4)
     
     employees = st.session_state.employees
+    stats = data_store.employee_stats()
     
     with col1:
-        st.metric("Total Employees", len(employees))
+        st.metric("Total Employees", stats["total"])
     
     with col2:
-        departments = set([emp.get('department') for emp in employees if emp.get('department')])
-        st.metric("Departments", len(departments))
+        st.metric("Departments", stats["departments"])
     
     with col3:
         # Recent employees (last 7 days)
-        # Calculate from created_at timestamp
-        now = datetime.now().timestamp()
-        week_ago = now - (7 * 24 * 60 * 60)
-        recent_count = 0
-        
-        for emp in employees:
-            created_at = emp.get('created_at')
-            if created_at:
-                try:
-                    # Handle ISO format timestamp
-                    created_time = datetime.fromisoformat(created_at.replace('Z', '+00:00')).timestamp()
-                    if created_time > week_ago:
-                        recent_count += 1
-                except (ValueError, TypeError):
-                    pass
-        
-        st.metric("Recent Hires", recent_count)
+        st.metric("Recent Hires", stats["recent"])
     
     with col4:
-        completed_count = len([emp for emp in employees if emp.get('status', '').lower() in ['complete', 'completed']])
-        st.metric("Completed Onboarding", completed_count)
+        st.metric("Completed Onboarding", stats["completed"])
     
     # Display employees table
     st.subheader("Employee List")
@@ -142,7 +128,7 @@ def show_employees():
     # Fetch data if needed
     if not st.session_state.employees:
         with st.spinner("Loading data..."):
-            st.session_state.employees = data_access.load_employees()
+            st.session_state.employees = data_store.load_employees()
     
     # Add new employee button
     if st.button("Add New Employee", type="primary"):
@@ -247,10 +233,10 @@ def show_add_employee():
                 if jira: employee_data["systemAccess"].append("Jira")
                 
                 # Add to database
-                data_access.add_employee(employee_data)
+                data_store.add_employee(employee_data)
                 
                 # Update session state
-                st.session_state.employees = data_access.load_employees()
+                st.session_state.employees = data_store.load_employees()
                 
                 st.success(f"Employee {name} added successfully!")
                 st.session_state.active_tab = "Employees"
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Tests for ChunkedMap: it behaves like an insertion-ordered dict, and edits
+never change a map that was already finished.
+
+Run with pytest or directly:
+
+    python test_chunked_map.py
+"""
+
+import random
+
+import chunked_map
+from chunked_map import ChunkedMap
+
+def test_edits_match_a_dict():
+    """Random sets, replaces and pops give the same contents and order as a dict"""
+    rng = random.Random(7)
+    expected = {}
+    current = ChunkedMap()
+    for _ in range(40):
+        editor = current.edit()
+        for _ in range(rng.randint(1, 400)):
+            key = f"k{rng.randint(0, 3000)}"
+            if rng.random() < 0.3:
+                assert editor.pop(key) == expected.pop(key, None)
+            else:
+                value = rng.random()
+                editor[key] = value
+                expected[key] = value
+        current = editor.finish()
+        assert len(current) == len(expected)
+        assert list(current.items()) == list(expected.items())
+        assert all(current[key] == value for key, value in expected.items())
+        assert "missing" not in current and current.get("missing", 1) == 1
+
+def test_finished_maps_are_not_modified():
+    """Editing a derived map leaves the map it came from as it was"""
+    original = ChunkedMap.from_items((str(number), number) for number in range(1000))
+    editor = original.edit()
+    editor["5"] = "changed"
+    editor.pop("6")
+    editor["new"] = 1
+    first = editor.finish()
+    # The editor keeps working after finish() without touching `first`
+    editor["7"] = "changed"
+    second = editor.finish()
+
+    assert original["5"] == 5 and original["6"] == 6 and "new" not in original
+    assert first["5"] == "changed" and "6" not in first and first["7"] == 7
+    assert second["7"] == "changed"
+    assert len(original) == 1000 and len(first) == 1000 and len(second) == 1000
+
+def test_index_grows_and_deletes_are_repacked():
+    """Adding past the bucket size grows the index; emptying chunks repacks them"""
+    editor = ChunkedMap().edit()
+    for number in range(chunked_map.BUCKET_SIZE * 4):
+        editor[number] = number
+    grown = editor.finish()
+    assert len(grown.where) >= 4
+    assert all(grown[number] == number for number in range(len(grown)))
+
+    editor = grown.edit()
+    for number in range(0, len(grown) - 10):
+        editor.pop(number)
+    packed = editor.finish()
+    assert len(packed.chunks) == 1
+    assert list(packed) == list(range(len(grown) - 10, len(grown)))
+
+if __name__ == "__main__":
+    tests = [value for name, value in sorted(globals().items()) if name.startswith("test_") and callable(value)]
+    for test in tests:
+        print(f"=== {test.__name__} ===")
+        test()
+    print(f"\nAll {len(tests)} chunked map tests passed!")
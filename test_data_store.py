@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Tests for the employee data store: the change log and its replay, writers
+in several processes sharing the cross-process file lock, and the
+copy-on-write versions readers use without locking.
+
+Every test works in its own temporary data directory, so the files in
+data/ are never touched. Run with pytest or directly:
+
+    python test_data_store.py
+"""
+
+import os
+import json
+import shutil
+import tempfile
+import multiprocessing
+from contextlib import contextmanager
+
+import data_store
+import id_allocator
+
+PATH_SETTINGS = ("DATA_DIR", "EMPLOYEES_FILE", "EMPLOYEES_LOG", "EMPLOYEES_SNAPSHOT", "LOG_STRUCTURED", "REPOSITORY")
+
+@contextmanager
+def temp_store(log_structured=False):
+    """Point data_store at an empty temporary data directory with a fresh repository"""
+    saved = {name: getattr(data_store, name) for name in PATH_SETTINGS}
+    directory = tempfile.mkdtemp(prefix="hr-data-")
+    data_store.DATA_DIR = directory
+    data_store.EMPLOYEES_FILE = os.path.join(directory, "employees.json")
+    data_store.EMPLOYEES_LOG = os.path.join(directory, "employees.log")
+    data_store.EMPLOYEES_SNAPSHOT = os.path.join(directory, "employees.snapshot")
+    data_store.LOG_STRUCTURED = log_structured
+    data_store.REPOSITORY = data_store.EmployeeRepository()
+    # Claim worker id slots here rather than in data/worker_ids
+    saved_worker_ids = id_allocator.WORKER_IDS_DIR
+    id_allocator.WORKER_IDS_DIR = os.path.join(directory, "worker_ids")
+    id_allocator.ALLOCATOR.reset()
+    # Start without the sample employees
+    data_store.write_employees_file([])
+    try:
+        yield directory
+    finally:
+        for name, value in saved.items():
+            setattr(data_store, name, value)
+        id_allocator.WORKER_IDS_DIR = saved_worker_ids
+        id_allocator.ALLOCATOR.reset()
+        shutil.rmtree(directory, ignore_errors=True)
+
+def new_employee(name, department="Engineering"):
+    return {"name": name, "position": "Engineer", "department": department, "startDate": "2025-01-01"}
+
+def reload_employees():
+    """Read the store from disk the way a freshly started process would"""
+    data_store.REPOSITORY = data_store.EmployeeRepository()
+    return data_store.load_employees()
+
+def log_lines():
+    with open(data_store.EMPLOYEES_LOG, 'r') as f:
+        return f.read().splitlines()
+
+#############################################
+# Change log
+#############################################
+
+def test_log_append_and_replay():
+    """Adds, updates and deletes are appended to the log and replayed on load"""
+    with temp_store(log_structured=True):
+        first = data_store.add_employee(new_employee("Ada"))
+        second = data_store.add_employee(new_employee("Grace"))
+        data_store.update_employee(first["id"], {"status": "In Progress"})
+        data_store.delete_employee(second["id"])
+
+        assert [json.loads(line)["op"] for line in log_lines()] == ["add", "add", "update", "delete"]
+        # The snapshot was not rewritten
+        assert json.load(open(data_store.EMPLOYEES_FILE)) == []
+
+        employees = reload_employees()
+        assert [employee["id"] for employee in employees] == [first["id"]]
+        assert employees[0]["status"] == "In Progress"
+
+def test_torn_log_tail_is_trimmed_before_append():
+    """A partial last line left by a crash is dropped, and later appends are not lost"""
+    with temp_store(log_structured=True):
+        first = data_store.add_employee(new_employee("Ada"))
+        # Crash in the middle of the next append: no trailing newline
+        with open(data_store.EMPLOYEES_LOG, 'a') as f:
+            f.write('{"op":"add","record":{"id":"1","na')
+
+        second = data_store.add_employee(new_employee("Grace"))
+
+        lines = log_lines()
+        assert len(lines) == 2
+        assert all(json.loads(line)["op"] == "add" for line in lines)
+        assert [employee["id"] for employee in reload_employees()] == [first["id"], second["id"]]
+
+def test_replay_after_crash_during_compaction():
+    """A crash after the new snapshot is written but before the log is cleared loses and duplicates nothing"""
+    with temp_store(log_structured=True):
+        employee = data_store.add_employee(new_employee("Ada"))
+        data_store.update_employee(employee["id"], {"status": "Completed"})
+        other = data_store.add_employee(new_employee("Grace"))
+        data_store.delete_employee(other["id"])
+
+        # The first half of compact(): fold the log into the snapshot...
+        assert data_store.write_employees_file(data_store.REPOSITORY.current().all())
+        # ...and crash before the log is truncated
+        assert len(log_lines()) == 4
+
+        employees = reload_employees()
+        assert [record["id"] for record in employees] == [employee["id"]]
+        assert employees[0]["status"] == "Completed"
+
+        # Compacting again leaves the same records and an empty log
+        data_store.REPOSITORY.compact()
+        assert log_lines() == []
+        assert [record["id"] for record in reload_employees()] == [employee["id"]]
+
+def test_failed_log_append_publishes_nothing():
+    """A change that cannot be written raises and is not visible to readers"""
+    with temp_store(log_structured=True):
+        data_store.add_employee(new_employee("Ada"))
+        # Appending to a directory fails
+        os.remove(data_store.EMPLOYEES_LOG)
+        os.mkdir(data_store.EMPLOYEES_LOG)
+        try:
+            data_store.add_employee(new_employee("Grace"))
+        except IOError:
+            pass
+        else:
+            raise AssertionError("expected IOError")
+        assert [record["name"] for record in data_store.REPOSITORY.version.all()] == ["Ada"]
+        os.rmdir(data_store.EMPLOYEES_LOG)
+
+def test_failed_snapshot_write_publishes_nothing():
+    """Updates, deletes and batches that cannot be written leave the records as they were"""
+    with temp_store():
+        employee = data_store.add_employee(new_employee("Ada"))
+        saved = data_store.write_employees_file
+        data_store.write_employees_file = lambda employees: False
+        try:
+            for change in (lambda: data_store.update_employee(employee["id"], {"status": "Completed"}),
+                           lambda: data_store.delete_employee(employee["id"]),
+                           lambda: data_store.add_employees([new_employee("Grace")])):
+                try:
+                    change()
+                except IOError:
+                    pass
+                else:
+                    raise AssertionError("expected IOError")
+            assert data_store.save_employees([]) is False
+        finally:
+            data_store.write_employees_file = saved
+        employees = data_store.load_employees()
+        assert [(record["name"], record["status"]) for record in employees] == [("Ada", "New")]
+
+#############################################
+# Batch operations
+#############################################
+
+def test_batch_add_update_delete():
+    """The batch functions report one result per input and apply only the valid ones"""
+    with temp_store(log_structured=True):
+        results = data_store.add_employees([new_employee("Ada"), {"name": "No fields"}, "not a record",
+                                            new_employee("Grace")])
+        assert [result["success"] for result in results] == [True, False, False, True]
+        assert results[1]["error"] == "Missing required field: position"
+        ada, grace = results[0]["employee"], results[3]["employee"]
+        # One log line per change, written together
+        assert len(log_lines()) == 2
+
+        results = data_store.update_employees({ada["id"]: {"status": "Completed"}, "missing": {"status": "New"},
+                                               grace["id"]: "not a patch"})
+        assert [result["success"] for result in results] == [True, False, False]
+        assert results[0]["employee"]["name"] == "Ada"
+
+        results = data_store.delete_employees([grace["id"], grace["id"], "missing"])
+        assert [result["success"] for result in results] == [True, False, False]
+
+        employees = reload_employees()
+        assert [(employee["name"], employee["status"]) for employee in employees] == [("Ada", "Completed")]
+
+#############################################
+# Status and department indexes
+#############################################
+
+def test_indexes_follow_updates_and_deletes():
+    """find_employees and the counts use the indexes, which track status and department changes"""
+    with temp_store():
+        ada = data_store.add_employee(new_employee("Ada"))
+        grace = data_store.add_employee(new_employee("Grace", department="Sales"))
+        linus = data_store.add_employee(new_employee("Linus"))
+        data_store.update_employee(ada["id"], {"status": "complete", "department": "Sales"})
+        data_store.delete_employee(linus["id"])
+
+        assert [employee["name"] for employee in data_store.find_employees(status="Completed")] == ["Ada"]
+        assert sorted(employee["name"] for employee in data_store.find_employees(department="Sales")) == ["Ada", "Grace"]
+        assert sorted(employee["name"] for employee in data_store.find_employees(status=["new", "completed"],
+                                                                                  department="Sales")) == ["Ada", "Grace"]
+        assert data_store.find_employees(department="Engineering") == []
+        assert data_store.count_by_status() == {"New": 1, "Completed": 1}
+        assert data_store.count_by_department() == {"Sales": 2}
+        # The counts survive a reload from disk
+        reload_employees()
+        assert data_store.count_by_status() == {"New": 1, "Completed": 1}
+        assert grace["id"] in data_store.REPOSITORY.current().by_status["New"]
+
+def test_employee_stats_counts_recent_hires_from_ids():
+    """The dashboard numbers come from the indexes and the creation time in the ids"""
+    with temp_store():
+        data_store.save_employees(data_store.generate_sample_employees())
+        data_store.add_employee(new_employee("Ada", department="Sales"))
+        stats = data_store.employee_stats()
+        assert stats["total"] == 4
+        assert stats["departments"] == 3
+        assert stats["completed"] == 1
+        assert stats["pending"] == 3
+        # Only the new employee was created in the last week; the samples are from 2023
+        assert stats["recent"] == 1
+        assert data_store.employee_stats(days=10000)["recent"] == 4
+
+#############################################
+# Storage backend selection
+#############################################
+
+def test_storage_backend_follows_the_environment():
+    """HR_STORAGE_BACKEND picks the module every app uses; JSON is the default"""
+    saved = os.environ.pop("HR_STORAGE_BACKEND", None)
+    try:
+        assert data_store.storage_backend() is data_store
+        os.environ["HR_STORAGE_BACKEND"] = "SQLite"
+        import sqlite_store
+        assert data_store.storage_backend() is sqlite_store
+    finally:
+        os.environ.pop("HR_STORAGE_BACKEND", None)
+        if saved is not None:
+            os.environ["HR_STORAGE_BACKEND"] = saved
+
+def test_data_access_shares_the_repository():
+    """The legacy data_access module writes through the same cached repository"""
+    import data_access
+    if data_access._store is not data_store:
+        return
+    with temp_store():
+        employee = data_access.add_employee(new_employee("Ada"))
+        # No reload from disk is needed to see it
+        assert data_store.REPOSITORY.version.records.get(employee["id"]) is not None
+        assert [record["name"] for record in data_access.load_employees()] == ["Ada"]
+
+#############################################
+# Cross-process writers
+#############################################
+
+def add_employees_in_child(prefix, count):
+    for index in range(count):
+        data_store.add_employee(new_employee(f"{prefix}-{index}"))
+
+def run_writers(processes=4, count=25):
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=add_employees_in_child, args=(f"w{number}", count))
+               for number in range(processes)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(60)
+        assert worker.exitcode == 0
+    return processes * count
+
+def test_concurrent_processes_keep_every_write():
+    """Processes rewriting the snapshot under FILE_LOCK never lose each other's records"""
+    with temp_store(log_structured=False):
+        expected = run_writers()
+        employees = reload_employees()
+        assert len(employees) == expected
+        assert len({employee["id"] for employee in employees}) == expected
+
+def test_concurrent_processes_append_to_the_log():
+    """Processes appending to the log under FILE_LOCK write whole lines and lose nothing"""
+    with temp_store(log_structured=True):
+        expected = run_writers()
+        assert len(log_lines()) == expected
+        employees = reload_employees()
+        assert len({employee["id"] for employee in employees}) == expected
+
+#############################################
+# Copy-on-write versions
+#############################################
+
+def test_published_versions_are_not_modified():
+    """A version a reader holds keeps its records and indexes while writers publish new ones"""
+    with temp_store():
+        first = data_store.add_employee(new_employee("Ada"))
+        second = data_store.add_employee(new_employee("Grace", department="Sales"))
+        before = data_store.REPOSITORY.current()
+        records_before = dict(before.records)
+
+        data_store.update_employee(first["id"], {"status": "Completed", "department": "Sales"})
+        data_store.delete_employee(second["id"])
+
+        after = data_store.REPOSITORY.current()
+        assert after is not before
+        assert before.records == records_before
+        assert before.ids_with(statuses=["New"]) == [first["id"], second["id"]]
+        assert before.ids_with(department="Engineering") == [first["id"]]
+        assert after.ids_with(statuses=["Completed"], department="Sales") == [first["id"]]
+        assert second["id"] not in after.records
+
+def test_unchanged_records_are_shared():
+    """Deriving a version shares the records it does not change"""
+    version = data_store.EmployeeVersion.build([
+        {"id": "1", "status": "New", "department": "Engineering"},
+        {"id": "2", "status": "New", "department": "Sales"},
+    ])
+    derived = version.with_entries([{"op": "update", "record": {"id": "1", "status": "Completed",
+                                                                "department": "Engineering"}}])
+    assert derived.records["2"] is version.records["2"]
+    assert derived.by_department["Sales"] is version.by_department["Sales"]
+    assert version.records["1"]["status"] == "New"
+
+def test_large_version_copies_only_touched_chunks():
+    """An update copies one chunk of the id index, not every record pointer"""
+    version = data_store.EmployeeVersion.build([
+        {"id": str(number), "status": "New", "department": "Engineering"} for number in range(5000)
+    ])
+    derived = version.with_entries([{"op": "update", "record": {"id": "2500", "status": "New",
+                                                                "department": "Engineering"}}])
+    copied = [old is not new for old, new in zip(version.records.chunks, derived.records.chunks)]
+    assert sum(copied) == 1
+    # The record kept its chunk, so the key -> chunk index is shared whole
+    assert all(old is new for old, new in zip(version.records.where, derived.records.where))
+    assert list(derived.records) == list(version.records)
+
+def test_load_employees_returns_copies():
+    """Callers modifying loaded records do not change the cached version"""
+    with temp_store():
+        employee = data_store.add_employee(new_employee("Ada"))
+        loaded = data_store.load_employees()
+        loaded[0]["name"] = "Changed"
+        assert data_store.get_employee(employee["id"])["name"] == "Ada"
+
+if __name__ == "__main__":
+    tests = [value for name, value in sorted(globals().items()) if name.startswith("test_") and callable(value)]
+    for test in tests:
+        print(f"=== {test.__name__} ===")
+        test()
+    print(f"\nAll {len(tests)} data store tests passed!")
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Tests for the offline fake LLM's role profiles: roles are matched by
+department first, and keywords only match whole words.
+
+Run with pytest or directly:
+
+    python test_fake_llm.py
+"""
+
+import fake_llm
+
+def access_for(position, department):
+    return fake_llm.role_profile(position, department)[1]
+
+def test_department_is_matched_before_position():
+    """A Finance accountant gets the finance profile, an account manager in Sales the sales one"""
+    assert "ERP" in access_for("Accountant", "Finance")
+    assert "ERP" in access_for("Data Analyst", "Finance")
+    assert "CRM" in access_for("Account Manager", "Sales")
+    assert "GitHub" in access_for("Analyst", "Engineering")
+
+def test_keywords_match_whole_words():
+    """The keyword account does not match Accountant, and hr does not match Three"""
+    assert "CRM" not in access_for("Senior Accountant", "Operations")
+    assert "ERP" in access_for("Senior Accountant", "Operations")
+    assert access_for("Three", "Ops") == fake_llm.DEFAULT_PROFILE[1]
+
+if __name__ == "__main__":
+    tests = [value for name, value in sorted(globals().items()) if name.startswith("test_") and callable(value)]
+    for test in tests:
+        print(f"=== {test.__name__} ===")
+        test()
+    print(f"\nAll {len(tests)} fake LLM tests passed!")
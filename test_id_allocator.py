@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Tests for the employee ID allocator: IDs stay unique across threads and
+across forked worker processes, sort by creation time, and survive a clock
+that goes backwards.
+
+Worker id slots are claimed in a temporary directory instead of
+data/worker_ids. Run with pytest or directly:
+
+    python test_id_allocator.py
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import multiprocessing
+from contextlib import contextmanager
+
+import id_allocator
+
+@contextmanager
+def temp_worker_ids():
+    """Claim worker id slots in a temporary directory, without HR_WORKER_ID"""
+    saved_dir = id_allocator.WORKER_IDS_DIR
+    saved_env = os.environ.pop("HR_WORKER_ID", None)
+    directory = tempfile.mkdtemp(prefix="hr-worker-ids-")
+    id_allocator.WORKER_IDS_DIR = directory
+    # The shared allocator claims its slot again, in the temporary directory
+    id_allocator.ALLOCATOR.reset()
+    try:
+        yield directory
+    finally:
+        id_allocator.ALLOCATOR.reset()
+        id_allocator.WORKER_IDS_DIR = saved_dir
+        if saved_env is not None:
+            os.environ["HR_WORKER_ID"] = saved_env
+        shutil.rmtree(directory, ignore_errors=True)
+
+def test_ids_are_unique_across_threads():
+    """Threads sharing one allocator never get the same ID"""
+    with temp_worker_ids():
+        allocator = id_allocator.IdAllocator()
+        results = [[] for _ in range(8)]
+
+        def allocate(ids):
+            for _ in range(5000):
+                ids.append(allocator.next_id())
+
+        threads = [threading.Thread(target=allocate, args=(ids,)) for ids in results]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        ids = [value for ids in results for value in ids]
+        assert len(set(ids)) == len(ids) == 8 * 5000
+        # Each thread sees its own IDs in increasing order
+        assert all(ids == sorted(ids) for ids in results)
+
+def allocate_in_child(connection, count):
+    connection.send([id_allocator.next_id() for _ in range(count)])
+    connection.close()
+
+def test_ids_are_unique_across_forked_processes():
+    """Forked workers claim their own worker id, so their IDs never collide with the parent's or each other's"""
+    with temp_worker_ids():
+        # The parent claims a slot before forking, as a preloading server would
+        parent_ids = [id_allocator.next_id() for _ in range(1000)]
+
+        context = multiprocessing.get_context("fork")
+        pipes = []
+        workers = []
+        for _ in range(4):
+            receiver, sender = context.Pipe(duplex=False)
+            worker = context.Process(target=allocate_in_child, args=(sender, 5000))
+            worker.start()
+            sender.close()
+            pipes.append(receiver)
+            workers.append(worker)
+        child_ids = [receiver.recv() for receiver in pipes]
+        for worker in workers:
+            worker.join(60)
+            assert worker.exitcode == 0
+
+        parent_ids += [id_allocator.next_id() for _ in range(1000)]
+        ids = parent_ids + [value for ids in child_ids for value in ids]
+        assert len(set(ids)) == len(ids) == 2000 + 4 * 5000
+
+        worker_ids = {(int(ids[0]) >> id_allocator.SEQUENCE_BITS) & id_allocator.MAX_WORKER_ID
+                      for ids in [parent_ids] + child_ids}
+        assert len(worker_ids) == 5
+
+def test_ids_sort_by_creation_time():
+    """Sorting IDs numerically sorts them by the time they were made"""
+    allocator = id_allocator.IdAllocator(worker_id=1)
+    ids = [allocator.next_id() for _ in range(10000)]
+    assert ids == sorted(ids)
+    assert id_allocator.id_timestamp(ids[0]) <= id_allocator.id_timestamp(ids[-1])
+
+@contextmanager
+def fake_clock(times):
+    """Make current_ms() return the given values in turn, and record sleeps"""
+    saved_clock, saved_sleep = id_allocator.current_ms, id_allocator.time.sleep
+    readings = iter(times)
+    sleeps = []
+    id_allocator.current_ms = lambda: next(readings)
+    id_allocator.time.sleep = sleeps.append
+    try:
+        yield sleeps
+    finally:
+        id_allocator.current_ms = saved_clock
+        id_allocator.time.sleep = saved_sleep
+
+def test_exhausted_sequence_sleeps_until_the_next_millisecond():
+    """Running out of sequence numbers while the clock is behind sleeps instead of spinning"""
+    allocator = id_allocator.IdAllocator(worker_id=1)
+    allocator.last_ms = 5000
+    allocator.sequence = id_allocator.MAX_SEQUENCE
+    # The clock went back 3 ms, then catches up after one sleep
+    with fake_clock([4997, 4997, 5001]) as sleeps:
+        value = allocator.next_id()
+    assert sleeps == [0.004]
+    assert value >> (id_allocator.WORKER_ID_BITS + id_allocator.SEQUENCE_BITS) == 5001
+    assert value & id_allocator.MAX_SEQUENCE == 0
+
+def test_large_clock_skew_raises():
+    """A clock far behind the last ID raises instead of blocking every writer"""
+    allocator = id_allocator.IdAllocator(worker_id=1)
+    allocator.last_ms = 100000
+    allocator.sequence = id_allocator.MAX_SEQUENCE
+    with fake_clock([50000, 50000]):
+        try:
+            allocator.next_id()
+        except RuntimeError:
+            pass
+        else:
+            raise AssertionError("expected RuntimeError")
+    # Nothing was handed out
+    assert allocator.last_ms == 100000
+
+def test_worker_id_out_of_range_is_rejected():
+    """HR_WORKER_ID must fit in the worker id bits instead of silently wrapping onto another worker"""
+    with temp_worker_ids():
+        for value in ("1024", "-1", "abc"):
+            os.environ["HR_WORKER_ID"] = value
+            try:
+                id_allocator.claim_worker_id()
+            except ValueError:
+                pass
+            else:
+                raise AssertionError(f"HR_WORKER_ID={value} was accepted")
+        os.environ["HR_WORKER_ID"] = str(id_allocator.MAX_WORKER_ID)
+        assert id_allocator.claim_worker_id() == (id_allocator.MAX_WORKER_ID, None)
+        del os.environ["HR_WORKER_ID"]
+
+if __name__ == "__main__":
+    tests = [value for name, value in sorted(globals().items()) if name.startswith("test_") and callable(value)]
+    for test in tests:
+        print(f"=== {test.__name__} ===")
+        test()
+    print(f"\nAll {len(tests)} ID allocator tests passed!")
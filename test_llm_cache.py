@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Tests for the LLM response cache: keys, TTL and LRU limits, and workers
+sharing one cache file without overwriting each other's entries.
+
+Every test uses a cache file in a temporary directory. Run with pytest or
+directly:
+
+    python test_llm_cache.py
+"""
+
+import os
+import json
+import time
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+import llm_cache
+
+@contextmanager
+def temp_cache_path():
+    directory = tempfile.mkdtemp(prefix="hr-llm-cache-")
+    try:
+        yield os.path.join(directory, "llm_cache.json")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+def make_cache(path, **options):
+    # A long flush delay: the tests flush explicitly
+    settings = dict(max_entries=100, ttl=3600, enabled=True, flush_seconds=3600)
+    settings.update(options)
+    return llm_cache.LLMCache(path=path, **settings)
+
+def read_keys(path):
+    with open(path, 'r') as f:
+        return [key for key, entry in json.load(f)["entries"]]
+
+def test_keys_ignore_spacing_and_case():
+    """Inputs that differ only in whitespace, case or set order share a key; versions do not"""
+    key = llm_cache.cache_key("equipment", 1, {"position": "Software  Engineer", "tags": {"a", "b"}})
+    assert key == llm_cache.cache_key("equipment", 1, {"position": "software engineer", "tags": {"b", "a"}})
+    assert key != llm_cache.cache_key("equipment", 2, {"position": "software engineer", "tags": {"a", "b"}})
+
+def test_get_returns_copies():
+    """Callers modifying a cached result do not change the cache"""
+    # No file: nothing to flush
+    cache = make_cache(None)
+    cache.put("equipment", 1, {"role": "x"}, {"items": ["Laptop"]})
+    cache.get("equipment", 1, {"role": "x"})["items"].append("Phone")
+    assert cache.get("equipment", 1, {"role": "x"}) == {"items": ["Laptop"]}
+    assert cache.stats()["hits"] == 2
+
+def test_expired_entries_are_misses():
+    """Entries older than the TTL are dropped, in memory and when read from the file"""
+    with temp_cache_path() as path:
+        cache = make_cache(path, ttl=0.05)
+        cache.put("equipment", 1, {}, ["Laptop"])
+        cache.flush()
+        time.sleep(0.1)
+        assert cache.get("equipment", 1, {}) is None
+        assert make_cache(path, ttl=0.05).read_file() == {}
+
+def test_least_recently_used_entry_is_evicted():
+    """Past max_entries the entry used longest ago is dropped"""
+    cache = make_cache(None, max_entries=2)
+    cache.put("node", 1, "a", "A")
+    cache.put("node", 1, "b", "B")
+    cache.get("node", 1, "a")
+    cache.put("node", 1, "c", "C")
+    assert cache.get("node", 1, "b") is None
+    assert cache.get("node", 1, "a") == "A" and cache.get("node", 1, "c") == "C"
+
+def test_flush_merges_with_other_workers():
+    """Two workers flushing the same file keep both sets of entries and share them"""
+    with temp_cache_path() as path:
+        first, second = make_cache(path), make_cache(path)
+        first.put("node", 1, "a", "from first")
+        second.put("node", 1, "b", "from second")
+        first.flush()
+        second.flush()
+
+        assert sorted(read_keys(path)) == sorted([llm_cache.cache_key("node", 1, "a"),
+                                                  llm_cache.cache_key("node", 1, "b")])
+        # The second worker took in the first one's entry while flushing
+        assert second.get("node", 1, "a") == "from first"
+        # A new worker sees both
+        assert make_cache(path).get("node", 1, "b") == "from second"
+
+def test_newest_copy_of_a_key_wins():
+    """When two workers cached the same key, the later answer is kept"""
+    with temp_cache_path() as path:
+        first, second = make_cache(path), make_cache(path)
+        first.put("node", 1, "a", "old")
+        second.put("node", 1, "a", "new")
+        second.flush()
+        first.flush()
+        assert make_cache(path).get("node", 1, "a") == "new"
+        assert first.get("node", 1, "a") == "new"
+
+def test_clear_replaces_the_file():
+    """clear() empties the file instead of merging the old entries back"""
+    with temp_cache_path() as path:
+        cache = make_cache(path)
+        cache.put("node", 1, "a", "A")
+        cache.flush()
+        cache.clear()
+        assert read_keys(path) == []
+        assert cache.stats()["entries"] == 0
+
+if __name__ == "__main__":
+    tests = [value for name, value in sorted(globals().items()) if name.startswith("test_") and callable(value)]
+    for test in tests:
+        print(f"=== {test.__name__} ===")
+        test()
+    print(f"\nAll {len(tests)} LLM cache tests passed!")
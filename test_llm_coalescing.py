@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Tests for the in-flight LLM call coalescer: concurrent calls with the same
+key are sent once, calls with other keys are not held back, and errors
+reach every waiting caller.
+
+Run with pytest or directly:
+
+    python test_llm_coalescing.py
+"""
+
+import time
+import asyncio
+import threading
+
+import llm_coalescing
+
+class SlowRunnable(object):
+    """Stand-in for a prompt | llm chain that answers once release is set"""
+    def __init__(self, error=None):
+        self.release = threading.Event()
+        self.error = error
+        self.sent = []
+
+    def invoke(self, inputs, config=None, **kwargs):
+        self.sent.append(inputs)
+        if inputs.get("wait", True):
+            self.release.wait(10)
+        if self.error is not None:
+            raise self.error
+        return {"answer": inputs["role"], "call": len(self.sent)}
+
+    async def ainvoke(self, inputs, config=None, **kwargs):
+        self.sent.append(inputs)
+        await asyncio.sleep(0.05)
+        return {"answer": inputs["role"], "call": len(self.sent)}
+
+def role_key(inputs):
+    return inputs["role"]
+
+def wait_until(condition, timeout=10):
+    deadline = time.time() + timeout
+    while not condition():
+        if time.time() > deadline:
+            raise AssertionError("condition never became true")
+        time.sleep(0.01)
+
+def run_threads(coalescer, inputs_list):
+    results, errors = [None] * len(inputs_list), [None] * len(inputs_list)
+
+    def call(index, inputs):
+        try:
+            results[index] = coalescer.invoke(inputs)
+        except Exception as e:
+            errors[index] = e
+
+    threads = [threading.Thread(target=call, args=(index, inputs)) for index, inputs in enumerate(inputs_list)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+def test_concurrent_calls_with_the_same_key_are_sent_once():
+    """Callers that arrive while a call is in flight share its answer"""
+    runnable = SlowRunnable()
+    coalescer = llm_coalescing.Coalescer(runnable, name="equipment", key=role_key)
+    threads, results, errors = run_threads(coalescer, [{"role": "Engineer", "hire": number} for number in range(5)])
+    wait_until(lambda: coalescer.stats()["requests"] == 5)
+
+    # A different role is not held back by the call in flight
+    assert coalescer.invoke({"role": "Designer", "wait": False})["answer"] == "Designer"
+
+    runnable.release.set()
+    for thread in threads:
+        thread.join(10)
+    assert errors == [None] * 5
+    assert all(result == results[0] for result in results)
+    assert len(runnable.sent) == 2
+    stats = coalescer.stats()
+    assert (stats["requests"], stats["sent"], stats["shared"]) == (6, 2, 4)
+
+    # Once answered, the next call for the role is sent again
+    assert coalescer.invoke({"role": "Engineer", "wait": False})["call"] == 3
+    assert coalescer.in_flight == {}
+
+def test_error_reaches_every_waiting_caller():
+    """A failed call raises in the sender and in every caller that waited for it"""
+    runnable = SlowRunnable(error=ValueError("rate limited"))
+    coalescer = llm_coalescing.Coalescer(runnable, key=role_key)
+    threads, results, errors = run_threads(coalescer, [{"role": "Engineer"} for _ in range(3)])
+    wait_until(lambda: coalescer.stats()["requests"] == 3)
+    runnable.release.set()
+    for thread in threads:
+        thread.join(10)
+    assert [str(error) for error in errors] == ["rate limited"] * 3
+    assert len(runnable.sent) == 1
+    assert coalescer.in_flight == {}
+
+def test_async_callers_share_one_call():
+    """Coroutines on one event loop share an in-flight ainvoke"""
+    runnable = SlowRunnable()
+    coalescer = llm_coalescing.Coalescer(runnable, key=role_key)
+
+    async def main():
+        return await asyncio.gather(*(coalescer.ainvoke({"role": role}) for role in ["Engineer"] * 4 + ["Designer"]))
+
+    results = asyncio.run(main())
+    assert [result["answer"] for result in results] == ["Engineer"] * 4 + ["Designer"]
+    assert len(runnable.sent) == 2
+    assert coalescer.stats()["shared"] == 3
+
+def test_coalesced_is_off_by_default():
+    """Without HR_LLM_COALESCE the runnable is returned unchanged"""
+    runnable = SlowRunnable()
+    saved = llm_coalescing.COALESCE_ENABLED
+    try:
+        llm_coalescing.COALESCE_ENABLED = False
+        assert llm_coalescing.coalesced(runnable, "off") is runnable
+        llm_coalescing.COALESCE_ENABLED = True
+        coalescer = llm_coalescing.coalesced(runnable, "on", key=role_key)
+        assert isinstance(coalescer, llm_coalescing.Coalescer)
+        assert "on" in llm_coalescing.stats()["coalescers"]
+    finally:
+        llm_coalescing.COALESCE_ENABLED = saved
+        llm_coalescing._coalescers.pop("on", None)
+
+if __name__ == "__main__":
+    tests = [value for name, value in sorted(globals().items()) if name.startswith("test_") and callable(value)]
+    for test in tests:
+        print(f"=== {test.__name__} ===")
+        test()
+    print(f"\nAll {len(tests)} LLM coalescing tests passed!")
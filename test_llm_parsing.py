@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Tests for the tolerant JSON parsing of LLM answers: common malformations
+are repaired from the first answer, the model is re-queried only when that
+fails, and every outcome is counted per node.
+
+Run with pytest or directly:
+
+    python test_llm_parsing.py
+"""
+
+import asyncio
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.prompts import PromptTemplate
+
+import llm_parsing
+
+PROMPT = PromptTemplate.from_template("Equipment for {position}? Answer in JSON.")
+
+def test_malformed_answers_are_repaired():
+    """Prose, fences, trailing commas, Python literals, smart quotes and truncation are repaired"""
+    expected = {"equipment_needs": ["Laptop", "Monitor"]}
+    answers = [
+        'Here you go: {"equipment_needs": ["Laptop", "Monitor"]} Let me know!',
+        '```json\n{"equipment_needs": ["Laptop", "Monitor"],}\n```',
+        "{'equipment_needs': ['Laptop', 'Monitor']}",
+        '{“equipment_needs”: [“Laptop”, “Monitor”]}',
+        '{"equipment_needs": ["Laptop", "Monitor"',
+        '{equipment_needs: ["Laptop", "Monitor"]}',
+    ]
+    for answer in answers:
+        value, outcome = llm_parsing.parse_llm_json(answer)
+        assert (value, outcome) == (expected, "repaired"), answer
+
+    value, outcome = llm_parsing.parse_llm_json("{'ready': True, 'notes': None}")
+    assert value == {"ready": True, "notes": None}
+    value, outcome = llm_parsing.parse_llm_json('It\'s done: {"notes": ["Manager\'s approval"]}')
+    assert value == {"notes": ["Manager's approval"]}
+
+def test_valid_and_unusable_answers():
+    """Valid JSON is parsed as-is; an answer without an object gives None"""
+    assert llm_parsing.parse_llm_json('{"a": 1}') == ({"a": 1}, "parsed")
+    assert llm_parsing.parse_llm_json("I cannot help with that.") == (None, None)
+    assert llm_parsing.parse_llm_json('["not", "an", "object"]') == (None, None)
+
+def test_requery_only_when_repair_fails():
+    """A repairable first answer costs one call; an unusable one is asked again"""
+    llm_parsing.reset_stats()
+    llm = FakeListChatModel(responses=['Sure: {"equipment_needs": ["Laptop"],}'])
+    assert llm_parsing.invoke_json(llm, PROMPT, {"position": "Engineer"}, "equipment") == {"equipment_needs": ["Laptop"]}
+
+    llm = FakeListChatModel(responses=["No idea.", '{"equipment_needs": ["Monitor"]}'])
+    assert llm_parsing.invoke_json(llm, PROMPT, {"position": "Engineer"}, "equipment") == {"equipment_needs": ["Monitor"]}
+
+    llm = FakeListChatModel(responses=["No idea.", "Still no idea."])
+    assert asyncio.run(llm_parsing.ainvoke_json(llm, PROMPT, {"position": "Engineer"}, "equipment")) is None
+
+    stats = llm_parsing.stats()
+    assert stats["nodes"]["equipment"] == {"parsed": 0, "repaired": 1, "requeried": 1, "failed": 1}
+    assert round(stats["repair_success_rate"], 3) == round(1 / 3.0, 3)
+    llm_parsing.reset_stats()
+
+if __name__ == "__main__":
+    tests = [value for name, value in sorted(globals().items()) if name.startswith("test_") and callable(value)]
+    for test in tests:
+        print(f"=== {test.__name__} ===")
+        test()
+    print(f"\nAll {len(tests)} LLM parsing tests passed!")
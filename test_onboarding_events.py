@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Tests for the onboarding progress events: followers get every event in
+order and stop when the job finishes, reconnecting clients only get what
+they missed, and only the newest finished jobs are kept.
+
+Run with pytest or directly:
+
+    python test_onboarding_events.py
+"""
+
+import json
+import threading
+
+import onboarding_events
+
+def test_follower_gets_events_as_they_are_published():
+    """A follower started before the run sees every event and stops at done"""
+    broker = onboarding_events.EventBroker()
+    broker.publish("job-1", "queued")
+    received = []
+    follower = threading.Thread(target=lambda: received.extend(broker.follow("job-1", keepalive=5)))
+    follower.start()
+
+    broker.publish("job-1", "node_started", {"node": "determine_equipment_access"})
+    broker.publish("job-1", "node_finished", {"node": "determine_equipment_access", "seconds": 0.5})
+    broker.publish("job-1", "done", {"result": {"success": True}})
+    follower.join(10)
+    assert not follower.is_alive()
+    assert [item["event"] for item in received] == ["queued", "node_started", "node_finished", "done"]
+    assert [item["id"] for item in received] == [1, 2, 3, 4]
+
+    # Nothing is added after the final event
+    assert broker.publish("job-1", "node_started") is None
+
+def test_reconnect_gets_only_missed_events():
+    """follow(after=n) resumes after the client's Last-Event-ID"""
+    broker = onboarding_events.EventBroker()
+    for event in ("queued", "running", "failed"):
+        broker.publish("job-1", event)
+    assert [item["event"] for item in broker.follow("job-1", after=2)] == ["failed"]
+    assert list(broker.follow("unknown")) == []
+
+def test_idle_stream_yields_keepalives():
+    """Without new events the follower yields None so the server can send a comment"""
+    broker = onboarding_events.EventBroker()
+    broker.publish("job-1", "queued")
+    events = broker.follow("job-1", after=1, keepalive=0.01)
+    assert next(events) is None
+    broker.publish("job-1", "done")
+    assert next(events)["event"] == "done"
+
+def test_only_the_newest_finished_jobs_are_kept():
+    """Old finished streams are dropped when a new job starts; running ones are kept however old"""
+    broker = onboarding_events.EventBroker(keep=2)
+    broker.publish("running", "running")
+    for number in range(4):
+        broker.publish(f"job-{number}", "done")
+    broker.publish("job-4", "queued")
+    assert not broker.has_stream("job-0") and not broker.has_stream("job-1")
+    assert broker.has_stream("job-2") and broker.has_stream("job-3")
+    assert broker.has_stream("running")
+
+def test_format_sse():
+    """Events become id/event/data messages; None becomes a keep-alive comment"""
+    item = {"id": 3, "event": "node_finished", "time": "2025-01-01T00:00:00", "data": {"node": "training"}}
+    lines = onboarding_events.format_sse(item).split("\n")
+    assert lines[:2] == ["id: 3", "event: node_finished"]
+    assert json.loads(lines[2][len("data: "):]) == {"node": "training", "time": "2025-01-01T00:00:00"}
+    assert onboarding_events.format_sse(item).endswith("\n\n")
+    assert onboarding_events.format_sse(None) == ": keep-alive\n\n"
+
+if __name__ == "__main__":
+    tests = [value for name, value in sorted(globals().items()) if name.startswith("test_") and callable(value)]
+    for test in tests:
+        print(f"=== {test.__name__} ===")
+        test()
+    print(f"\nAll {len(tests)} onboarding events tests passed!")
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Tests for the onboarding job queue: jobs run once, the queue is bounded,
+and the jobs of stopped processes are recovered while the queue runs.
+
+Every test uses its own temporary database and lease directory. Run with
+pytest or directly:
+
+    python test_onboarding_jobs.py
+"""
+
+import os
+import json
+import time
+import shutil
+import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager
+
+import id_allocator
+import onboarding_jobs
+
+@contextmanager
+def temp_queue(**options):
+    """Yield a factory for job queues sharing a temporary database"""
+    saved_worker_ids = id_allocator.WORKER_IDS_DIR
+    directory = tempfile.mkdtemp(prefix="hr-jobs-")
+    id_allocator.WORKER_IDS_DIR = os.path.join(directory, "worker_ids")
+    id_allocator.ALLOCATOR.reset()
+    queues = []
+
+    def make_queue(**overrides):
+        settings = dict(options, **overrides)
+        queue = onboarding_jobs.JobQueue(path=os.path.join(directory, "onboarding_jobs.db"), **settings)
+        queues.append(queue)
+        return queue
+
+    try:
+        yield make_queue
+    finally:
+        for queue in queues:
+            queue.stop()
+        id_allocator.WORKER_IDS_DIR = saved_worker_ids
+        id_allocator.ALLOCATOR.reset()
+        shutil.rmtree(directory, ignore_errors=True)
+
+def wait_for(queue, job_id, status, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.get(job_id)
+        if job is not None and job["status"] == status:
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} never reached {status}: {queue.get(job_id)}")
+
+def test_job_runs_and_records_its_result():
+    """A submitted job moves to done with its result and timings"""
+    with temp_queue(recovery_seconds=0) as make_queue:
+        queue = make_queue()
+        queue.start(lambda data, employee_id, on_event: {"name": data["name"], "employee": employee_id})
+        job = queue.submit({"name": "Ada"}, "42")
+        assert job["status"] == onboarding_jobs.QUEUED
+
+        done = wait_for(queue, job["id"], onboarding_jobs.DONE)
+        assert done["result"] == {"name": "Ada", "employee": "42"}
+        assert done["attempts"] == 1 and done["run_seconds"] is not None
+        assert "data" not in done
+
+def test_failed_job_records_the_error():
+    """An exception in the handler marks the job failed with its message"""
+    with temp_queue(recovery_seconds=0) as make_queue:
+        queue = make_queue()
+
+        def fail(data, employee_id, on_event):
+            raise ValueError("no model")
+
+        queue.start(fail)
+        job = queue.submit({"name": "Ada"}, "42")
+        assert wait_for(queue, job["id"], onboarding_jobs.FAILED)["error"] == "no model"
+
+def test_full_queue_refuses_jobs():
+    """submit raises QueueFullError once max_queued jobs are waiting"""
+    with temp_queue(recovery_seconds=0) as make_queue:
+        release = threading.Event()
+        queue = make_queue(workers=1, max_queued=2)
+        queue.start(lambda data, employee_id, on_event: release.wait(10))
+        running = queue.submit({"name": "first"}, "1")
+        wait_for(queue, running["id"], onboarding_jobs.RUNNING)
+        queue.submit({"name": "second"}, "2")
+        queue.submit({"name": "third"}, "3")
+        try:
+            queue.submit({"name": "fourth"}, "4")
+        except onboarding_jobs.QueueFullError:
+            pass
+        else:
+            raise AssertionError("expected QueueFullError")
+        release.set()
+
+def test_job_is_claimed_once():
+    """Only the owning queue claims a job, and only while it is queued"""
+    with temp_queue(recovery_seconds=0) as make_queue:
+        calls = []
+        first, second = make_queue(), make_queue()
+        first.start(lambda data, employee_id, on_event: calls.append("first"))
+        second.start(lambda data, employee_id, on_event: calls.append("second"))
+        job = first.submit({"name": "Ada"}, "1")
+        wait_for(first, job["id"], onboarding_jobs.DONE)
+
+        # Neither queue runs it again
+        first.run(job["id"])
+        second.run(job["id"])
+        assert calls == ["first"]
+        assert second.get(job["id"])["attempts"] == 1
+
+def test_live_owner_keeps_its_lease():
+    """owner_alive sees a live queue's lease and removes a stopped one's"""
+    with temp_queue(recovery_seconds=0) as make_queue:
+        first, second = make_queue(), make_queue()
+        first.start(lambda data, employee_id, on_event: None)
+        second.start(lambda data, employee_id, on_event: None)
+        assert second.owner_alive(first.owner)
+
+        stale = os.path.join(first.leases_dir, "stopped.lock")
+        open(stale, 'w').close()
+        assert not second.owner_alive("stopped")
+        assert not os.path.exists(stale)
+
+class SweepBeforeFirstLock(object):
+    """fcntl stand-in that deletes the lease file just before the first lock, as a racing sweep would"""
+    def __init__(self, fcntl):
+        self.fcntl = fcntl
+        self.LOCK_EX, self.LOCK_NB = fcntl.LOCK_EX, fcntl.LOCK_NB
+        self.swept = None
+
+    def flock(self, fd, operation):
+        if self.swept is None:
+            self.swept = os.readlink(f"/proc/self/fd/{fd}")
+            os.remove(self.swept)
+        return self.fcntl.flock(fd, operation)
+
+def test_lease_removed_before_it_is_locked_is_taken_again():
+    """take_lease only settles on a locked file that is still at the lease path"""
+    if onboarding_jobs.fcntl is None or not os.path.isdir("/proc/self/fd"):
+        return
+    with temp_queue(recovery_seconds=0) as make_queue:
+        queue = make_queue()
+        saved = onboarding_jobs.fcntl
+        onboarding_jobs.fcntl = SweepBeforeFirstLock(saved)
+        try:
+            queue.start(lambda data, employee_id, on_event: None)
+        finally:
+            sweeper, onboarding_jobs.fcntl = onboarding_jobs.fcntl, saved
+        path = os.path.join(queue.leases_dir, f"{queue.owner}.lock")
+        assert sweeper.swept == path
+        assert os.stat(path).st_ino == os.fstat(queue.lease).st_ino
+        assert make_queue().owner_alive(queue.owner)
+
+def test_jobs_of_a_stopped_process_are_recovered_while_running():
+    """The recovery thread requeues the unfinished jobs of a dead owner and runs them"""
+    with temp_queue(recovery_seconds=0.05) as make_queue:
+        queue = make_queue()
+        queue.start(lambda data, employee_id, on_event: {"name": data["name"]})
+
+        # A process that stopped mid-run left these behind after we started
+        conn = sqlite3.connect(queue.path)
+        for job_id, status in (("crashed-running", "running"), ("crashed-queued", "queued")):
+            conn.execute("INSERT INTO jobs (id, employee_id, employee_name, status, owner, attempts, data, created_at) "
+                         "VALUES (?, '1', 'Ada', ?, 'stopped-owner', 1, ?, '2025-01-01T00:00:00')",
+                         (job_id, status, json.dumps({"name": job_id})))
+        conn.commit()
+        conn.close()
+
+        for job_id in ("crashed-running", "crashed-queued"):
+            job = wait_for(queue, job_id, onboarding_jobs.DONE)
+            assert job["owner"] == queue.owner
+            assert job["attempts"] == 2
+            assert job["result"] == {"name": job_id}
+
+def test_prune_keeps_the_newest_finished_jobs():
+    """Only `keep` finished jobs are kept; unfinished ones are never pruned"""
+    with temp_queue(recovery_seconds=0) as make_queue:
+        queue = make_queue(keep=2)
+        queue.start(lambda data, employee_id, on_event: None)
+        jobs = [queue.submit({"name": str(number)}, str(number)) for number in range(4)]
+        for job in jobs:
+            wait_for(queue, job["id"], onboarding_jobs.DONE)
+        assert queue.prune() == 2
+        assert [queue.get(job["id"]) is not None for job in jobs] == [False, False, True, True]
+
+def test_import_json_state_file():
+    """Jobs from the old JSON state file are imported and the file is set aside"""
+    with temp_queue(recovery_seconds=0) as make_queue:
+        queue = make_queue()
+        legacy = os.path.join(os.path.dirname(queue.path), "onboarding_jobs.json")
+        with open(legacy, 'w') as f:
+            json.dump([{"id": "old", "employee_id": "1", "employee_name": "Ada", "status": "done",
+                        "owner": "gone", "attempts": 1, "data": {"name": "Ada"}, "result": {"ok": True}}], f)
+        queue.import_json(legacy)
+        assert queue.get("old")["result"] == {"ok": True}
+        assert os.path.exists(legacy + ".imported") and not os.path.exists(legacy)
+
+if __name__ == "__main__":
+    tests = [value for name, value in sorted(globals().items()) if name.startswith("test_") and callable(value)]
+    for test in tests:
+        print(f"=== {test.__name__} ===")
+        test()
+    print(f"\nAll {len(tests)} onboarding job queue tests passed!")
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Tests for the training-plan memory and the token accounting: the rendered
+context stays within its limit, and every model call is counted from its
+raw completion text, re-queries included.
+
+Run with pytest or directly:
+
+    python test_onboarding_memory.py
+"""
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.prompts import PromptTemplate
+
+import llm_parsing
+import onboarding_memory
+
+def test_memory_merges_steps_and_renders_within_the_limit():
+    """Later steps add to the memory, and the context never exceeds max_chars"""
+    memory = onboarding_memory.merge_memory({}, {"validation": onboarding_memory.validation_facts(
+        "All fields look fine. Nothing missing here.")})
+    memory = onboarding_memory.merge_memory(memory, {"equipment": {
+        "equipment_needs": [f"Item {number}" for number in range(20)], "system_access": ["Email"]}})
+    assert memory["validation"]["outcome"] == "ok"
+    assert memory["validation"]["summary"] == "All fields look fine."
+
+    context = onboarding_memory.render_context(memory)
+    assert context.splitlines()[0] == "Validation outcome: ok"
+    assert "(+12 more)" in context
+    assert len(onboarding_memory.render_context(memory, max_chars=80)) <= 80
+
+def test_validation_facts_flag_issues():
+    """Answers that mention missing or invalid data need review"""
+    assert onboarding_memory.validation_facts("The start date is missing.")["outcome"] == "needs review"
+    assert onboarding_memory.validation_facts("There is no missing information.")["outcome"] == "ok"
+
+def test_tokens_are_counted_from_raw_completions_including_requeries():
+    """A repaired answer counts one call; an unusable first answer counts the re-query too"""
+    onboarding_memory.reset_token_stats()
+    prompt = PromptTemplate.from_template("Equipment for {position}?")
+    formatted = prompt.format(position="Engineer")
+
+    first = 'Sure! ```json\n{"equipment_needs": ["Laptop"],}\n```'
+    llm = FakeListChatModel(responses=[first])
+    value = llm_parsing.invoke_json(llm, prompt, {"position": "Engineer"}, "equipment",
+                                    on_completion=onboarding_memory.token_recorder("equipment", formatted))
+    assert value == {"equipment_needs": ["Laptop"]}
+
+    unusable, second = "I cannot answer that.", '{"equipment_needs": ["Monitor"]}'
+    llm = FakeListChatModel(responses=[unusable, second])
+    value = llm_parsing.invoke_json(llm, prompt, {"position": "Engineer"}, "training",
+                                    on_completion=onboarding_memory.token_recorder("training", formatted))
+    assert value == {"equipment_needs": ["Monitor"]}
+
+    nodes = onboarding_memory.token_stats()["nodes"]
+    count = onboarding_memory.count_tokens
+    assert nodes["equipment"]["calls"] == 1
+    assert nodes["equipment"]["completion_tokens"] == count(first)
+    assert nodes["training"]["calls"] == 2
+    assert nodes["training"]["prompt_tokens"] == 2 * count(formatted)
+    assert nodes["training"]["completion_tokens"] == count(unusable) + count(second)
+    onboarding_memory.reset_token_stats()
+
+if __name__ == "__main__":
+    tests = [value for name, value in sorted(globals().items()) if name.startswith("test_") and callable(value)]
+    for test in tests:
+        print(f"=== {test.__name__} ===")
+        test()
+    print(f"\nAll {len(tests)} onboarding memory tests passed!")
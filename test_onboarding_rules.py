@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Tests for the mined onboarding rules: cache-served results count as
+weighted runs, answers from the rules themselves are ignored, and the rule
+table is reloaded when its file changes.
+
+Every test uses its own temporary directory. Run with pytest or directly:
+
+    python test_onboarding_rules.py
+"""
+
+import os
+import json
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+import onboarding_rules
+
+ENGINEER = {
+    "equipmentNeeds": ["Laptop", "Monitor"],
+    "systemAccess": ["Email", "GitHub"],
+    "trainingRequirements": ["Company Orientation", "Security Awareness"],
+}
+
+@contextmanager
+def temp_dir():
+    directory = tempfile.mkdtemp(prefix="hr-rules-")
+    try:
+        yield directory
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+def write_result(directory, number, answers=ENGINEER, cached_nodes=(), source="workflow"):
+    employee = dict(answers, name=f"Employee {number}", position="Software Engineer", department="Engineering")
+    result = {"success": True, "employee": employee, "source": source, "cachedNodes": list(cached_nodes)}
+    with open(os.path.join(directory, f"workflow_{number}_20250101_000000.json"), 'w') as f:
+        json.dump(result, f)
+
+def rule_key():
+    return onboarding_rules.role_key("Software Engineer", "Engineering")
+
+def mine(directory, **options):
+    return onboarding_rules.mine_rules(onboarding_rules.load_results(directory, employee_roles={}, **options))
+
+def test_cache_served_results_produce_a_rule():
+    """Two LLM runs and four cache-served ones reach the confidence threshold"""
+    with temp_dir() as directory:
+        for number in range(2):
+            write_result(directory, number)
+        for number in range(2, 6):
+            write_result(directory, number, cached_nodes=["determine_equipment_access", "create_training_plan"])
+        # Answers from the rule table never count
+        write_result(directory, 9, source="rules")
+
+        rules = mine(directory, cached_weight=0.5)
+        rule = rules[rule_key()]
+        assert rule["runs"] == 6 and rule["support"] == 4.0
+        assert rule["confidence"] == 0.8 >= onboarding_rules.RULES_MIN_CONFIDENCE
+        assert rule["equipmentNeeds"] == ENGINEER["equipmentNeeds"]
+
+        # Ignoring the cache-served runs leaves the role below the threshold
+        assert mine(directory, cached_weight=0)[rule_key()]["confidence"] < 0.8
+
+def test_items_need_half_of_the_weighted_runs():
+    """An item only in cache-served runs needs their weight to reach half the total"""
+    runs = [["Laptop"], ["Laptop"], ["Laptop", "Tablet"], ["Laptop", "Tablet"]]
+    items, agreement = onboarding_rules.mine_field(runs, [1.0, 1.0, 0.5, 0.5])
+    assert items == ["Laptop"]
+    assert round(agreement, 3) == round((2 * 1.0 + 2 * 0.5 * 0.5) / 3.0, 3)
+    assert onboarding_rules.mine_field(runs)[0] == ["Laptop", "Tablet"]
+
+def test_rule_table_reloads_when_the_file_changes():
+    """A server picks up a fresh mine without a restart"""
+    with temp_dir() as directory:
+        path = os.path.join(directory, "onboarding_rules.json")
+        table = onboarding_rules.RuleTable(path=path, min_confidence=0.8, enabled=True)
+        assert table.lookup("Software Engineer", "Engineering") is None
+
+        for number in range(6):
+            write_result(directory, number)
+        with open(path, 'w') as f:
+            json.dump({"rules": mine(directory)}, f)
+        assert table.lookup("Software Engineer", "Engineering")["support"] == 6.0
+
+        with open(path, 'w') as f:
+            json.dump({"rules": {}}, f)
+        # Make sure the change is visible even on coarse file system clocks
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        assert table.lookup("Software Engineer", "Engineering") is None
+        assert table.stats()["rules"] == 0
+
+if __name__ == "__main__":
+    tests = [value for name, value in sorted(globals().items()) if name.startswith("test_") and callable(value)]
+    for test in tests:
+        print(f"=== {test.__name__} ===")
+        test()
+    print(f"\nAll {len(tests)} onboarding rules tests passed!")
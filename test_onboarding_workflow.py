@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Tests for the onboarding engines against the offline fake LLM: the
+single-shot engine makes one call and returns the same result shape as the
+node engine, and the graphs run their independent nodes in the same step.
+
+The response cache and the rule table are turned off, and the graphs use an
+in-memory checkpointer. The tests are skipped when the workflow stack
+(langchain, langgraph) cannot be imported. Run with pytest or directly:
+
+    python test_onboarding_workflow.py
+"""
+
+import os
+import io
+import asyncio
+import contextlib
+
+# hr_langgraph creates its (unused) Groq client at import
+os.environ.setdefault("GROQ_API_KEY", "test")
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+import fake_llm
+import llm_cache
+import onboarding_rules
+import workflow_registry
+
+try:
+    from langgraph.checkpoint.memory import MemorySaver
+    import hr_langgraph
+    import hr_onboarding_workflow
+    import simplified_workflow
+    import sqlite_checkpointer
+except ImportError as e:
+    print(f"Skipping the onboarding workflow tests: {e}")
+    simplified_workflow = None
+
+EMPLOYEE = {"name": "Ada Lovelace", "position": "Software Engineer", "department": "Engineering",
+            "startDate": "2025-07-01"}
+
+@contextlib.contextmanager
+def offline_workflow(model):
+    """Run the shared chains and graphs on model, without cache, rules or SQLite checkpoints"""
+    registry = workflow_registry.REGISTRY
+    saved = dict(registry.factories)
+    saved_cache, saved_rules = llm_cache.CACHE.enabled, onboarding_rules.RULES.enabled
+    llm_cache.CACHE.enabled = onboarding_rules.RULES.enabled = False
+    # Registering again drops the objects built on the real model
+    for name, factory in saved.items():
+        registry.register(name, factory)
+    registry.register("llm", lambda: model)
+    registry.register("checkpointer", lambda: MemorySaver(serde=sqlite_checkpointer.state_serde()))
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield model
+    finally:
+        for name, factory in saved.items():
+            registry.register(name, factory)
+        llm_cache.CACHE.enabled, onboarding_rules.RULES.enabled = saved_cache, saved_rules
+
+def fake_model():
+    return fake_llm.FakeGroqChat(latency_ms=0, latency_distribution="constant")
+
+def test_single_shot_makes_one_call_with_the_node_result_shape():
+    """Single-shot answers validation, equipment and training in one call"""
+    if simplified_workflow is None:
+        return
+    with offline_workflow(fake_model()) as model:
+        nodes = simplified_workflow.process_onboarding(EMPLOYEE, single_shot=False)
+        calls = model.stats()["calls"]
+        single = simplified_workflow.process_onboarding(EMPLOYEE, single_shot=True)
+        assert model.stats()["calls"] - calls == 1
+        async_single = asyncio.run(simplified_workflow.aprocess_onboarding(EMPLOYEE, single_shot=True))
+
+    assert calls == 3
+    assert set(single) == set(nodes) and set(single["employee"]) == set(nodes["employee"])
+    assert single["employee"]["equipmentNeeds"] == nodes["employee"]["equipmentNeeds"]
+    assert single["employee"]["status"] == "completed"
+    # The model's validation note is kept in the HR notes
+    assert single["hrNotes"][0] == "Information for Ada Lovelace is complete"
+    assert async_single["employee"] == single["employee"]
+
+def test_single_shot_falls_back_to_defaults():
+    """Two unusable answers give the default lists and say so in the notes"""
+    if simplified_workflow is None:
+        return
+    with offline_workflow(FakeListChatModel(responses=["I cannot help.", "Still no JSON."])):
+        result = simplified_workflow.process_onboarding(EMPLOYEE, single_shot=True)
+    assert result["employee"]["equipmentNeeds"] == hr_onboarding_workflow.DEFAULT_EQUIPMENT_NEEDS
+    assert result["employee"]["trainingRequirements"] == hr_onboarding_workflow.DEFAULT_TRAINING_REQUIREMENTS
+    assert any("default" in note for note in result["hrNotes"])
+
+def parallel_steps(graph, config):
+    """Return the sets of nodes that were scheduled together in one step"""
+    return [set(state.next) for state in graph.get_state_history(config) if len(state.next) > 1]
+
+def test_validation_and_equipment_run_in_the_same_step():
+    """build_workflow starts both branches together and joins them before training"""
+    if simplified_workflow is None:
+        return
+    with offline_workflow(fake_model()):
+        graph = hr_onboarding_workflow.get_workflow()
+        config = {"configurable": {"thread_id": "parallel"}}
+        employee = hr_onboarding_workflow.EmployeeInfo("Ada Lovelace", "Software Engineer", "Engineering", "2025-07-01")
+        result = graph.invoke({"employee": employee, "hr_notes": [], "it_notes": [], "messages": [], "memory": {}},
+                              config)
+        steps = parallel_steps(graph, config)
+
+    assert steps == [{"collect_employee_info", "determine_equipment_access"}]
+    # The join applied the equipment branch before the training plan used it
+    assert "GitHub" in result["employee"].system_access
+    assert result["employee"].training_requirements
+    assert "validation" in result["memory"] and "equipment" in result["memory"]
+
+def test_langgraph_welcome_and_provisioning_run_in_the_same_step():
+    """hr_langgraph runs the welcome message and equipment provisioning in parallel"""
+    if simplified_workflow is None:
+        return
+    with offline_workflow(fake_model()):
+        result = hr_langgraph.start_onboarding_workflow({
+            "employee_id": "1", "name": "Ada Lovelace", "position": "Software Engineer",
+            "department": "Engineering", "start_date": "2025-07-01",
+            "equipment_needs": ["Laptop"], "system_access": ["Email"], "status": "pending"})
+        graph = hr_langgraph.get_workflow_graph()
+        # The run's only thread in the fresh in-memory checkpointer
+        (thread_id,) = graph.checkpointer.storage
+        steps = parallel_steps(graph, {"configurable": {"thread_id": thread_id}})
+
+    assert steps == [{"welcome_message", "equipment_provisioning"}]
+    assert result["current_step"] == "onboarding_ready"
+    assert set(result["completed_steps"]) == {"document_preparation", "welcome_message", "equipment_provisioning"}
+
+if __name__ == "__main__":
+    tests = [value for name, value in sorted(globals().items()) if name.startswith("test_") and callable(value)]
+    for test in tests:
+        print(f"=== {test.__name__} ===")
+        test()
+    print(f"\nAll {len(tests)} onboarding workflow tests passed!")
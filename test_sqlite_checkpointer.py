@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Tests for the SQLite checkpointer: the workflow's state classes survive a
+checkpoint without pickle, a crashed run resumes from its last step in a
+new saver, and retention prunes finished threads but keeps unfinished ones.
+
+Every test uses its own temporary database. Run with pytest or directly:
+
+    python test_sqlite_checkpointer.py
+"""
+
+import os
+import time
+import shutil
+import operator
+import tempfile
+from contextlib import contextmanager
+from typing import Annotated, List, TypedDict
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph import StateGraph, START, END
+
+import sqlite_checkpointer
+from workflow_state import History, append_history
+
+try:
+    import hr_onboarding_workflow
+except ImportError:
+    # Needs the full langchain stack; the EmployeeInfo test is skipped without it
+    hr_onboarding_workflow = None
+
+@contextmanager
+def temp_checkpointer(**options):
+    """Yield a factory for checkpointers sharing a temporary database"""
+    directory = tempfile.mkdtemp(prefix="hr-checkpoints-")
+    try:
+        yield lambda: sqlite_checkpointer.SQLiteCheckpointer(path=os.path.join(directory, "checkpoints.db"), **options)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+class State(TypedDict):
+    messages: Annotated[History, append_history]
+    steps: Annotated[List[str], operator.add]
+
+def build_graph(saver, fail):
+    def first(state):
+        return {"messages": [HumanMessage("Start onboarding")], "steps": ["first"]}
+
+    def second(state):
+        if fail["second"]:
+            raise RuntimeError("crash in second")
+        return {"messages": [AIMessage("Done")], "steps": ["second"]}
+
+    graph = StateGraph(State)
+    graph.add_node("first", first)
+    graph.add_node("second", second)
+    graph.add_edge(START, "first")
+    graph.add_edge("first", "second")
+    graph.add_edge("second", END)
+    return graph.compile(checkpointer=saver)
+
+def test_state_classes_round_trip_without_pickle():
+    """History and EmployeeInfo load back as themselves through the msgpack serde"""
+    with temp_checkpointer() as make_saver:
+        saver = make_saver()
+        history = History([HumanMessage("hi"), AIMessage("hello")])
+        type_, data = saver.dump(history)
+        assert type_ == "msgpack"
+        loaded = saver.load(type_, data)
+        assert isinstance(loaded, History) and loaded == history
+
+        if hr_onboarding_workflow is None:
+            return
+        employee = hr_onboarding_workflow.EmployeeInfo("Ada", "Engineer", "IT", "2025-01-01",
+                                                       equipment_needs=["Laptop"])
+        type_, data = saver.dump({"employee": employee})
+        assert type_ == "msgpack"
+        loaded = saver.load(type_, data)["employee"]
+        assert isinstance(loaded, hr_onboarding_workflow.EmployeeInfo)
+        assert loaded.__dict__ == employee.__dict__
+
+def test_crashed_run_resumes_in_a_new_saver():
+    """A run that failed mid-graph continues from its checkpoint after a restart"""
+    with temp_checkpointer() as make_saver:
+        config = {"configurable": {"thread_id": "run-1"}}
+        fail = {"second": True}
+        try:
+            build_graph(make_saver(), fail).invoke({"messages": History(), "steps": []}, config)
+        except RuntimeError:
+            pass
+        else:
+            raise AssertionError("expected the run to crash")
+
+        # A new process opens the same database
+        fail["second"] = False
+        graph = build_graph(make_saver(), fail)
+        state = graph.get_state(config)
+        assert state.next == ("second",)
+        assert isinstance(state.values["messages"], History)
+
+        result = graph.invoke(None, config)
+        assert result["steps"] == ["first", "second"]
+        assert [message.content for message in result["messages"]] == ["Start onboarding", "Done"]
+
+def test_prune_removes_finished_threads_only():
+    """Finished threads past retention are pruned; unfinished ones are kept unless stale"""
+    with temp_checkpointer(retention_hours=1) as make_saver:
+        saver = make_saver()
+        graph = build_graph(saver, {"second": False})
+        for thread_id in ("finished", "unfinished"):
+            graph.invoke({"messages": History(), "steps": []}, {"configurable": {"thread_id": thread_id}})
+        saver.mark_finished("finished")
+
+        assert saver.prune_expired() == 0
+        assert saver.prune_expired(now=time.time() + 2 * 3600) == 1
+        assert saver.get_tuple({"configurable": {"thread_id": "finished"}}) is None
+        assert saver.get_tuple({"configurable": {"thread_id": "unfinished"}}) is not None
+
+        saver.stale_hours = 1
+        assert saver.prune_expired(now=time.time() + 2 * 3600) == 1
+        assert saver.stats()["threads"] == 0
+
+if __name__ == "__main__":
+    tests = [value for name, value in sorted(globals().items()) if name.startswith("test_") and callable(value)]
+    for test in tests:
+        print(f"=== {test.__name__} ===")
+        test()
+    print(f"\nAll {len(tests)} checkpointer tests passed!")
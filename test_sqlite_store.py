@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Tests for the SQLite employee store.
+
+Every test uses its own temporary database, so data/employees.db is never
+touched. Run with pytest or directly:
+
+    python test_sqlite_store.py
+"""
+
+import os
+import json
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+import id_allocator
+import sqlite_store
+
+@contextmanager
+def temp_database():
+    """Point sqlite_store at an empty temporary database"""
+    saved_db, saved_worker_ids = sqlite_store.EMPLOYEES_DB, id_allocator.WORKER_IDS_DIR
+    directory = tempfile.mkdtemp(prefix="hr-sqlite-")
+    # get_connection() opens a new connection when the path changes
+    sqlite_store.EMPLOYEES_DB = os.path.join(directory, "employees.db")
+    id_allocator.WORKER_IDS_DIR = os.path.join(directory, "worker_ids")
+    id_allocator.ALLOCATOR.reset()
+    try:
+        yield directory
+    finally:
+        sqlite_store.EMPLOYEES_DB = saved_db
+        id_allocator.WORKER_IDS_DIR = saved_worker_ids
+        id_allocator.ALLOCATOR.reset()
+        shutil.rmtree(directory, ignore_errors=True)
+
+def new_employee(name, department="Engineering"):
+    return {"name": name, "position": "Engineer", "department": department, "startDate": "2025-01-01"}
+
+#############################################
+# Single-record operations and queries
+#############################################
+
+def test_add_get_update_delete():
+    """A record round-trips through the database with its id and timestamps"""
+    with temp_database():
+        employee = sqlite_store.add_employee(new_employee("Ada"))
+        assert employee["status"] == "New" and employee["created_at"] == employee["updated_at"]
+        assert sqlite_store.get_employee(employee["id"]) == employee
+
+        updated = sqlite_store.update_employee(employee["id"], {"status": "in-progress"})
+        assert updated["status"] == "In Progress"
+        assert updated["name"] == "Ada" and updated["created_at"] == employee["created_at"]
+        assert sqlite_store.update_employee("missing", {"status": "New"}) is None
+
+        assert sqlite_store.delete_employee(employee["id"]) is True
+        assert sqlite_store.delete_employee(employee["id"]) is False
+        assert sqlite_store.get_employee(employee["id"]) is None
+
+def test_find_employees_uses_filters():
+    """Status aliases, department and start date bounds are matched in SQL"""
+    with temp_database():
+        sqlite_store.save_employees([
+            {"id": "1", "name": "Ada", "department": "Engineering", "startDate": "2025-01-01", "status": "Pending"},
+            {"id": "2", "name": "Grace", "department": "Sales", "startDate": "2025-02-01", "status": "complete"},
+            {"id": "3", "name": "Linus", "department": "Engineering", "startDate": "2025-03-01", "status": "New"},
+        ])
+
+        def names(**filters):
+            return [employee["name"] for employee in sqlite_store.find_employees(**filters)]
+
+        # "complete" was stored before statuses were normalized
+        assert names(status="Completed") == ["Grace"]
+        assert names(status=["new", "pending"]) == ["Ada", "Linus"]
+        assert names(department="Engineering", start_date_from="2025-02-01") == ["Linus"]
+        assert names(start_date_from="2025-01-15", start_date_to="2025-02-15") == ["Grace"]
+        assert sqlite_store.count_by_status() == {"Pending": 1, "Completed": 1, "New": 1}
+        assert sqlite_store.count_by_department() == {"Engineering": 2, "Sales": 1}
+
+def test_migrate_from_json():
+    """Migration keeps every record and gives missing or duplicate ids a fresh one"""
+    with temp_database() as directory:
+        json_file = os.path.join(directory, "employees.json")
+        with open(json_file, 'w') as f:
+            json.dump([
+                {"id": "1", "name": "Ada", "status": "done"},
+                {"id": "1", "name": "Grace"},
+                {"name": "Linus"},
+            ], f)
+
+        assert sqlite_store.migrate_from_json(json_file) == 3
+        employees = sqlite_store.load_employees()
+        assert [employee["name"] for employee in employees] == ["Ada", "Grace", "Linus"]
+        assert len({employee["id"] for employee in employees}) == 3
+        assert employees[0]["status"] == "Completed"
+
+#############################################
+# Batch operations
+#############################################
+
+def test_batch_add_update_delete():
+    """The batch functions report one result per input and apply only the valid ones"""
+    with temp_database():
+        results = sqlite_store.add_employees([new_employee("Ada"), {"name": "No fields"}, new_employee("Grace")])
+        assert [result["success"] for result in results] == [True, False, True]
+        ada, grace = results[0]["employee"], results[2]["employee"]
+
+        results = sqlite_store.update_employees({ada["id"]: {"status": "done"}, "missing": {"status": "New"}})
+        assert [result["success"] for result in results] == [True, False]
+
+        results = sqlite_store.delete_employees([grace["id"], "missing"])
+        assert [result["success"] for result in results] == [True, False]
+
+        employees = sqlite_store.load_employees()
+        assert [(employee["name"], employee["status"]) for employee in employees] == [("Ada", "Completed")]
+        assert sqlite_store.count_by_status() == {"Completed": 1}
+
+def test_batch_update_keeps_row_order():
+    """Updated rows keep their position instead of moving to the end"""
+    with temp_database():
+        results = sqlite_store.add_employees([new_employee(name) for name in ("Ada", "Grace", "Linus")])
+        first_id = results[0]["employee"]["id"]
+        sqlite_store.update_employees({first_id: {"position": "Lead"}})
+        sqlite_store.update_employee(results[1]["employee"]["id"], {"position": "Lead"})
+
+        employees = sqlite_store.load_employees()
+        assert [employee["name"] for employee in employees] == ["Ada", "Grace", "Linus"]
+        assert [employee["position"] for employee in employees] == ["Lead", "Lead", "Engineer"]
+        # The indexed columns follow the record
+        assert [employee["name"] for employee in sqlite_store.find_employees(department="Engineering")] == \
+            ["Ada", "Grace", "Linus"]
+
+if __name__ == "__main__":
+    tests = [value for name, value in sorted(globals().items()) if name.startswith("test_") and callable(value)]
+    for test in tests:
+        print(f"=== {test.__name__} ===")
+        test()
+    print(f"\nAll {len(tests)} SQLite store tests passed!")
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Tests for the workflow state containers: History appends share earlier
+items and never change an older History, and merge_update applies a
+node's partial update without copying the values it leaves alone.
+
+Run with pytest or directly:
+
+    python test_workflow_state.py
+"""
+
+import copy
+import pickle
+
+from workflow_state import History, append_history, merge_update
+
+def test_append_returns_a_new_history_sharing_the_old_one():
+    """Older histories stay valid after appends, including diverging ones"""
+    base = History(["a", "b"])
+    left = base.append("c")
+    right = base.extend(["x", "y"])
+    assert base == ["a", "b"]
+    assert left == ["a", "b", "c"]
+    assert right == ["a", "b", "x", "y"]
+    # The new link points at the old History instead of copying it
+    assert left._parent is base
+
+def test_indexing_and_slicing():
+    """Indexes, negative indexes and tail slices match a list"""
+    items = list(range(10))
+    history = History(items)
+    assert len(history) == 10 and list(history) == items
+    assert history[0] == 0 and history[-1] == 9 and history[4] == 4
+    assert history[-3:] == [7, 8, 9]
+    assert history[2:5] == items[2:5]
+    try:
+        history[10]
+    except IndexError:
+        pass
+    else:
+        raise AssertionError("expected IndexError")
+
+def test_copy_and_pickle_as_a_flat_list():
+    """deepcopy and pickle rebuild an equal History, even a long one"""
+    history = History(range(5000))
+    assert copy.deepcopy(history) == history
+    loaded = pickle.loads(pickle.dumps(history))
+    assert isinstance(loaded, History) and loaded == history
+
+def test_append_history_reducer():
+    """The reducer accepts lists or nothing on the left and appends the update"""
+    assert append_history(None, ["a"]) == ["a"]
+    assert append_history(["a"], ["b", "c"]) == ["a", "b", "c"]
+    history = History(["a"])
+    assert append_history(history, []) is history
+
+def test_merge_update_shares_unchanged_values():
+    """Reduced fields are appended, other keys replaced, and the old state is untouched"""
+    employee = {"name": "Ada"}
+    state = {"employee": employee, "messages": History(["hello"]), "hr_notes": History(), "status": "new"}
+    updated = merge_update(state, {"messages": ["equipment"], "hr_notes": ["note"], "status": "equipment"})
+
+    assert updated["messages"] == ["hello", "equipment"]
+    assert updated["hr_notes"] == ["note"]
+    assert updated["status"] == "equipment"
+    assert updated["employee"] is employee
+    assert state["messages"] == ["hello"] and state["status"] == "new"
+
+if __name__ == "__main__":
+    tests = [value for name, value in sorted(globals().items()) if name.startswith("test_") and callable(value)]
+    for test in tests:
+        print(f"=== {test.__name__} ===")
+        test()
+    print(f"\nAll {len(tests)} workflow state tests passed!")
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Process-level Registry for HR Workflow
+
+Compiled graphs and prompt | llm chains are expensive to build but safe to
+share: a compiled LangGraph graph keeps no per-run state (that lives in the
+input or the checkpointer) and a chain is an immutable runnable. Modules
+register a factory under a name, the first get() builds the object and
+every later call, from any thread, gets the same instance.
+
+warm_up() builds everything that has been registered so the first
+onboarding request does not pay for it.
+"""
+
+import time
+import threading
+from collections import OrderedDict
+
+class Registry(object):
+    """Named objects built once per process on first use"""
+    def __init__(self):
+        # Re-entrant so a factory can get() the objects it depends on
+        self.lock = threading.RLock()
+        self.factories = OrderedDict()
+        self.objects = {}
+        self.build_seconds = {}
+        self.hits = 0
+
+    def register(self, name, factory):
+        """Register the factory for name; registering a name again replaces the built object"""
+        with self.lock:
+            self.factories[name] = factory
+            self.objects.pop(name, None)
+
+    def get(self, name):
+        """Return the object for name, building it on first use"""
+        obj = self.objects.get(name)
+        if obj is not None:
+            self.hits += 1
+            return obj
+        with self.lock:
+            obj = self.objects.get(name)
+            if obj is None:
+                if name not in self.factories:
+                    raise KeyError(f"Nothing registered as {name}")
+                started = time.perf_counter()
+                obj = self.factories[name]()
+                self.build_seconds[name] = round(time.perf_counter() - started, 4)
+                self.objects[name] = obj
+            return obj
+
+    def warm_up(self, names=None):
+        """Build the registered objects (or only names) now; returns {name: build seconds}"""
+        with self.lock:
+            names = list(self.factories) if names is None else list(names)
+        for name in names:
+            try:
+                self.get(name)
+            except Exception as e:
+                print(f"Warm-up of {name} failed: {e}")
+        built = {name: self.build_seconds[name] for name in names if name in self.build_seconds}
+        print(f"Warmed up {len(built)} workflow objects in {sum(built.values()):.3f}s")
+        return built
+
+    def stats(self):
+        """Registered and built names, build times and reuse count"""
+        with self.lock:
+            return {
+                "registered": list(self.factories),
+                "built": [name for name in self.factories if name in self.objects],
+                "build_seconds": dict(self.build_seconds),
+                "hits": self.hits
+            }
+
+REGISTRY = Registry()
+
+def register(name, factory):
+    """Register a factory on the shared registry"""
+    REGISTRY.register(name, factory)
+
+def get(name):
+    """Get an object from the shared registry"""
+    return REGISTRY.get(name)
+
+def warm_up(names=None):
+    """Build everything registered on the shared registry"""
+    return REGISTRY.warm_up(names)
+
+def stats():
+    """Stats of the shared registry"""
+    return REGISTRY.stats()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Workflow State Containers for HR Workflow
+
+Nodes return partial updates instead of deep-copying the whole state. The
+growing fields (messages, hr_notes, it_notes) are History objects: immutable
+append-only sequences where appending creates one small link that shares
+every earlier item. A step therefore costs the same whether the history
+holds ten messages or ten thousand, and old states stay valid because nothing
+is modified in place.
+
+append_history is the reducer for those fields (usable with LangGraph's
+Annotated state), merge_memory (onboarding_memory) merges the remembered
+facts, and merge_update applies a node's update outside a graph.
+"""
+
+from onboarding_memory import merge_memory
+
+class History(object):
+    """Immutable append-only sequence with O(1) append and cheap access to the newest items"""
+    __slots__ = ("_item", "_parent", "_length")
+
+    def __init__(self, items=()):
+        self._item = None
+        self._parent = None
+        self._length = 0
+        items = list(items)
+        if items:
+            # Build the links on a fresh empty History, then adopt the newest one
+            tail = History().extend(items)
+            self._item, self._parent, self._length = tail._item, tail._parent, tail._length
+
+    @staticmethod
+    def _link(parent, item):
+        node = object.__new__(History)
+        node._item = item
+        node._parent = parent
+        node._length = parent._length + 1
+        return node
+
+    def append(self, item):
+        """Return a new History with item added at the end"""
+        return History._link(self, item)
+
+    def extend(self, items):
+        """Return a new History with items added at the end"""
+        node = self
+        for item in items:
+            node = History._link(node, item)
+        return node
+
+    def _newest(self, count):
+        """Return up to count newest items, oldest first"""
+        items = []
+        node = self
+        while node._length and len(items) < count:
+            items.append(node._item)
+            node = node._parent
+        items.reverse()
+        return items
+
+    def to_list(self):
+        """Return all items as a new list"""
+        return self._newest(self._length)
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        return iter(self.to_list())
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            # history[-n:] only walks the last n links
+            if index.step is None and index.stop is None and index.start is not None and index.start < 0:
+                return self._newest(-index.start)
+            return self.to_list()[index]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("History index out of range")
+        return self._newest(self._length - index)[0]
+
+    def __eq__(self, other):
+        if isinstance(other, (History, list, tuple)):
+            return len(self) == len(other) and self.to_list() == list(other)
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "History({!r})".format(self.to_list())
+
+    def __reduce__(self):
+        # Pickle/deepcopy as a flat list instead of recursing through the links
+        return (History, (self.to_list(),))
+
+    def _asdict(self):
+        # The checkpoint serde stores objects with _asdict as their constructor arguments
+        return {"items": self.to_list()}
+
+def append_history(left, right):
+    """Reducer: append the items of a node's update to the existing History"""
+    if not isinstance(left, History):
+        left = History(left or ())
+    if not right:
+        return left
+    return left.extend(right)
+
+# Reducers for the fields nodes append to; other keys are replaced
+STATE_REDUCERS = {
+    "hr_notes": append_history,
+    "it_notes": append_history,
+    "messages": append_history,
+    "memory": merge_memory,
+    "cached_nodes": append_history,
+}
+
+def merge_update(state, update, reducers=STATE_REDUCERS):
+    """Return a new state with a node's partial update applied; unchanged values are shared"""
+    new_state = dict(state)
+    for key, value in update.items():
+        reducer = reducers.get(key)
+        new_state[key] = reducer(state.get(key), value) if reducer else value
+    return new_state